@@ -0,0 +1,116 @@
+"""Recall vs latency benchmark for MemoryCore storage profiles against a local Qdrant.
+
+Usage:
+    python -m benchmarks.qdrant_profiles --url http://localhost:6333 --points 20000
+    python -m benchmarks.qdrant_profiles --vectors my_embeddings.npy --profiles default balanced low_ram
+
+Every profile gets its own throw-away collection (bench_<profile>) filled with the same
+seeded vectors. Ground truth comes from exact (brute-force) search, so recall@k is
+comparable across profiles. Collections are deleted afterwards unless --keep is given.
+"""
+import argparse
+import time
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, SearchParams
+from src.core.storage_profile import StorageProfile, PROFILES
+
+
+def load_vectors(args, rng):
+    if args.vectors:
+        data = np.load(args.vectors).astype(np.float32)
+    else:
+        # Vektor sintetis dengan struktur cluster (lebih mirip embedding asli daripada noise murni)
+        centers = rng.normal(size=(64, args.dim)).astype(np.float32)
+        labels = rng.integers(0, len(centers), size=args.points + args.queries)
+        data = centers[labels] + 0.3 * rng.normal(size=(len(labels), args.dim)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data[:-args.queries], data[-args.queries:]
+
+
+def wait_for_index(client, name, timeout=600):
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        info = client.get_collection(name)
+        if str(info.status).lower().endswith("green"):
+            return
+        time.sleep(1)
+    print(f"⚠️ {name} not green after {timeout}s, measuring anyway")
+
+
+def run_profile(client, name, points, queries, k, keep):
+    profile = StorageProfile.from_name(name)
+    collection = f"bench_{name}"
+
+    if client.collection_exists(collection):
+        client.delete_collection(collection)
+    client.create_collection(collection_name=collection, **profile.collection_kwargs(points.shape[1]))
+
+    started = time.monotonic()
+    for i in range(0, len(points), 1000):
+        batch = points[i:i + 1000]
+        client.upsert(
+            collection_name=collection,
+            points=[PointStruct(id=i + j, vector=v.tolist(), payload={"i": i + j}) for j, v in enumerate(batch)],
+            wait=True
+        )
+    wait_for_index(client, collection)
+    ingest_s = time.monotonic() - started
+
+    recalls = []
+    latencies = []
+    for q in queries:
+        exact = client.query_points(
+            collection_name=collection, query=q.tolist(), limit=k,
+            search_params=SearchParams(exact=True)
+        ).points
+        truth = {p.id for p in exact}
+
+        t0 = time.perf_counter()
+        hits = client.query_points(
+            collection_name=collection, query=q.tolist(), limit=k,
+            search_params=profile.search_params()
+        ).points
+        latencies.append((time.perf_counter() - t0) * 1000)
+        recalls.append(len(truth & {p.id for p in hits}) / k)
+
+    if not keep:
+        client.delete_collection(collection)
+
+    latencies.sort()
+    return {
+        "profile": name,
+        "recall": float(np.mean(recalls)),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "ingest_s": ingest_s,
+        "describe": profile.describe(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--vectors", help=".npy file with real embeddings (rows = vectors)")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES))
+    parser.add_argument("--keep", action="store_true", help="keep bench_* collections afterwards")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    points, queries = load_vectors(args, rng)
+    client = QdrantClient(url=args.url, timeout=120)
+
+    print(f"📊 {len(points)} points, {len(queries)} queries, dim={points.shape[1]}, k={args.k}, seed={args.seed}")
+    print(f"{'profile':<10} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8} {'ingest s':>9}  settings")
+    for name in args.profiles:
+        r = run_profile(client, name, points, queries, args.k, args.keep)
+        print(f"{r['profile']:<10} {r['recall']:>9.3f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['ingest_s']:>9.1f}  {r['describe']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 from src.core.database import db
 from src.core.memory import memory
 from src.core.brain import brain
+from src.core.http import http_client
+from src.core.feeds import feed_parser
 
 load_dotenv()
 
@@ -23,6 +25,7 @@ class DiscordOS(commands.Bot):
         await db.connect()
         await memory.initialize()
         await brain.initialize()
+        await http_client.start()
         
         # 2. Load Cogs (Fitur)
         await self.load_extension("src.cogs.assistant")
@@ -44,7 +47,10 @@ class DiscordOS(commands.Bot):
         print("🚀 DiscordOS Kernel Online")
 
     async def close(self):
-        # Tutup koneksi database saat bot mati
+        # Flush antrean memori, lalu tutup koneksi database & HTTP pool saat bot mati
+        await memory.close()
+        await http_client.close()
+        feed_parser.close()
         await db.close()
         await super().close()
 
@@ -0,0 +1,134 @@
+"""One-off dedup of the long-term memory collection (points stored before deterministic IDs).
+
+Usage:
+    python -m scripts.dedup_memory                  # dry run: report what would change
+    python -m scripts.dedup_memory --apply
+    python -m scripts.dedup_memory --apply --threshold 0.97
+    python -m scripts.dedup_memory --apply --backfill-owner <discord_user_id>
+
+Points are grouped by their content-derived ID (same identity text + user + source).
+Each group keeps its oldest point, re-keyed to the deterministic ID so later re-ingests
+upsert over it; the other copies are deleted. With --threshold, remaining points of the
+same user whose vectors are at least that similar are merged too (one query per point).
+Memorize chunks (document_id set) are re-keyed per chunk, not merged with each other.
+With --backfill-owner, points stored without a user_id (os.memorize notes from before
+payloads carried one) are assigned to that user first, so per-user recall finds them.
+"""
+import argparse
+import os
+from dotenv import load_dotenv
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, PointIdsList
+from src.core.dedup import content_id, identity_text, merge_payloads
+from src.core.memory import MemoryCore
+
+load_dotenv()
+
+
+def point_key(payload):
+    if payload.get("document_id") is not None:
+        text = f"{payload['document_id']}\x00{payload.get('chunk_index')}\x00{payload.get('content', '')}"
+    else:
+        text = identity_text(payload)
+    return content_id(text, payload.get("user_id"), payload.get("source")) if text else None
+
+
+def scroll_all(client, collection, batch_size):
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection, limit=batch_size, offset=offset,
+            with_payload=True, with_vectors=True
+        )
+        yield from points
+        if offset is None:
+            break
+
+
+def dense_vector(vector):
+    # Koleksi hybrid mengembalikan {"": dense, "bm25": sparse}
+    return vector.get("") if isinstance(vector, dict) else vector
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--collection", default="second_brain")
+    parser.add_argument("--threshold", type=float, help="also merge near-duplicates above this cosine similarity")
+    parser.add_argument("--backfill-owner", help="assign this user_id to points stored without one")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--apply", action="store_true", help="write changes (default is a dry run)")
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.url, timeout=120)
+    core = MemoryCore()  # hanya untuk point_vector (BM25) saat re-upsert
+    info = client.get_collection(args.collection)
+    core.hybrid = bool(info.config.params.sparse_vectors)
+
+    groups = {}
+    total = 0
+    backfilled = set()
+    for point in scroll_all(client, args.collection, args.batch_size):
+        total += 1
+        if args.backfill_owner and not (point.payload or {}).get("user_id"):
+            # Pemilik ikut menentukan ID deterministik, jadi diisi sebelum pengelompokan
+            point.payload = dict(point.payload or {}, user_id=str(args.backfill_owner))
+            backfilled.add(str(point.id))
+        key = point_key(point.payload or {}) or str(point.id)
+        groups.setdefault(key, []).append(point)
+
+    near = 0
+    if args.threshold:
+        for key in list(groups):
+            points = groups.get(key)
+            payload = (points[0].payload or {}) if points else {}
+            if not points or payload.get("document_id") is not None:
+                continue
+            hits = client.query_points(
+                collection_name=args.collection, query=dense_vector(points[0].vector),
+                query_filter=MemoryCore.build_filter(user_id=payload.get("user_id")),
+                score_threshold=args.threshold, limit=10, with_payload=True
+            ).points
+            for hit in hits:
+                other = point_key(hit.payload or {}) or str(hit.id)
+                if other == key or other not in groups or (hit.payload or {}).get("document_id") is not None:
+                    continue
+                # Gabungkan grup near-duplicate ke grup ini
+                points.extend(groups.pop(other))
+                near += 1
+
+    upserts = []
+    deletes = []
+    for key, points in groups.items():
+        points.sort(key=lambda p: str((p.payload or {}).get("timestamp", "")))
+        keep = points[0]
+        payload = keep.payload or {}
+        for extra in points[1:]:
+            payload = merge_payloads(payload, extra.payload or {})
+        if str(keep.id) != key or len(points) > 1 or str(keep.id) in backfilled:
+            upserts.append({"id": key, "vector": dense_vector(keep.vector), "payload": payload})
+        deletes.extend(str(p.id) for p in points if str(p.id) != key)
+
+    print(
+        f"📊 {total} points, {len(groups)} unique ({near} near-duplicate group(s) merged), "
+        f"{len(deletes)} to delete, {len(upserts)} to re-key/merge, {len(backfilled)} owner backfill(s)"
+    )
+
+    if not args.apply:
+        print("ℹ️ Dry run, nothing written (use --apply)")
+        return
+
+    for i in range(0, len(upserts), args.batch_size):
+        batch = upserts[i:i + args.batch_size]
+        client.upsert(collection_name=args.collection, points=[
+            PointStruct(id=p["id"], vector=core.point_vector(p["vector"], core.payload_text(p["payload"])), payload=p["payload"])
+            for p in batch
+        ])
+    # Hapus setelah upsert: jika job terhenti di tengah, tidak ada data yang hilang
+    for i in range(0, len(deletes), args.batch_size):
+        client.delete(collection_name=args.collection, points_selector=PointIdsList(points=deletes[i:i + args.batch_size]))
+    print(f"✅ Dedup done: {len(upserts)} upserted, {len(deletes)} deleted")
+
+
+if __name__ == "__main__":
+    main()
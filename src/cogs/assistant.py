@@ -1,12 +1,69 @@
 import discord
 from discord.ext import commands
-from src.core.database import db
+import asyncio
+import os
 from src.core.memory import memory
 from src.core.brain import brain
+from src.core.streaming import DiscordStreamSink
+
+# Batas waktu tiap langkah sebelum reply; jika lewat, reply jalan tanpa hasil langkah itu
+HISTORY_TIMEOUT = float(os.getenv("ASSISTANT_HISTORY_TIMEOUT", 1.5))
+RECALL_TIMEOUT = float(os.getenv("ASSISTANT_RECALL_TIMEOUT", 2.5))
 
 class Assistant(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self._background = set()  # Pekerjaan setelah reply (simpan turn bot, lipat summary)
+        self._folding = set()     # user_id yang summary-nya sedang dilipat
+
+    async def cog_unload(self):
+        # Beri kesempatan pekerjaan setelah reply selesai sebelum cog dilepas
+        if self._background:
+            await asyncio.wait(self._background, timeout=10)
+
+    @staticmethod
+    async def _bounded(awaitable, timeout, fallback, label):
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Assistant {label} timed out after {timeout}s, replying without it")
+        except Exception as e:
+            print(f"⚠️ Assistant {label} Error: {e}")
+        return fallback
+
+    async def _recall(self, user_id, text):
+        vector = await brain.embed_content(text)
+        if not vector:
+            return []
+        # Search Qdrant (hanya memori user ini + berita sistem); kandidat lebih banyak, dipangkas oleh context builder.
+        # Catatan lama tanpa user_id tidak ikut: beri pemilik dengan `scripts.dedup_memory --backfill-owner`.
+        return await memory.recall(
+            query_vector=vector,
+            limit=6,
+            user_id=[user_id, "system_rss"],
+            query_text=text
+        )
+
+    async def _after_reply(self, user_id, response_text, summary, overflow):
+        # Save Bot Response to Short-term Memory
+        await brain.short_term.add(user_id, f"Assistant: {response_text}")
+
+        # Lipat turn yang tidak muat ke rolling summary, lalu buang dari list.
+        # Satu fold per user: pesan yang tumpang tindih tidak melipat turn yang sama dua kali.
+        if not overflow or user_id in self._folding:
+            return
+        self._folding.add(user_id)
+        try:
+            if await brain.context.fold(user_id, summary, overflow) is not None:
+                await brain.short_term.drop_folded(user_id, overflow)
+        finally:
+            self._folding.discard(user_id)
+
+    def _run_in_background(self, coro):
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
 
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -20,62 +77,42 @@ class Assistant(commands.Cog):
         
         if is_dm or is_mentioned:
             async with message.channel.typing():
-                # 1. Save to Short-term Memory (Dragonfly)
                 user_id = str(message.author.id)
-                chat_key = f"chat:{user_id}"
                 
                 # Format: "User: Hello"
                 new_entry = f"User: {message.content}"
-                
-                if db.dragonfly:
-                    # Append to list, expire in 10 mins (600s)
-                    await db.dragonfly.rpush(chat_key, new_entry)
-                    await db.dragonfly.expire(chat_key, 600)
-                    
-                    # Retrieve last 10 messages for context
-                    history_list = await db.dragonfly.lrange(chat_key, -10, -1)
-                    history_text = "\n".join(history_list)
-                else:
-                    history_text = new_entry
 
-                # 2. Recall Long-term Memory (Qdrant)
-                vector = await brain.embed_content(message.content)
-                qa_context = ""
-                
-                if vector:
-                    # Search Qdrant
-                    search_results = await memory.recall(query_vector=vector, limit=3)
-                    
-                    if search_results:
-                        qa_context = "\nRelevant Knowledge:\n"
-                        for res in search_results:
-                            # Assuming payload has 'content' field
-                            qa_context += f"- {res.payload.get('content', '')}\n"
+                # 1 & 2 paralel: short-term history (Dragonfly) dan embed -> recall (Qdrant).
+                # Write history di-shield: tetap selesai walau reply tidak menunggunya.
+                (history_list, summary), search_results = await asyncio.gather(
+                    self._bounded(
+                        asyncio.shield(brain.short_term.add_and_load(user_id, new_entry)),
+                        HISTORY_TIMEOUT, ([new_entry], ""), "History"
+                    ),
+                    self._bounded(self._recall(user_id, message.content), RECALL_TIMEOUT, [], "Recall")
+                )
 
-                context = f"Short-term History:\n{history_text}\n{qa_context}"
+                # Susun context sesuai budget token model (summary + turn terbaru + knowledge)
+                built = brain.context.build(history_list, search_results, summary, budget=brain.context_budget())
+                context = built.text
 
                 # 3. Think (Brain)
                 # Clean prompt (remove mention)
                 clean_content = message.content.replace(f"<@{self.bot.user.id}>", "").strip()
                 
-                response_text = await brain.think(
-                    prompt=clean_content, 
+                # 4. Reply while thinking (streamed: pesan di-edit bertahap, rollover di 2000 karakter)
+                sink = DiscordStreamSink(message.channel)
+                async for chunk in brain.think_stream(
+                    prompt=clean_content,
                     context=context
-                )
-
-                # 4. Reply
-                # Split long messages if needed (Discord limit 2000)
-                if len(response_text) > 2000:
-                    for i in range(0, len(response_text), 2000):
-                        await message.channel.send(response_text[i:i+2000])
-                else:
-                    await message.channel.send(response_text)
+                ):
+                    await sink.write(chunk)
+                response_text = await sink.close()
 
-                # 5. Save Bot Response to Short-term Memory
-                if db.dragonfly:
-                    bot_entry = f"Assistant: {response_text}"
-                    await db.dragonfly.rpush(chat_key, bot_entry)
-                    await db.dragonfly.expire(chat_key, 600)
+            # 5. Setelah reply: simpan turn bot & lipat summary di luar jalur reply
+            # Overflow dilipat per batch (bukan tiap pesan): satu panggilan LLM untuk beberapa turn
+            overflow = built.overflow if built.fold_due else []
+            self._run_in_background(self._after_reply(user_id, response_text, summary, overflow))
 
 async def setup(bot):
     await bot.add_cog(Assistant(bot))
@@ -40,17 +40,17 @@ class OpenAIConfigModal(discord.ui.Modal, title="Configure OpenAI/Ollama"):
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        # Save settings
-        await db.set_setting("ai_provider", "openai")
-        await db.set_setting("openai_base_url", self.base_url.value)
-        await db.set_setting("openai_api_key", self.api_key.value or "ollama")
-        await db.set_setting("openai_model", self.model_name.value)
-        await db.set_setting("embed_provider", self.embed_provider.value)
+        # Save settings (satu transaksi; brain reload otomatis lewat invalidasi settings)
+        values = {
+            "ai_provider": "openai",
+            "openai_base_url": self.base_url.value,
+            "openai_api_key": self.api_key.value or "ollama",
+            "openai_model": self.model_name.value,
+            "embed_provider": self.embed_provider.value,
+        }
         if self.embed_model.value:
-            await db.set_setting("embed_model", self.embed_model.value)
-
-        # Reload Brain
-        await brain.reload()
+            values["embed_model"] = self.embed_model.value
+        await db.set_settings(values)
 
         embed = discord.Embed(title="✅ AI Configuration Updated", color=discord.Color.green())
         embed.add_field(name="Provider", value="OpenAI/Ollama", inline=True)
@@ -69,11 +69,8 @@ class GeminiConfigModal(discord.ui.Modal, title="Configure Google Gemini"):
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        await db.set_setting("gemini_api_key", self.api_key.value)
         # Default embed provider to gemini if not set
-        await db.set_setting("embed_provider", "gemini")
-
-        await brain.reload()
+        await db.set_settings({"gemini_api_key": self.api_key.value, "embed_provider": "gemini"})
 
         embed = discord.Embed(title="✅ Gemini Configuration Updated", color=discord.Color.green())
         embed.add_field(name="Provider", value="Google Gemini", inline=True)
@@ -86,6 +83,7 @@ class ProviderSelect(discord.ui.Select):
             discord.SelectOption(label="Ollama / Local AI", description="Connect to local Ollama instance", emoji="🦙", value="ollama"),
             discord.SelectOption(label="OpenAI Compatible", description="OpenAI, Groq, DeepSeek, etc.", emoji="🤖", value="openai"),
             discord.SelectOption(label="Google Gemini", description="Use Google's Gemini API", emoji="✨", value="gemini"),
+            discord.SelectOption(label="Auto (Fastest)", description="Route to the fastest healthy configured provider", emoji="⚡", value="auto"),
         ]
         super().__init__(placeholder="Select AI Provider...", min_values=1, max_values=1, options=options)
 
@@ -118,6 +116,17 @@ class ProviderSelect(discord.ui.Select):
             modal = GeminiConfigModal()
             await interaction.response.send_modal(modal)
 
+        elif self.values[0] == "auto":
+            await interaction.response.defer(ephemeral=True)
+
+            await db.set_setting("ai_provider", "auto")
+
+            embed = discord.Embed(title="✅ Latency Routing Enabled", color=discord.Color.green())
+            embed.add_field(name="Providers", value=", ".join(brain.available_providers()) or "None configured", inline=True)
+            embed.add_field(name="Hedging", value="Set `ai_hedge` to `on` to hedge interactive chat", inline=False)
+
+            await interaction.followup.send(embed=embed, ephemeral=True)
+
 class ConfigView(discord.ui.View):
     def __init__(self):
         super().__init__()
@@ -141,7 +150,10 @@ class Configuration(commands.Cog):
         model_info = "N/A"
         provider_info = "Not Configured"
 
-        if active_provider == "openai" and brain.qwen:
+        if active_provider == "auto":
+            provider_info = "Auto (Latency Routing)"
+            model_info = brain.router.summary()
+        elif active_provider == "openai" and brain.qwen:
             provider_info = f"OpenAI/Ollama ({settings.get('openai_base_url', 'Unknown')})"
             model_info = settings.get("openai_model", "Unknown")
         elif brain.gemini:
@@ -37,7 +37,7 @@ class Finance(commands.Cog):
         if not db.pg_pool: return []
 
         query = "SELECT id, name FROM accounts WHERE is_active = TRUE AND name ILIKE $1 LIMIT 25"
-        async with db.pg_pool.acquire() as conn:
+        async with db.acquire() as conn:
             rows = await conn.fetch(query, f"%{current}%")
             return [app_commands.Choice(name=row['name'], value=row['id']) for row in rows]
 
@@ -62,7 +62,7 @@ class Finance(commands.Cog):
             RETURNING id
         """
         try:
-            async with db.pg_pool.acquire() as conn:
+            async with db.acquire() as conn:
                 val = await conn.fetchval(query, name, type.value, balance)
                 await interaction.followup.send(f"✅ Account Created: **{name}** ({type.value}) - ID: {val}")
         except Exception as e:
@@ -128,7 +128,7 @@ class Finance(commands.Cog):
             else:
                 contact_name = contact_id_or_name # User typed a manual name
 
-        async with db.pg_pool.acquire() as conn:
+        async with db.acquire() as conn:
             async with conn.transaction():
                 # 1. Insert Transaction
                 query_tx = """
@@ -44,7 +44,11 @@ class Health(commands.Cog):
             data = {"analysis": analysis, "image_url": photo.url}
             await db.log_health_data(interaction.user.id, "face_check", data)
 
-            # Save to Memory (Vector Store)
+            embed = discord.Embed(title="🧬 Face Health Analysis", description=analysis, color=discord.Color.green())
+            embed.set_thumbnail(url=photo.url)
+            await interaction.followup.send(embed=embed)
+
+            # Save to Memory (Vector Store) setelah reply; upsert-nya di-batch oleh memory writer
             vector = await brain.embed_content(analysis)
             if vector:
                 await memory.remember(
@@ -53,10 +57,6 @@ class Health(commands.Cog):
                     payload={"type": "face_check", "content": analysis, "url": photo.url}
                 )
 
-            embed = discord.Embed(title="🧬 Face Health Analysis", description=analysis, color=discord.Color.green())
-            embed.set_thumbnail(url=photo.url)
-            await interaction.followup.send(embed=embed)
-
         except Exception as e:
             await interaction.followup.send(f"❌ Error analyzing face: {e}")
 
@@ -96,7 +96,8 @@ class Health(commands.Cog):
 
             # Analyze/Encourage
             prompt = f"The user weighs {weight_val} kg. Give a very short, encouraging 1-sentence comment."
-            comment = await brain.think(prompt=prompt) # Text only
+            # Exact cache saja: prompt yang hanya beda angka berat terlihat "mirip" bagi semantic cache
+            comment = await brain.think(prompt=prompt, cache=True, semantic=False) # Text only
 
             # Save
             data = {"weight": weight_val, "comment": comment}
@@ -141,7 +142,11 @@ class Health(commands.Cog):
             data = {"analysis": analysis, "input": text, "image_url": image_url}
             await db.log_health_data(interaction.user.id, "nutrition", data)
 
-            # Memory
+            embed = discord.Embed(title="🍎 Nutrition Analysis", description=analysis, color=discord.Color.orange())
+            if image_url: embed.set_thumbnail(url=image_url)
+            await interaction.followup.send(embed=embed)
+
+            # Memory (setelah reply)
             vector = await brain.embed_content(analysis)
             if vector:
                 await memory.remember(
@@ -150,10 +155,6 @@ class Health(commands.Cog):
                     {"type": "nutrition", "content": analysis}
                 )
 
-            embed = discord.Embed(title="🍎 Nutrition Analysis", description=analysis, color=discord.Color.orange())
-            if image_url: embed.set_thumbnail(url=image_url)
-            await interaction.followup.send(embed=embed)
-
         except Exception as e:
              await interaction.followup.send(f"❌ Error analyzing nutrition: {e}")
 
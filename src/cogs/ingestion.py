@@ -2,11 +2,12 @@ import discord
 from discord.ext import commands
 from src.core.memory import memory
 from src.core.brain import brain
-from qdrant_client.models import PointStruct
-import uuid
 import datetime
+from src.core.chunking import chunk_text
+from src.core.dedup import content_id
 
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB limit
+UPSERT_BATCH_SIZE = 512  # Jaga ukuran request Qdrant tetap wajar untuk file besar
 
 class Ingestion(commands.Cog):
     def __init__(self, bot):
@@ -16,9 +17,9 @@ class Ingestion(commands.Cog):
     async def memorize(self, ctx, *, content: str = None):
         """Save text or attached file content to Long-term Memory"""
         
-        content_parts = []
+        documents = []  # (filename, text)
         if content:
-            content_parts.append(content)
+            documents.append((None, content))
         
         # Handle Attachments (Text files only for now)
         if ctx.message.attachments:
@@ -30,45 +31,70 @@ class Ingestion(commands.Cog):
                     try:
                         file_data = await attachment.read()
                         text_data = file_data.decode('utf-8')
-                        content_parts.append(f"File: {attachment.filename}\n{text_data}")
+                        documents.append((attachment.filename, text_data))
                     except Exception as e:
                         await ctx.send(f"❌ Failed to read {attachment.filename}: {e}")
-        
-        target_content = "\n\n".join(content_parts)
 
-        if not target_content:
+        if not documents:
             await ctx.send("❓ Please provide text or a text file to memorize.")
             return
 
         async with ctx.typing():
-            # 1. Embed Content
-            vector = await brain.embed_content(target_content)
-            
-            if not vector:
+            # 1. Chunk (structure-aware, token-bounded)
+            chunks = []
+            for filename, text in documents:
+                for chunk in chunk_text(text, filename=filename):
+                    # Prefix nama file/section agar chunk tetap bermakna saat di-recall sendiri
+                    header = " > ".join(part for part in [filename, chunk["section"]] if part)
+                    chunk["content"] = f"File: {header}\n{chunk['text']}" if header else chunk["text"]
+                    chunk["filename"] = filename
+                    chunks.append(chunk)
+
+            if not chunks:
+                await ctx.send("❓ Please provide text or a text file to memorize.")
+                return
+
+            # 2. Embed all chunks in batches
+            vectors, errors = await brain.embed_many([c["content"] for c in chunks])
+
+            # 3. Bulk upsert with a shared document ID + chunk ordinals.
+            # ID deterministik: memorize ulang isi yang sama menimpa point lama (idempotent)
+            user_id = str(ctx.author.id)
+            source = "discord_command"
+            document_id = content_id("\x00".join(text for _, text in documents), user_id, source)
+            timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            points = []
+            for ordinal, (chunk, vector) in enumerate(zip(chunks, vectors)):
+                if not vector:
+                    continue
+                points.append({
+                    "id": content_id(f"{document_id}\x00{ordinal}\x00{chunk['content']}", user_id, source),
+                    "vector": vector,
+                    "payload": {
+                        "content": chunk["content"],
+                        "document_id": document_id,
+                        "chunk_index": ordinal,
+                        "chunk_count": len(chunks),
+                        "section": chunk["section"],
+                        "filename": chunk["filename"],
+                        "author": str(ctx.author),
+                        "user_id": user_id,
+                        "type": "note",
+                        "timestamp": timestamp,
+                        "source": source
+                    }
+                })
+
+            if not points:
                 await ctx.send("❌ Failed to generate embedding.")
                 return
 
-            # 2. Store in Qdrant
-            point_id = str(uuid.uuid4())
-            payload = {
-                "content": target_content,
-                "author": str(ctx.author),
-                "timestamp": datetime.datetime.now().isoformat(),
-                "source": "discord_command"
-            }
-            
             try:
-                await memory.client.upsert(
-                    collection_name=memory.collection_name,
-                    points=[
-                        PointStruct(
-                            id=point_id,
-                            vector=vector,
-                            payload=payload
-                        )
-                    ]
-                )
-                await ctx.send(f"✅ Memorized! (ID: {point_id})")
+                for i in range(0, len(points), UPSERT_BATCH_SIZE):
+                    if not await memory.store(points[i:i + UPSERT_BATCH_SIZE]):
+                        raise RuntimeError("long-term memory unavailable")
+                note = f", {len(errors)} chunk(s) failed" if errors else ""
+                await ctx.send(f"✅ Memorized! (ID: {document_id}, {len(points)} chunk(s){note})")
             except Exception as e:
                 await ctx.send(f"❌ Storage Error: {e}")
 
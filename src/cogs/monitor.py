@@ -5,7 +5,7 @@ import psutil
 import platform
 import time
 import socket
-import aiohttp
+from src.core.http import http_client
 import datetime
 
 class Monitor(commands.Cog):
@@ -32,9 +32,7 @@ class Monitor(commands.Cog):
 
     async def get_public_ip(self):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get('https://api.ipify.org') as resp:
-                    return await resp.text()
+            return await http_client.fetch_text('https://api.ipify.org', timeout=5) or "Unknown"
         except:
             return "Unknown"
 
@@ -1,19 +1,42 @@
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
-import feedparser
 import asyncio
-import aiohttp
-from bs4 import BeautifulSoup
 from src.core.database import db
 from src.core.brain import brain
 from src.core.memory import memory
+from src.core.http import http_client
+from src.core.feeds import feed_parser, FEED_MAX_BYTES, ARTICLE_MAX_BYTES
+from src.core.pipeline import Pipeline
+from urllib.parse import urlparse
 import datetime
+import functools
+import hashlib
+import os
+import time
+
+# Pipeline: fetch -> extract -> summarize -> publish -> persist, worker per stage
+RSS_WORKERS = {
+    "fetch": int(os.getenv("RSS_CONCURRENCY", 8)),
+    "extract": int(os.getenv("RSS_EXTRACT_WORKERS", 4)),
+    "summarize": int(os.getenv("RSS_SUMMARIZE_WORKERS", 3)),
+    "publish": int(os.getenv("RSS_PUBLISH_WORKERS", 1)),
+    "persist": int(os.getenv("RSS_PERSIST_WORKERS", 2)),
+}
+RSS_QUEUE_SIZE = int(os.getenv("RSS_QUEUE_SIZE", 16))
+RSS_PER_HOST = int(os.getenv("RSS_PER_HOST", 2))
+RSS_FEED_TIMEOUT = float(os.getenv("RSS_FEED_TIMEOUT", 60))
+RSS_PENDING_MAX_AGE = int(os.getenv("RSS_PENDING_MAX_AGE", 24))  # jam
+# Status di rss_logs -> stage tempat artikel dilanjutkan setelah restart
+RESUME_STAGE = {"pending": "extract", "summarized": "publish", "published": "persist"}
 
 class RSS(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.feed_channel_id = None
+        self.host_limits = {}
+        self.cycle_feeds = []
+        self.last_cycle = None  # {"finished_at", "duration", "feeds": [(url, seconds, status)], "stages", "resumed"}
         self.rss_loop.start()
 
     def cog_unload(self):
@@ -32,15 +55,19 @@ class RSS(commands.Cog):
     async def add_feed(self, interaction: discord.Interaction, url: str, category: str = "general"):
         await interaction.response.defer()
 
-        # Verify URL
+        # Verify URL (async fetch, parsing di thread pool agar event loop tidak tertahan)
         try:
-            d = feedparser.parse(url)
-            if d.bozo:
+            resp = await http_client.fetch(url, timeout=10, max_bytes=FEED_MAX_BYTES)
+            if resp.status != 200:
+                await interaction.followup.send(f"⚠️ Feed returned HTTP {resp.status}.")
+                return
+            d = await feed_parser.parse_feed(resp.body)
+            if d['bozo']:
                 # Some valid feeds trigger bozo (encoding issues), but if entries exist, it's usable
-                if not d.entries:
+                if not d['entries']:
                     await interaction.followup.send("⚠️ Invalid RSS Feed URL.")
                     return
-            title = d.feed.get('title', url)
+            title = d['title'] or url
         except Exception as e:
             await interaction.followup.send(f"❌ Error parsing feed: {e}")
             return
@@ -61,24 +88,32 @@ class RSS(commands.Cog):
         text = "\n".join([f"- {f['url']} ({f['category']})" for f in feeds])
         await interaction.response.send_message(f"**tracked Feeds:**\n{text}")
 
+    @rss_group.command(name="stats", description="Show timing of the last RSS polling cycle")
+    async def feed_stats(self, interaction: discord.Interaction):
+        if not self.last_cycle:
+            await interaction.response.send_message("📭 No RSS cycle has run yet.")
+            return
+
+        cycle = self.last_cycle
+        slowest = sorted(cycle["feeds"], key=lambda f: f[1], reverse=True)[:10]
+        lines = [f"`{seconds:6.1f}s` {status} {url}" for url, seconds, status in slowest]
+        stages = [
+            f"`{s['stage']:<9}` x{s['workers']} | {s['processed']} done, {s['errors']} err | "
+            f"busy {s['busy']:.1f}s | max queue {s['max_depth']}"
+            for s in cycle["stages"]
+        ]
+        await interaction.response.send_message(
+            f"**Last cycle:** {cycle['duration']:.1f}s for {len(cycle['feeds'])} feed(s), "
+            f"{cycle['resumed']} resumed article(s), <t:{int(cycle['finished_at'])}:R>\n"
+            + "\n".join(stages) + "\n**Slowest feeds:**\n" + "\n".join(lines)
+        )
+
     async def fetch_full_content(self, url):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=10) as resp:
-                    if resp.status != 200: return None
-                    html = await resp.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-
-                    # Heuristics to find main content (can be improved)
-                    # Exclude header/footer/nav
-                    for tag in soup(['script', 'style', 'nav', 'header', 'footer']):
-                        tag.extract()
-
-                    paragraphs = soup.find_all('p')
-                    text = " ".join([p.get_text() for p in paragraphs])
-                    # Take first chunk that looks substantial
-                    return text[:4000] # Limit context for AI
-        except:
+            resp = await http_client.fetch(url, timeout=10, max_bytes=ARTICLE_MAX_BYTES)
+            if resp.status != 200 or not resp.body: return None
+            return await feed_parser.extract_article(resp.text()) or None
+        except Exception:
             return None
 
     @tasks.loop(minutes=15)
@@ -92,63 +127,166 @@ class RSS(commands.Cog):
         channel = self.bot.get_channel(self.feed_channel_id)
         if not channel: return
 
-        for feed in feeds:
+        pipeline = self.build_pipeline(channel)
+        self.cycle_feeds = []
+        resumed = 0
+        started = time.monotonic()
+        pipeline.start()
+        try:
+            # Artikel yang tertinggal dari run sebelumnya (restart / stage gagal) dilanjutkan dulu
+            for row in await db.get_unfinished_articles(RSS_PENDING_MAX_AGE):
+                stage = RESUME_STAGE.get(row['status'])
+                if not stage:
+                    continue
+                await pipeline.put(stage, {
+                    "feed_id": row['feed_id'], "category": row['category'], "source": row['source'],
+                    "link": row['article_url'], "title": row['title'], "summary": row['summary'] or "",
+                })
+                resumed += 1
+
+            # put() menunggu jika queue penuh: backpressure sampai ke sini
+            for feed in feeds:
+                await pipeline.put("fetch", feed)
+            await pipeline.join()
+        finally:
+            await pipeline.close()
+
+        self.last_cycle = {
+            "finished_at": time.time(), "duration": time.monotonic() - started,
+            "feeds": self.cycle_feeds, "stages": pipeline.summary(), "resumed": resumed,
+        }
+
+    def build_pipeline(self, channel):
+        pipeline = Pipeline("RSS")
+        pipeline.add_stage("fetch", self._fetch_stage, RSS_WORKERS["fetch"], RSS_QUEUE_SIZE, fan_out=True)
+        pipeline.add_stage("extract", self._extract_stage, RSS_WORKERS["extract"], RSS_QUEUE_SIZE)
+        pipeline.add_stage("summarize", self._summarize_stage, RSS_WORKERS["summarize"], RSS_QUEUE_SIZE)
+        pipeline.add_stage("publish", functools.partial(self._publish_stage, channel=channel), RSS_WORKERS["publish"], RSS_QUEUE_SIZE)
+        pipeline.add_stage("persist", self._persist_stage, RSS_WORKERS["persist"], RSS_QUEUE_SIZE)
+        return pipeline
+
+    def _host_limit(self, url):
+        host = urlparse(url).hostname or url
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(RSS_PER_HOST)
+        return self.host_limits[host]
+
+    async def _fetch_stage(self, feed):
+        """Fetch one feed under the per-host limit and timeout; returns its new articles"""
+        async with self._host_limit(feed['url']):
+            started = time.monotonic()
+            status, articles = "error", []
             try:
-                # Async fetch feed content first
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(feed['url'], timeout=10) as resp:
-                        if resp.status != 200: continue
-                        content = await resp.text()
+                status, articles = await asyncio.wait_for(self._fetch_feed(feed), RSS_FEED_TIMEOUT)
+            except asyncio.TimeoutError:
+                status = "timeout"
+                print(f"⚠️ RSS Timeout ({feed['url']}) after {RSS_FEED_TIMEOUT}s")
+            except Exception as e:
+                print(f"❌ RSS Error ({feed['url']}): {e}")
+            self.cycle_feeds.append((feed['url'], time.monotonic() - started, status))
+            return articles
+
+    async def _fetch_feed(self, feed):
+        """Conditional GET + parse; new entries are recorded as pending. Returns (status, articles)"""
+        headers = {}
+        if feed.get('etag'):
+            headers['If-None-Match'] = feed['etag']
+        if feed.get('last_modified'):
+            headers['If-Modified-Since'] = feed['last_modified']
 
-                d = feedparser.parse(content)
+        # Async fetch feed content first (pooled, keep-alive)
+        resp = await http_client.fetch(feed['url'], headers=headers, timeout=10, max_bytes=FEED_MAX_BYTES)
+        if resp.status == 304:
+            return "not modified", []
+        if resp.status != 200 or not resp.body:
+            return f"http {resp.status}", []
 
-                # Check last 3 entries
-                for entry in d.entries[:3]:
-                    link = entry.get('link')
-                    if not link: continue
+        # Server tanpa ETag/Last-Modified: bandingkan hash body
+        content_hash = hashlib.sha256(resp.body).hexdigest()
+        if content_hash == feed.get('content_hash'):
+            return "unchanged", []
 
-                    # Check DB if processed
-                    if await db.is_article_processed(link):
-                        continue
+        # feedparser menerima bytes dan mendeteksi encoding sendiri
+        d = await feed_parser.parse_feed(resp.body)
 
-                    # Process New Article
-                    title = entry.get('title', 'No Title')
-                    raw_summary = entry.get('summary', '')
+        # Semua entry dicek sekaligus (seen-set Dragonfly + satu query Postgres)
+        new_links = await db.filter_new_articles(feed['id'], [entry['link'] for entry in d['entries']])
+        if new_links is None:
+            return "error", []
+        new_links = set(new_links)
 
-                    # Try to fetch full content for better summarization
-                    full_text = await self.fetch_full_content(link)
-                    context_text = full_text if full_text else raw_summary
+        by_link = {}
+        for entry in d['entries']:
+            if entry['link'] in new_links and entry['link'] not in by_link:
+                by_link[entry['link']] = entry
+        articles = [
+            {"feed_id": feed['id'], "category": feed['category'], "source": d['title'],
+             "link": link, "title": entry['title'], "summary": entry['summary']}
+            for link, entry in by_link.items()
+        ]
 
-                    if not context_text: context_text = title
+        # Poll pertama (feed baru, atau feed lama setelah migrasi 0003): isi feed saat ini jadi baseline,
+        # dicatat 'done' tanpa dipublikasikan, agar backlog lama tidak membanjiri channel
+        baseline = feed.get('checked_at') is None
+        if articles:
+            inserted = await db.add_pending_articles(
+                feed['id'], articles, source=d['title'], status="done" if baseline else "pending"
+            )
+            if inserted is None:
+                return "error", []
+            # Replika lain mungkin sudah mengklaim sebagian link
+            inserted = set(inserted)
+            articles = [a for a in articles if a['link'] in inserted]
 
-                    # AI Summarize
-                    prompt = f"Summarize this news article in maximum 3 concise bullet points. Focus on the main event and economic/global impact. Title: {title}\nContent: {context_text}"
+        # Artikel baru sudah tercatat 'pending', jadi validator aman disimpan sekarang
+        await db.update_rss_feed_cache(
+            feed['id'], resp.headers.get('ETag'), resp.headers.get('Last-Modified'), content_hash
+        )
+        if baseline:
+            return "baseline", []
+        return "ok", articles
 
-                    # Use default configured brain
-                    ai_summary = await brain.think(prompt=prompt)
+    async def _extract_stage(self, article):
+        # Try to fetch full content for better summarization
+        full_text = await self.fetch_full_content(article['link'])
+        article['text'] = full_text or article['summary'] or article['title']
+        return article
 
-                    # Publish
-                    embed = discord.Embed(title=title, url=link, description=ai_summary, color=discord.Color.gold())
-                    embed.set_footer(text=f"Source: {d.feed.get('title', 'RSS')} | Cat: {feed['category']}")
-                    await channel.send(embed=embed)
+    async def _summarize_stage(self, article):
+        prompt = f"Summarize this news article in maximum 3 concise bullet points. Focus on the main event and economic/global impact. Title: {article['title']}\nContent: {article['text']}"
 
-                    # Log to DB
-                    await db.log_rss_article(feed['id'], link, title, ai_summary)
+        # Use default configured brain (cached: artikel yang sama tidak diringkas ulang)
+        ai_summary = await brain.think(prompt=prompt, cache=True, priority="background")
+        if not ai_summary or ai_summary.lstrip().startswith("❌"):
+            # Tetap 'pending': dicoba lagi di siklus berikutnya
+            print(f"⚠️ RSS Summary Failed ({article['link']}): {ai_summary}")
+            return None
 
-                    # Remember in Vector DB
-                    vector = await brain.embed_content(f"{title} {ai_summary}")
-                    if vector:
-                         await memory.remember(
-                            "system_rss", # System user
-                            vector,
-                            {"type": "news", "title": title, "summary": ai_summary, "url": link}
-                         )
+        article['summary'] = ai_summary
+        await db.set_article_status(article['link'], "summarized", ai_summary)
+        return article
 
-                    # Wait a bit to not spam/rate limit
-                    await asyncio.sleep(2)
+    async def _publish_stage(self, article, channel):
+        embed = discord.Embed(title=article['title'], url=article['link'], description=article['summary'], color=discord.Color.gold())
+        embed.set_footer(text=f"Source: {article['source'] or 'RSS'} | Cat: {article['category']}")
+        await channel.send(embed=embed)
+        await db.set_article_status(article['link'], "published")
 
-            except Exception as e:
-                print(f"❌ RSS Error ({feed['url']}): {e}")
+        # Wait a bit to not spam/rate limit
+        await asyncio.sleep(2)
+        return article
+
+    async def _persist_stage(self, article):
+        # Remember in Vector DB
+        vector = await brain.embed_content(f"{article['title']} {article['summary']}")
+        if vector:
+            await memory.remember(
+                "system_rss", # System user
+                vector,
+                {"type": "news", "title": article['title'], "summary": article['summary'], "url": article['link']}
+            )
+        await db.set_article_status(article['link'], "done")
+        return None
 
     @rss_loop.before_loop
     async def before_rss(self):
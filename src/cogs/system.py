@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 from src.core.database import db
 from src.core.memory import memory
+from src.core.brain import brain
 import time
 
 class System(commands.Cog):
@@ -24,9 +25,8 @@ class System(commands.Cog):
             # Postgres
             if db.pg_pool:
                 try:
-                    async with db.pg_pool.acquire() as conn:
-                        await conn.execute("SELECT 1")
-                        db_status = "✅"
+                    await db.execute("SELECT 1", name="ping")
+                    db_status = "✅"
                 except:
                     pass
             
@@ -39,12 +39,15 @@ class System(commands.Cog):
                     pass
 
             # Qdrant
-            if memory.client:
+            if memory.backend == "local":
+                memory_status = f"📦 Local ({memory.local.count if memory.local else 0})"
+            elif memory.client:
                 try:
                     await memory.client.get_collections()
                     memory_status = "✅"
                 except:
-                    pass
+                    if memory.local:
+                        memory_status = f"⚠️ Local fallback ({len(memory.local.pending)} pending)"
 
             embed = discord.Embed(title="🧩 System Status", color=discord.Color.green())
             embed.add_field(name="Latency", value=f"`{latency}ms`", inline=True)
@@ -52,9 +55,24 @@ class System(commands.Cog):
             embed.add_field(name="PostgreSQL", value=db_status, inline=True)
             embed.add_field(name="Dragonfly", value=cache_status, inline=True)
             embed.add_field(name="Qdrant", value=memory_status, inline=True)
+            embed.add_field(name="Memory Writer", value=f"`{memory.writer_summary()}`", inline=False)
+            embed.add_field(name="Embedding Cache", value=f"`{brain.embed_cache.summary()}`", inline=False)
+            embed.add_field(name="Response Cache", value=f"`{brain.response_cache.summary()}`", inline=False)
+            embed.add_field(name="LLM Scheduler", value=f"```{brain.scheduler.summary()}```", inline=False)
+            embed.add_field(name="Provider Routing", value=f"`{brain.router.summary()}`", inline=False)
+            embed.add_field(name="Context Budget", value=f"`{brain.context.summary()}`", inline=False)
             
             await ctx.send(embed=embed)
 
+    @commands.command(name="dbstats", hidden=True)
+    @commands.is_owner()
+    async def dbstats(self, ctx, reset: str = None):
+        """Postgres pool usage and per-query latency histograms (ms)"""
+        await ctx.send(f"```{db.stats_summary()[:1900]}```")
+        if reset == "reset":
+            db.metrics.reset()
+            await ctx.send("🧹 Query stats reset.")
+
     @commands.command(name="wipe_memory", hidden=True)
     @commands.is_owner()
     async def wipe_memory(self, ctx):
@@ -1,26 +1,107 @@
 import google.generativeai as genai
+import asyncio
 from openai import AsyncOpenAI
 import os
 from dotenv import load_dotenv
 from src.core.database import db
+from src.core.memory import memory
+from src.core.cache import EmbeddingCache, ResponseCache
+from src.core.tokens import pack_batches, trim_to_tokens
+from src.core.scheduler import LLMScheduler
+from src.core.router import ProviderRouter
+from src.core.context import ContextBuilder
+from src.core.short_term import ShortTermMemory
 
 load_dotenv()
 
+GEMINI_EMBED_MODEL = "models/text-embedding-004"
+
+# Batas request embedding per provider (jumlah input & total token per request).
+# Input di atas max_item_tokens ditolak provider (OpenAI: 400), jadi dipotong sebelum dikirim.
+EMBED_BATCH_LIMITS = {
+    "openai": {"max_items": 2048, "max_tokens": 250000, "max_item_tokens": 8191},
+    "gemini": {"max_items": 100, "max_tokens": 100 * 2048, "max_item_tokens": 2048},
+}
+
+# Estimasi 4 karakter/token meleset untuk kode, CJK & emoji: potong di 90% batas provider
+EMBED_TRIM_MARGIN = 0.9
+
 class BrainManager:
     def __init__(self):
         self.gemini = None
         self.qwen = None # This handles OpenAI/Ollama compatible endpoints
         self.config = {}
+        self.embed_cache = EmbeddingCache()
+        self.response_cache = ResponseCache()
+        self.scheduler = LLMScheduler()
+        self.router = ProviderRouter()
+        self.context = ContextBuilder()
+        self.short_term = ShortTermMemory()
 
     async def initialize(self):
         print("🧠 Initializing Brain...")
         await self.load_config()
+        # Reload otomatis saat settings berubah (di proses ini atau proses bot lain)
+        db.on_settings_change(self._on_settings_change)
+
+    async def _on_settings_change(self, keys):
+        # Token Google di-refresh berkala dan tidak memengaruhi brain
+        if keys and all(key.startswith("google_") for key in keys):
+            return
+        await self.reload()
 
     async def load_config(self):
         # 1. Load from DB
         settings = await db.get_all_settings()
         self.config = settings
 
+        # Embedding cache (LRU in-process + Dragonfly)
+        self.embed_cache.redis = db.dragonfly
+        self.embed_cache.configure(
+            max_items=int(settings.get("embed_cache_size") or os.getenv("EMBED_CACHE_SIZE", 2048)),
+            ttl=int(settings.get("embed_cache_ttl") or os.getenv("EMBED_CACHE_TTL", 86400)),
+            remote_max=int(settings.get("embed_cache_remote_max") or os.getenv("EMBED_CACHE_REMOTE_MAX", 50000))
+        )
+
+        # Response cache (exact di Dragonfly, semantic di koleksi Qdrant kecil)
+        self.response_cache.redis = db.dragonfly
+        self.response_cache.qdrant = memory.client
+        self.response_cache.configure(
+            ttl=int(settings.get("response_cache_ttl") or os.getenv("RESPONSE_CACHE_TTL", 21600)),
+            threshold=float(settings.get("response_cache_threshold") or os.getenv("RESPONSE_CACHE_THRESHOLD", 0.95))
+        )
+
+        # Scheduler: rate budget (request/menit) & concurrency per provider
+        for provider in ["gemini", "openai"]:
+            env = provider.upper()
+            self.scheduler.configure(
+                provider,
+                rpm=float(settings.get(f"{provider}_rpm") or os.getenv(f"{env}_RPM", 60)),
+                max_concurrency=int(settings.get(f"{provider}_concurrency") or os.getenv(f"{env}_CONCURRENCY", 4))
+            )
+
+        # Short-term memory (history chat di Dragonfly, dibatasi jumlah turn & TTL)
+        chat_ttl = int(settings.get("chat_ttl") or os.getenv("CHAT_TTL", 600))
+        self.short_term.redis = db.dragonfly
+        self.short_term.summary_namespace = self.context.namespace
+        self.short_term.configure(
+            ttl=chat_ttl,
+            max_turns=int(settings.get("chat_max_turns") or os.getenv("CHAT_MAX_TURNS", 20))
+        )
+
+        # Context builder: budget token context per provider + rolling summary di Dragonfly
+        self.context.redis = db.dragonfly
+        self.context.think = self.think
+        self.context.configure(
+            budgets={
+                provider: int(settings.get(f"context_budget_{provider}") or os.getenv(f"CONTEXT_BUDGET_{provider.upper()}", 0))
+                for provider in ["gemini", "openai"]
+            },
+            keep_turns=int(settings.get("context_keep_turns") or os.getenv("CONTEXT_KEEP_TURNS", 6)),
+            fold_batch=int(settings.get("context_fold_batch") or os.getenv("CONTEXT_FOLD_BATCH", 0)),
+            ttl=chat_ttl
+        )
+
         # 2. Setup Gemini
         gemini_key = settings.get("gemini_api_key") or os.getenv("GEMINI_API_KEY")
         if gemini_key:
@@ -55,51 +136,271 @@ class BrainManager:
     async def reload(self):
         await self.load_config()
 
-    async def think(self, prompt, model=None, context="", images=None):
-        text_prompt = f"Context from memory:\n{context}\n\nUser Query: {prompt}"
-        
-        # Determine default model from config if not specified
+    def _model_id(self, model):
+        if model in ["qwen", "ollama", "local", "openai"]:
+            return f"openai:{self.config.get('openai_model') or 'qwen-2.5-72b'}"
+        if model == "auto":
+            return f"auto:{self.config.get('openai_model') or 'qwen-2.5-72b'}:gemini-1.5-flash"
+        return "gemini:gemini-1.5-flash"
+
+    def _use_response_cache(self, cache, images):
+        """cache=None follows the `response_cache` setting, True/False forces it per call"""
+        if images:
+            return False
+        if cache is None:
+            return str(self.config.get("response_cache", "off")).lower() in ["on", "true", "1"]
+        if not cache:
+            self.response_cache.stats["bypass"] += 1
+        return cache
+
+    async def _cached_response(self, prompt, model, context, semantic):
+        """Returns (response, store) where store(response) saves a fresh answer"""
+        model_id = self._model_id(model)
+        key = self.response_cache.make_key(model_id, prompt, context)
+        response = await self.response_cache.get(key)
+        if response is not None:
+            return response, None
+
+        vector = None
+        scope = None
+        if semantic:
+            scope = self.response_cache.scope_key(model_id, context)
+            vector = await self.embed_content(self.response_cache.normalize(prompt))
+            response = await self.response_cache.get_similar(vector, scope)
+            if response is not None:
+                # Promote ke exact tier agar hit berikutnya tanpa embedding
+                await self.response_cache.set(key, response)
+                return response, None
+
+        self.response_cache.stats["misses"] += 1
+
+        async def store(fresh):
+            if not fresh or fresh.lstrip().startswith("❌") or "❌ Brain Error" in fresh:
+                return
+            await self.response_cache.set(key, fresh)
+            if vector:
+                await self.response_cache.set_similar(vector, scope, key, fresh)
+
+        return None, store
+
+    async def think(self, prompt, model=None, context="", images=None, cache=None, semantic=False, priority="command"):
+        """priority: interactive (chat) > command (slash commands) > background (RSS, jobs)
+
+        semantic=True reuses answers of near-identical prompts; only use it when the answer
+        does not depend on values interpolated into the prompt (numbers, names, dates).
+        """
+        if model is None:
+            model = self.config.get("ai_provider", "gemini")
+
+        if not self._use_response_cache(cache, images):
+            return await self._think(prompt, model, context, images, priority)
+
+        response, store = await self._cached_response(prompt, model, context, semantic)
+        if response is not None:
+            return response
+
+        response = await self._think(prompt, model, context, images, priority)
+        await store(response)
+        return response
+
+    def context_budget(self, model=None):
+        """Token budget for prompt context of `model` (auto: the smallest of its candidates)"""
         if model is None:
             model = self.config.get("ai_provider", "gemini")
+        if model == "auto":
+            return min(self.context.budget_for(p) for p in (self.available_providers() or ["gemini"]))
+        return self.context.budget_for(self._provider_for(model))
+
+    def _provider_for(self, model, images=None):
+        # Gambar selalu ke Gemini (multimodal)
+        if model in ["qwen", "ollama", "local", "openai"] and not images:
+            return "openai"
+        return "gemini"
+
+    def available_providers(self):
+        return [name for name, client in [("gemini", self.gemini), ("openai", self.qwen)] if client]
 
-        # Determine model usage
-        use_openai = model in ["qwen", "ollama", "local", "openai"]
+    def _not_configured(self, provider):
+        if provider == "openai":
+            return "❌ OpenAI/Ollama Brain not configured."
+        return "❌ Gemini Brain not configured."
+
+    def _should_hedge(self, priority):
+        return priority == "interactive" and str(self.config.get("ai_hedge", "off")).lower() in ["on", "true", "1"]
+
+    async def _complete(self, provider, text_prompt, images=None, priority="command"):
+        """Single provider completion; raises on failure"""
+        if provider == "openai":
+            model_name = self.config.get("openai_model") or "qwen-2.5-72b"
+
+            response = await self.scheduler.run("openai", lambda: self.qwen.chat.completions.create(
+                model=model_name,
+                messages=[{"role": "user", "content": text_prompt}]
+            ), priority)
+            return response.choices[0].message.content
+
+        # Gemini (handles images and text)
+        if images:
+            if not isinstance(images, list):
+                images = [images]
+            content = [text_prompt] + images
+        else:
+            content = text_prompt
+        response = await self.scheduler.run("gemini", lambda: self.gemini.generate_content_async(content), priority)
+        return response.text
+
+    async def _think(self, prompt, model, context="", images=None, priority="command"):
+        text_prompt = f"Context from memory:\n{context}\n\nUser Query: {prompt}"
 
         try:
-            if use_openai and not images:
-                if not self.qwen:
-                    return "❌ OpenAI/Ollama Brain not configured."
+            # Routing mode: provider tercepat yang sehat (text-only)
+            if model == "auto" and not images:
+                candidates = self.router.rank(self.available_providers())
+                if not candidates:
+                    return "❌ No AI Brain configured."
 
-                model_name = self.config.get("openai_model") or "qwen-2.5-72b"
+                def attempt(provider):
+                    return lambda: self.router.timed(provider, lambda: self._complete(provider, text_prompt, None, priority))
 
-                response = await self.qwen.chat.completions.create(
-                    model=model_name,
-                    messages=[{"role": "user", "content": text_prompt}]
-                )
-                return response.choices[0].message.content
-            else:
-                # Default to Gemini (handles images and text)
-                if self.gemini:
-                    if images:
-                        if not isinstance(images, list):
-                            images = [images]
-                        content = [text_prompt] + images
-                        response = await self.gemini.generate_content_async(content)
-                    else:
-                        response = await self.gemini.generate_content_async(text_prompt)
-                    return response.text
-                else:
-                    return "❌ Gemini Brain not configured."
+                if len(candidates) > 1 and self._should_hedge(priority):
+                    return await self.router.hedge(
+                        attempt(candidates[0]), attempt(candidates[1]), self.router.hedge_delay(candidates[0])
+                    )
+
+                try:
+                    return await attempt(candidates[0])()
+                except Exception:
+                    if len(candidates) == 1:
+                        raise
+                    # Failover ke provider berikutnya
+                    return await attempt(candidates[1])()
+
+            provider = self._provider_for(model, images)
+            if not (self.qwen if provider == "openai" else self.gemini):
+                return self._not_configured(provider)
+            return await self.router.timed(provider, lambda: self._complete(provider, text_prompt, images, priority))
         except Exception as e:
             return f"❌ Brain Error: {e}"
 
-    async def embed_content(self, text):
+    async def think_stream(self, prompt, model=None, context="", images=None, cache=None, semantic=False, priority="interactive"):
+        """Streaming variant of think(): yields text chunks as the provider produces them"""
+        if model is None:
+            model = self.config.get("ai_provider", "gemini")
+
+        if not self._use_response_cache(cache, images):
+            async for chunk in self._think_stream(prompt, model, context, images, priority):
+                yield chunk
+            return
+
+        response, store = await self._cached_response(prompt, model, context, semantic)
+        if response is not None:
+            yield response
+            return
+
+        chunks = []
+        async for chunk in self._think_stream(prompt, model, context, images, priority):
+            chunks.append(chunk)
+            yield chunk
+        await store("".join(chunks))
+
+    async def _provider_stream(self, provider, text_prompt, images=None, priority="interactive"):
+        """Raw chunk stream from one provider; raises on failure"""
+        # Scheduler mengatur pembukaan stream (termasuk retry); slot dipegang sampai stream selesai
+        if provider == "openai":
+            model_name = self.config.get("openai_model") or "qwen-2.5-72b"
+
+            async with self.scheduler.stream("openai", lambda: self.qwen.chat.completions.create(
+                model=model_name,
+                messages=[{"role": "user", "content": text_prompt}],
+                stream=True
+            ), priority) as stream:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            return
+
+        content = text_prompt
+        if images:
+            if not isinstance(images, list):
+                images = [images]
+            content = [text_prompt] + images
+
+        async with self.scheduler.stream(
+            "gemini", lambda: self.gemini.generate_content_async(content, stream=True), priority
+        ) as response:
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunk tanpa teks (mis. safety/finish metadata)
+                    continue
+                if text:
+                    yield text
+
+    async def _open_stream(self, provider, text_prompt, images=None, priority="interactive"):
+        """Open a provider stream and wait for its first chunk (time-to-first-token)"""
+        stream = self._provider_stream(provider, text_prompt, images, priority)
+        try:
+            first = await self.router.timed(f"{provider}:ttft", stream.__anext__)
+        except StopAsyncIteration:
+            first = ""
+        except BaseException:
+            await stream.aclose()
+            raise
+        return stream, first
+
+    async def _think_stream(self, prompt, model, context="", images=None, priority="interactive"):
+        text_prompt = f"Context from memory:\n{context}\n\nUser Query: {prompt}"
+
         try:
-            # Check config for preferred embedding provider
-            provider = self.config.get("embed_provider", "gemini")
+            if model == "auto" and not images:
+                candidates = self.router.rank(self.available_providers(), metric=":ttft")
+                if not candidates:
+                    yield "❌ No AI Brain configured."
+                    return
 
-            if provider in ["openai", "ollama"] and self.qwen:
-                model = self.config.get("embed_model", "text-embedding-3-small")
+                if len(candidates) > 1 and self._should_hedge(priority):
+                    stream, first = await self.router.hedge(
+                        lambda: self._open_stream(candidates[0], text_prompt, None, priority),
+                        lambda: self._open_stream(candidates[1], text_prompt, None, priority),
+                        self.router.hedge_delay(f"{candidates[0]}:ttft"),
+                        discard=lambda loser: asyncio.ensure_future(loser[0].aclose())
+                    )
+                else:
+                    try:
+                        stream, first = await self._open_stream(candidates[0], text_prompt, None, priority)
+                    except Exception:
+                        if len(candidates) == 1:
+                            raise
+                        stream, first = await self._open_stream(candidates[1], text_prompt, None, priority)
+            else:
+                provider = self._provider_for(model, images)
+                if not (self.qwen if provider == "openai" else self.gemini):
+                    yield self._not_configured(provider)
+                    return
+                stream, first = await self._open_stream(provider, text_prompt, images, priority)
+
+            if first:
+                yield first
+            async for chunk in stream:
+                yield chunk
+        except Exception as e:
+            yield f"\n❌ Brain Error: {e}"
+
+    def _embed_target(self):
+        """Resolve (provider, model) used for embeddings, or (None, None) if unavailable"""
+        # Check config for preferred embedding provider
+        provider = self.config.get("embed_provider", "gemini")
+
+        if provider in ["openai", "ollama"] and self.qwen:
+            return "openai", self.config.get("embed_model", "text-embedding-3-small")
+        elif self.gemini:
+            return "gemini", GEMINI_EMBED_MODEL
+        return None, None
+
+    async def _embed_uncached(self, provider, model, text, task_type):
+        try:
+            if provider == "openai":
                 # OpenAI/Ollama Embedding
                 response = await self.qwen.embeddings.create(
                     input=text,
@@ -107,17 +408,114 @@ class BrainManager:
                 )
                 return response.data[0].embedding
 
-            elif self.gemini:
-                # Gemini Embedding
-                result = await genai.embed_content_async(
-                    model="models/text-embedding-004",
-                    content=text,
-                    task_type="retrieval_query"
-                )
-                return result['embedding']
-            return None
+            # Gemini Embedding
+            result = await genai.embed_content_async(
+                model=model,
+                content=text,
+                task_type=task_type
+            )
+            return result['embedding']
         except Exception as e:
             print(f"❌ Embedding Error: {e}")
             return None
 
+    async def embed_content(self, text, task_type="retrieval_query"):
+        provider, model = self._embed_target()
+        if not provider:
+            return None
+
+        key = self.embed_cache.make_key(provider, model, task_type, text)
+        return await self.embed_cache.get_or_compute(
+            key, lambda: self._embed_uncached(provider, model, text, task_type)
+        )
+
+    async def _embed_batch(self, provider, model, batch, task_type):
+        if provider == "openai":
+            response = await self.qwen.embeddings.create(
+                input=batch,
+                model=model
+            )
+            # Urutan dijamin lewat field index, bukan urutan list
+            return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+
+        result = await genai.embed_content_async(
+            model=model,
+            content=batch,
+            task_type=task_type
+        )
+        return result['embedding']
+
+    async def _embed_batch_isolated(self, provider, model, batch, task_type, semaphore, errors):
+        """Embed a batch; on failure split it in half so one bad item can't sink the rest"""
+        try:
+            async with semaphore:
+                vectors = await self._embed_batch(provider, model, [text for _, text in batch], task_type)
+            if len(vectors) != len(batch):
+                raise ValueError(f"expected {len(batch)} embeddings, got {len(vectors)}")
+            return list(zip([key for key, _ in batch], vectors))
+        except Exception as e:
+            if len(batch) == 1:
+                errors[batch[0][0]] = str(e)
+                return []
+
+            mid = len(batch) // 2
+            halves = await asyncio.gather(
+                self._embed_batch_isolated(provider, model, batch[:mid], task_type, semaphore, errors),
+                self._embed_batch_isolated(provider, model, batch[mid:], task_type, semaphore, errors)
+            )
+            return halves[0] + halves[1]
+
+    async def embed_many(self, texts, task_type="retrieval_document"):
+        """Embed many texts in provider-sized batches.
+
+        Returns (vectors, errors): vectors is aligned with `texts` (None for failed items),
+        errors maps the failed input index to its error message. Texts longer than the
+        provider's per-input limit are truncated, so only their head is embedded.
+        """
+        vectors = [None] * len(texts)
+        errors = {}
+        if not texts:
+            return vectors, errors
+
+        provider, model = self._embed_target()
+        if not provider:
+            return vectors, {i: "No embedding provider configured" for i in range(len(texts))}
+
+        # 1. Cache lookup (dedupe identical texts)
+        keys = [self.embed_cache.make_key(provider, model, task_type, text) for text in texts]
+        cached = await self.embed_cache.get_many(set(keys))
+
+        limits = EMBED_BATCH_LIMITS[provider]
+        pending = {}
+        key_errors = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in pending:
+                pending[key] = trim_to_tokens(text, int(limits["max_item_tokens"] * EMBED_TRIM_MARGIN))
+
+        # 2. Embed misses in batches, concurrently under a bound
+        if pending:
+            self.embed_cache.stats["misses"] += len(pending)
+            items = list(pending.items())
+            batches = pack_batches([text for _, text in items], **limits)
+            semaphore = asyncio.Semaphore(int(self.config.get("embed_concurrency") or os.getenv("EMBED_CONCURRENCY", 4)))
+
+            results = await asyncio.gather(*[
+                self._embed_batch_isolated(provider, model, [items[i] for i in batch], task_type, semaphore, key_errors)
+                for batch in batches
+            ])
+
+            fresh = {key: vector for result in results for key, vector in result}
+            await self.embed_cache.set_many(fresh)
+            cached.update(fresh)
+
+            if key_errors:
+                print(f"❌ Embedding Error: {len(key_errors)}/{len(pending)} unique text(s) failed")
+
+        for i, key in enumerate(keys):
+            if key in cached:
+                vectors[i] = cached[key]
+            else:
+                errors[i] = key_errors.get(key, "Embedding failed")
+        return vectors, errors
+
 brain = BrainManager()
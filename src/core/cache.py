@@ -0,0 +1,353 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+
+
+class EmbeddingCache:
+    """Two-tier cache for embedding vectors (in-process LRU + Dragonfly)"""
+
+    def __init__(self, max_items=2048, ttl=86400, remote_max=50000, namespace="emb"):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.remote_max = remote_max
+        self.namespace = namespace
+        self.redis = None  # Diisi oleh BrainManager dengan db.dragonfly
+
+        self._lru = OrderedDict()
+        self._inflight = {}
+        self.stats = {"memory_hits": 0, "remote_hits": 0, "misses": 0, "shared": 0, "evictions": 0}
+
+    def configure(self, max_items=None, ttl=None, remote_max=None):
+        if max_items is not None:
+            self.max_items = max_items
+        if ttl is not None:
+            self.ttl = ttl
+        if remote_max is not None:
+            self.remote_max = remote_max
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    @staticmethod
+    def make_key(provider, model, task_type, text):
+        raw = "\x00".join([str(provider), str(model), str(task_type), text])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _remote_key(self, key):
+        return f"{self.namespace}:{key}"
+
+    @property
+    def _index_key(self):
+        return f"{self.namespace}:index"
+
+    @staticmethod
+    def _pack(vector):
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _unpack(blob):
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def _remember_local(self, key, vector):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    async def get(self, key):
+        """Lookup a vector: LRU first, then Dragonfly (promoted to LRU on hit)"""
+        vector = self._lru.get(key)
+        if vector is not None:
+            self._lru.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return vector
+
+        if self.redis:
+            try:
+                blob = await self.redis.get(self._remote_key(key))
+                if blob:
+                    vector = self._unpack(blob)
+                    self._remember_local(key, vector)
+                    self.stats["remote_hits"] += 1
+                    return vector
+            except Exception as e:
+                print(f"⚠️ Embedding Cache Read Error: {e}")
+        return None
+
+    async def get_many(self, keys):
+        """Batch lookup; returns {key: vector} for hits only (one MGET for LRU misses)"""
+        found = {}
+        missing = []
+        for key in keys:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                found[key] = vector
+            else:
+                missing.append(key)
+
+        if missing and self.redis:
+            try:
+                blobs = await self.redis.mget([self._remote_key(k) for k in missing])
+                for key, blob in zip(missing, blobs):
+                    if blob:
+                        vector = self._unpack(blob)
+                        self._remember_local(key, vector)
+                        self.stats["remote_hits"] += 1
+                        found[key] = vector
+            except Exception as e:
+                print(f"⚠️ Embedding Cache Read Error: {e}")
+        return found
+
+    async def set(self, key, vector):
+        await self.set_many({key: vector})
+
+    async def set_many(self, items):
+        for key, vector in items.items():
+            self._remember_local(key, vector)
+        if not self.redis or not items:
+            return
+
+        try:
+            now = time.time()
+            pipe = self.redis.pipeline()
+            for key, vector in items.items():
+                pipe.set(self._remote_key(key), self._pack(vector), ex=self.ttl)
+            pipe.zadd(self._index_key, {self._remote_key(key): now for key in items})
+            pipe.zcard(self._index_key)
+            results = await pipe.execute()
+
+            # Size-bounded eviction: buang entry tertua jika melebihi batas
+            overflow = results[-1] - self.remote_max
+            if overflow > 0:
+                oldest = await self.redis.zpopmin(self._index_key, overflow)
+                if oldest:
+                    await self.redis.delete(*[member for member, _ in oldest])
+                    self.stats["evictions"] += len(oldest)
+        except Exception as e:
+            print(f"⚠️ Embedding Cache Write Error: {e}")
+
+    async def get_or_compute(self, key, compute):
+        """Return cached vector or run `compute()` once, sharing it with concurrent callers"""
+        vector = await self.get(key)
+        if vector is not None:
+            return vector
+
+        task = self._inflight.get(key)
+        if task:
+            self.stats["shared"] += 1
+        else:
+            self.stats["misses"] += 1
+            # Task sendiri: caller yang dibatalkan (mis. timeout) tidak membatalkan caller lain
+            task = asyncio.create_task(self._compute_and_store(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish_inflight(key, t))
+        return await asyncio.shield(task)
+
+    async def _compute_and_store(self, key, compute):
+        vector = await compute()
+        if vector is not None:
+            await self.set(key, vector)
+        return vector
+
+    def _finish_inflight(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Hindari warning "exception was never retrieved" jika tidak ada yang menunggu
+        if not task.cancelled():
+            task.exception()
+
+    def hit_rate(self):
+        hits = self.stats["memory_hits"] + self.stats["remote_hits"] + self.stats["shared"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def summary(self):
+        s = self.stats
+        return (
+            f"LRU {s['memory_hits']} | Remote {s['remote_hits']} | Shared {s['shared']} | "
+            f"Miss {s['misses']} | Hit {self.hit_rate():.0%} | Size {len(self._lru)}/{self.max_items}"
+        )
+
+
+class ResponseCache:
+    """Cache for LLM responses: exact match on normalized prompt+context, optional semantic match.
+
+    Exact entries live in Dragonfly (or a local LRU when Dragonfly is down). Semantic
+    entries live in a small dedicated Qdrant collection, scoped by a context hash so
+    a cached answer is only reused for the same model and context. Expired semantic
+    entries are deleted at most every `prune_interval` seconds, on write.
+    """
+
+    def __init__(self, ttl=21600, threshold=0.95, max_items=512, collection_name="response_cache", namespace="resp",
+                 prune_interval=3600):
+        self.ttl = ttl
+        self.prune_interval = prune_interval
+        self.threshold = threshold
+        self.max_items = max_items
+        self.collection_name = collection_name
+        self.namespace = namespace
+        self.redis = None   # db.dragonfly
+        self.qdrant = None  # memory.client
+
+        self._local = OrderedDict()  # key -> (expires_at, response)
+        self._collection_ready = False
+        self._last_prune = 0.0
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "bypass": 0, "prunes": 0}
+
+    def configure(self, ttl=None, threshold=None):
+        if ttl is not None:
+            self.ttl = ttl
+        if threshold is not None:
+            self.threshold = threshold
+
+    @staticmethod
+    def normalize(text):
+        return " ".join((text or "").split()).casefold()
+
+    @classmethod
+    def make_key(cls, model, prompt, context=""):
+        raw = "\x00".join([str(model), cls.normalize(prompt), cls.normalize(context)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def scope_key(cls, model, context=""):
+        """Hash of everything except the prompt, used to scope semantic matches"""
+        raw = "\x00".join([str(model), cls.normalize(context)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key):
+        if self.redis:
+            try:
+                value = await self.redis.get(f"{self.namespace}:{key}")
+                if value is not None:
+                    self.stats["exact_hits"] += 1
+                    return value.decode("utf-8") if isinstance(value, bytes) else value
+                return None
+            except Exception as e:
+                print(f"⚠️ Response Cache Read Error: {e}")
+
+        entry = self._local.get(key)
+        if entry:
+            expires_at, response = entry
+            if expires_at > time.time():
+                self._local.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return response
+            del self._local[key]
+        return None
+
+    async def set(self, key, response):
+        if self.redis:
+            try:
+                await self.redis.set(f"{self.namespace}:{key}", response, ex=self.ttl)
+                return
+            except Exception as e:
+                print(f"⚠️ Response Cache Write Error: {e}")
+
+        self._local[key] = (time.time() + self.ttl, response)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_items:
+            self._local.popitem(last=False)
+
+    async def _ensure_collection(self, size):
+        if self._collection_ready:
+            return True
+        from qdrant_client.models import VectorParams, Distance, PayloadSchemaType
+
+        collections = await self.qdrant.get_collections()
+        if not any(c.name == self.collection_name for c in collections.collections):
+            await self.qdrant.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=VectorParams(size=size, distance=Distance.COSINE)
+            )
+            # Index untuk filter scope saat lookup dan filter created_at saat prune
+            for field_name, schema in [("scope", PayloadSchemaType.KEYWORD), ("created_at", PayloadSchemaType.FLOAT)]:
+                await self.qdrant.create_payload_index(
+                    collection_name=self.collection_name, field_name=field_name, field_schema=schema
+                )
+        self._collection_ready = True
+        return True
+
+    async def get_similar(self, vector, scope):
+        """Nearest cached response within `scope` above the similarity threshold"""
+        if not self.qdrant or not vector:
+            return None
+        from qdrant_client.models import Filter, FieldCondition, MatchValue, Range
+
+        try:
+            await self._ensure_collection(len(vector))
+            response = await self.qdrant.query_points(
+                collection_name=self.collection_name,
+                query=vector,
+                query_filter=Filter(must=[
+                    FieldCondition(key="scope", match=MatchValue(value=scope)),
+                    FieldCondition(key="created_at", range=Range(gte=time.time() - self.ttl)),
+                ]),
+                score_threshold=self.threshold,
+                limit=1
+            )
+            if response.points:
+                self.stats["semantic_hits"] += 1
+                return response.points[0].payload.get("response")
+        except Exception as e:
+            print(f"⚠️ Semantic Cache Read Error: {e}")
+        return None
+
+    async def set_similar(self, vector, scope, key, response):
+        if not self.qdrant or not vector:
+            return
+        from qdrant_client.models import PointStruct
+
+        try:
+            await self._ensure_collection(len(vector))
+            await self.qdrant.upsert(
+                collection_name=self.collection_name,
+                points=[PointStruct(
+                    # ID dari key exact-match: prompt yang sama menimpa entry lama
+                    id=str(uuid.UUID(key[:32])),
+                    vector=vector,
+                    payload={"scope": scope, "response": response, "created_at": time.time()}
+                )]
+            )
+        except Exception as e:
+            print(f"⚠️ Semantic Cache Write Error: {e}")
+            return
+
+        if time.time() - self._last_prune >= self.prune_interval:
+            await self.prune()
+
+    async def prune(self):
+        """Delete semantic entries older than ttl (get_similar already hides them)"""
+        if not self.qdrant:
+            return
+        from qdrant_client.models import Filter, FieldCondition, FilterSelector, Range
+
+        self._last_prune = time.time()
+        try:
+            await self.qdrant.delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(filter=Filter(must=[
+                    FieldCondition(key="created_at", range=Range(lt=self._last_prune - self.ttl)),
+                ]))
+            )
+            self.stats["prunes"] += 1
+        except Exception as e:
+            print(f"⚠️ Semantic Cache Prune Error: {e}")
+
+    def hit_rate(self):
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def summary(self):
+        s = self.stats
+        return (
+            f"Exact {s['exact_hits']} | Semantic {s['semantic_hits']} | Miss {s['misses']} | "
+            f"Bypass {s['bypass']} | Hit {self.hit_rate():.0%}"
+        )
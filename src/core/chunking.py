@@ -0,0 +1,158 @@
+import json
+import re
+from src.core.tokens import estimate_tokens, CHARS_PER_TOKEN
+
+DEFAULT_MAX_TOKENS = 512
+DEFAULT_OVERLAP_TOKENS = 64
+
+MARKDOWN_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+PYTHON_BLOCK = re.compile(r"^(@|def |async def |class )")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _split_markdown(text):
+    """Sections per heading, each prefixed with its heading path (e.g. 'Setup > Docker')"""
+    sections = []
+    path = []
+    lines = []
+
+    def flush():
+        body = "\n".join(lines).strip()
+        if body:
+            sections.append((" > ".join(path), body))
+
+    for line in text.splitlines():
+        match = MARKDOWN_HEADING.match(line)
+        if match:
+            flush()
+            lines = []
+            level = len(match.group(1))
+            path = path[:level - 1] + [match.group(2).strip()]
+            lines.append(line)
+        else:
+            lines.append(line)
+    flush()
+    return sections
+
+
+def _split_python(text):
+    """Sections per top-level def/class (decorators stay with their function)"""
+    sections = []
+    lines = []
+    name = "module"
+
+    def flush():
+        body = "\n".join(lines).strip()
+        if body:
+            sections.append((name, body))
+
+    previous_decorator = False
+    for line in text.splitlines():
+        match = PYTHON_BLOCK.match(line)
+        if match and not previous_decorator:
+            flush()
+            lines = []
+        if match:
+            header = line.split("(")[0].split(":")[0]
+            if not header.startswith("@"):
+                name = header.replace("async def ", "").replace("def ", "").replace("class ", "").strip()
+            previous_decorator = header.startswith("@")
+        else:
+            previous_decorator = False
+        lines.append(line)
+    flush()
+    return sections
+
+
+def _split_json(text):
+    """Sections per top-level key / array element; falls back to plain text if invalid"""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+
+    if isinstance(data, dict):
+        return [(str(key), json.dumps({key: value}, ensure_ascii=False)) for key, value in data.items()]
+    if isinstance(data, list):
+        return [(f"[{i}]", json.dumps(item, ensure_ascii=False)) for i, item in enumerate(data)]
+    return [("", text)]
+
+
+def _split_plain(text):
+    return [("", p.strip()) for p in re.split(r"\n\s*\n", text) if p.strip()]
+
+
+def _split_oversized(text, max_tokens, overlap_tokens):
+    """Split one long section by lines/sentences, then hard-split, with token overlap"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    overlap_chars = overlap_tokens * CHARS_PER_TOKEN
+
+    pieces = []
+    for line in text.splitlines(keepends=True):
+        if len(line) <= max_chars:
+            pieces.append(line)
+            continue
+        for sentence in SENTENCE_END.split(line):
+            for i in range(0, len(sentence), max_chars):
+                pieces.append(sentence[i:i + max_chars] + " ")
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current.strip())
+            # Overlap: bawa ekor chunk sebelumnya ke chunk berikutnya
+            current = current[-overlap_chars:] if overlap_chars else ""
+        current += piece
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+def split_sections(text, filename=None):
+    name = (filename or "").lower()
+    if name.endswith(".md"):
+        return _split_markdown(text)
+    if name.endswith(".py"):
+        return _split_python(text)
+    if name.endswith(".json"):
+        sections = _split_json(text)
+        if sections is not None:
+            return sections
+    return _split_plain(text)
+
+
+def chunk_text(text, filename=None, max_tokens=DEFAULT_MAX_TOKENS, overlap_tokens=DEFAULT_OVERLAP_TOKENS):
+    """Structure-aware, token-bounded chunks: list of {"section", "text"} dicts.
+
+    Small neighbouring sections are packed together up to `max_tokens`; sections
+    larger than that are split with `overlap_tokens` of overlap.
+    """
+    if not text or not text.strip():
+        return []
+
+    chunks = []
+    current_sections = []
+    current_text = ""
+
+    def flush():
+        if current_text.strip():
+            chunks.append({"section": current_sections[0] if current_sections else "", "text": current_text.strip()})
+
+    for section, body in split_sections(text, filename):
+        tokens = estimate_tokens(body)
+        if tokens > max_tokens:
+            flush()
+            current_sections, current_text = [], ""
+            for piece in _split_oversized(body, max_tokens, overlap_tokens):
+                chunks.append({"section": section, "text": piece})
+            continue
+
+        if current_text and estimate_tokens(current_text) + tokens > max_tokens:
+            flush()
+            current_sections, current_text = [], ""
+
+        current_sections.append(section)
+        current_text = f"{current_text}\n\n{body}" if current_text else body
+    flush()
+    return chunks
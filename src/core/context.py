@@ -0,0 +1,171 @@
+from src.core.tokens import estimate_tokens, trim_to_tokens, CHARS_PER_TOKEN
+
+# Budget token untuk context (history + summary + knowledge) per provider, di luar prompt & jawaban
+DEFAULT_BUDGETS = {"gemini": 8000, "openai": 4000}
+
+
+def hit_text(payload):
+    """Readable text of a recalled memory (notes have content, news has title + summary)"""
+    if payload.get("content"):
+        return str(payload["content"])
+    return " - ".join(str(payload[k]) for k in ["title", "summary"] if payload.get(k))
+
+
+class BuiltContext:
+    def __init__(self, text, usage, overflow, budget, fold_due=False):
+        self.text = text
+        self.usage = usage        # token per section
+        self.overflow = overflow  # turn lama (urut kronologis) yang tidak muat verbatim
+        self.budget = budget
+        self.fold_due = fold_due  # overflow sudah cukup banyak untuk dilipat sekaligus
+
+
+class ContextBuilder:
+    """Fits rolling summary, recent turns and recalled memories into a per-model token budget.
+
+    Recent turns are kept verbatim (newest first until the budget or `keep_turns` runs
+    out); older turns are returned as overflow so the caller can fold them into the
+    rolling summary kept in Dragonfly. Folding costs an LLM call, so it is only due once
+    the overflow reaches `fold_batch` turns (default: `keep_turns`) or as many tokens as
+    the verbatim history itself.
+    """
+
+    def __init__(self, keep_turns=6, knowledge_share=0.4, summary_share=0.15, max_hit_tokens=400,
+                 ttl=600, namespace="chat_summary", fold_batch=None):
+        self.budgets = dict(DEFAULT_BUDGETS)
+        self.default_budget = min(DEFAULT_BUDGETS.values())
+        self.keep_turns = keep_turns
+        self.fold_batch = fold_batch
+        self.knowledge_share = knowledge_share
+        self.summary_share = summary_share
+        self.max_hit_tokens = max_hit_tokens
+        self.ttl = ttl
+        self.namespace = namespace
+        self.redis = None  # db.dragonfly
+        self.think = None  # brain.think, untuk meringkas turn lama
+
+        self.last_usage = {}
+        self.stats = {"builds": 0, "folds": 0, "trimmed": 0}
+
+    def configure(self, budgets=None, keep_turns=None, ttl=None, fold_batch=None):
+        if budgets:
+            self.budgets.update({k: v for k, v in budgets.items() if v})
+        if keep_turns is not None:
+            self.keep_turns = keep_turns
+        if fold_batch is not None:
+            self.fold_batch = fold_batch
+        if ttl is not None:
+            self.ttl = ttl
+
+    def budget_for(self, provider):
+        return self.budgets.get(provider, self.default_budget)
+
+    def _fold_due(self, overflow, history_cap):
+        if not overflow:
+            return False
+        if len(overflow) >= (self.fold_batch or self.keep_turns):
+            return True
+        return sum(estimate_tokens(t) for t in overflow) >= history_cap
+
+    def _knowledge(self, hits, cap):
+        lines = []
+        used = 0
+        seen = set()
+        ranked = sorted(hits or [], key=lambda h: getattr(h, "score", 0) or 0, reverse=True)
+        # Jatah per hit dibagi rata agar satu dokumen besar tidak menghabiskan semua budget
+        per_hit = min(self.max_hit_tokens, max(64, cap // max(len(ranked), 1)))
+        for hit in ranked:
+            text = " ".join(hit_text(hit.payload or {}).split())
+            if not text or text.casefold() in seen:
+                continue
+            seen.add(text.casefold())
+
+            remaining = cap - used
+            if remaining < 32:
+                break
+            trimmed = trim_to_tokens(text, min(per_hit, remaining))
+            if trimmed != text:
+                self.stats["trimmed"] += 1
+            lines.append(f"- {trimmed}")
+            used += estimate_tokens(lines[-1])
+        return lines, used
+
+    def _history(self, turns, cap):
+        kept = []
+        used = 0
+        for turn in reversed(turns):
+            tokens = estimate_tokens(turn)
+            if kept and (len(kept) >= self.keep_turns or used + tokens > cap):
+                break
+            if not kept and tokens > cap:
+                # Pesan terbaru selalu masuk, dipotong jika perlu
+                turn = trim_to_tokens(turn, cap)
+                tokens = estimate_tokens(turn)
+            kept.append(turn)
+            used += tokens
+        kept.reverse()
+        return kept, used, turns[:len(turns) - len(kept)]
+
+    def build(self, turns, hits=None, summary="", budget=None):
+        """turns: chronological "User: ..."/"Assistant: ..." lines, newest last"""
+        budget = budget or self.default_budget
+
+        summary = trim_to_tokens(summary, int(budget * self.summary_share)) if summary else ""
+        summary_tokens = estimate_tokens(summary)
+        knowledge, knowledge_tokens = self._knowledge(hits, int(budget * self.knowledge_share))
+        # Sisa budget (termasuk jatah knowledge yang tidak terpakai) untuk history
+        history_cap = budget - summary_tokens - knowledge_tokens
+        history, history_tokens, overflow = self._history(list(turns), history_cap)
+
+        parts = []
+        if summary:
+            parts.append(f"Conversation Summary:\n{summary}\n")
+        parts.append("Short-term History:\n" + "\n".join(history) + "\n")
+        if knowledge:
+            parts.append("Relevant Knowledge:\n" + "\n".join(knowledge) + "\n")
+
+        usage = {
+            "summary": summary_tokens,
+            "history": history_tokens,
+            "knowledge": knowledge_tokens,
+            "total": summary_tokens + history_tokens + knowledge_tokens,
+        }
+        self.last_usage = dict(usage, budget=budget)
+        self.stats["builds"] += 1
+        return BuiltContext("\n".join(parts), usage, overflow, budget, self._fold_due(overflow, history_cap))
+
+    # --- Rolling summary (Dragonfly) ---
+    def _key(self, user_id):
+        return f"{self.namespace}:{user_id}"
+
+    async def fold(self, user_id, summary, turns):
+        """Fold turns that fell out of the verbatim window into the rolling summary (None if it failed)"""
+        if not turns or not self.think:
+            return None
+        max_words = max(50, int(self.budget_for(None) * self.summary_share * CHARS_PER_TOKEN / 6))
+        new_turns = "\n".join(trim_to_tokens(t, self.max_hit_tokens) for t in turns)
+        prompt = (
+            f"Update the running summary of this conversation with the new turns. "
+            f"Keep facts, names, decisions and open questions. Maximum {max_words} words, plain text.\n\n"
+            f"Current summary:\n{summary or '(empty)'}\n\nNew turns:\n{new_turns}"
+        )
+        updated = await self.think(prompt=prompt, priority="background")
+        if not updated or updated.lstrip().startswith("❌"):
+            return None
+
+        self.stats["folds"] += 1
+        if self.redis:
+            try:
+                await self.redis.set(self._key(user_id), updated, ex=self.ttl)
+            except Exception as e:
+                print(f"⚠️ Context Summary Write Error: {e}")
+        return updated
+
+    def summary(self):
+        u = self.last_usage
+        if not u:
+            return f"No builds yet | Folds {self.stats['folds']}"
+        return (
+            f"Last: summary {u['summary']} + history {u['history']} + knowledge {u['knowledge']} "
+            f"= {u['total']}/{u['budget']} tok | Trimmed {self.stats['trimmed']} | Folds {self.stats['folds']}"
+        )
@@ -1,16 +1,38 @@
 import asyncpg
 import redis.asyncio as redis
+import asyncio
+import contextlib
 import os
 import json
+import time
+import uuid
 from dotenv import load_dotenv
+from src.core.metrics import QueryMetrics
+from src.core.migrations import migrate
 
 load_dotenv()
 
+# Channel pub/sub untuk invalidasi settings antar proses bot
+SETTINGS_CHANNEL = "settings:invalidate"
+# Seen-set link RSS per feed di Dragonfly; jika kedaluwarsa, Postgres tetap jadi sumber kebenaran.
+# Satu set per feed per periode RSS_SEEN_TTL (bucket); lookup membaca bucket ini dan sebelumnya,
+# set lama kedaluwarsa sendiri sehingga ukuran seen-set tetap terbatas walau feed terus aktif.
+RSS_SEEN_TTL = int(os.getenv("RSS_SEEN_TTL", 7 * 24 * 3600))
+
 class DatabaseManager:
     def __init__(self):
         self.pg_pool = None
         self.dragonfly = None
 
+        # Read-through cache settings: dimuat sekali saat boot, di-update saat set/invalidasi
+        self.instance_id = uuid.uuid4().hex
+        self._settings = None
+        self._settings_listeners = []
+        self._settings_task = None
+
+        # Latency per query & waktu tunggu pool (lihat os.dbstats)
+        self.metrics = QueryMetrics()
+
     async def connect(self):
         # 1. Connect PostgreSQL
         try:
@@ -18,12 +40,11 @@ class DatabaseManager:
             if not dsn:
                 print("⚠️ POSTGRES_DSN not found in .env. Structured data will be unavailable.")
             else:
-                self.pg_pool = await asyncpg.create_pool(dsn)
-                print("✅ PostgreSQL Connected (Structured Data)")
-                await self.initialize_health_tables()
-                await self.initialize_rss_tables()
-                await self.initialize_settings_table()
-                await self.initialize_finance_tables()
+                options = self.pool_options()
+                self.pg_pool = await asyncpg.create_pool(dsn, init=self._init_connection, **options)
+                print(f"✅ PostgreSQL Connected (Structured Data, pool {options['min_size']}-{options['max_size']})")
+                await self.run_migrations()
+                await self.load_settings()
         except Exception as e:
             print(f"❌ Postgres Error: {e}")
 
@@ -37,10 +58,76 @@ class DatabaseManager:
             self.dragonfly = redis.from_url(url)
             await self.dragonfly.ping()
             print("✅ Dragonfly Connected (Short-term Memory)")
+            self._settings_task = asyncio.create_task(self._listen_settings())
         except Exception as e:
             print(f"❌ Dragonfly Error: {e}")
 
+    @staticmethod
+    def pool_options():
+        """asyncpg pool settings from env (settings table is not readable before the pool exists)"""
+        return {
+            "min_size": int(os.getenv("PG_POOL_MIN", 2)),
+            "max_size": int(os.getenv("PG_POOL_MAX", 10)),
+            "command_timeout": float(os.getenv("PG_COMMAND_TIMEOUT", 30)),
+            "statement_cache_size": int(os.getenv("PG_STATEMENT_CACHE_SIZE", 100)),
+            "max_inactive_connection_lifetime": float(os.getenv("PG_MAX_INACTIVE_LIFETIME", 300)),
+        }
+
+    @staticmethod
+    async def _init_connection(conn):
+        # JSON/JSONB otomatis di-encode/decode: kirim dict, terima dict
+        for pg_type in ["json", "jsonb"]:
+            await conn.set_type_codec(pg_type, encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+    # --- Instrumented access ---
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        """pg_pool.acquire() that records how long callers waited for a connection"""
+        started = time.perf_counter()
+        async with self.pg_pool.acquire() as conn:
+            self.metrics.observe("(pool wait)", (time.perf_counter() - started) * 1000)
+            yield conn
+
+    @staticmethod
+    def _query_name(query):
+        return " ".join(query.split())[:60]
+
+    async def _query(self, method, query, *args, name=None):
+        async with self.acquire() as conn:
+            started = time.perf_counter()
+            error = False
+            try:
+                return await getattr(conn, method)(query, *args)
+            except Exception:
+                error = True
+                raise
+            finally:
+                self.metrics.observe(name or self._query_name(query), (time.perf_counter() - started) * 1000, error)
+
+    async def fetch(self, query, *args, name=None):
+        return await self._query("fetch", query, *args, name=name)
+
+    async def fetchrow(self, query, *args, name=None):
+        return await self._query("fetchrow", query, *args, name=name)
+
+    async def fetchval(self, query, *args, name=None):
+        return await self._query("fetchval", query, *args, name=name)
+
+    async def execute(self, query, *args, name=None):
+        return await self._query("execute", query, *args, name=name)
+
+    def pool_stats(self):
+        if not self.pg_pool:
+            return "Pool not connected"
+        size, idle = self.pg_pool.get_size(), self.pg_pool.get_idle_size()
+        return f"Pool {size - idle} busy / {idle} idle / max {self.pg_pool.get_max_size()}"
+
+    def stats_summary(self, top=10):
+        return f"{self.pool_stats()}\n{self.metrics.summary(top)}"
+
     async def close(self):
+        if self._settings_task:
+            self._settings_task.cancel()
         if self.pg_pool: 
             await self.pg_pool.close()
             print("🔒 PostgreSQL Connection Closed")
@@ -48,191 +135,265 @@ class DatabaseManager:
             await self.dragonfly.close()
             print("🔒 Dragonfly Connection Closed")
 
-    async def initialize_health_tables(self):
-        if not self.pg_pool: return
-        query = """
-        CREATE TABLE IF NOT EXISTS health_logs (
-            id SERIAL PRIMARY KEY,
-            user_id BIGINT NOT NULL,
-            metric_type VARCHAR(50) NOT NULL,
-            data JSONB,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-        );
-        CREATE INDEX IF NOT EXISTS idx_health_logs_user_type ON health_logs(user_id, metric_type);
-        """
+    async def run_migrations(self):
+        # Skema versioned (src/core/migrations): saat tidak ada perubahan cukup satu cek versi
         try:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute(query)
-                print("✅ Health Tables Initialized")
+            applied = await migrate(self.pg_pool)
+            if applied:
+                print(f"✅ Database Schema Migrated ({len(applied)} migration(s))")
         except Exception as e:
-            print(f"❌ Database Init Error: {e}")
+            print(f"❌ Database Migration Error: {e}")
 
-    async def initialize_rss_tables(self):
-        if not self.pg_pool: return
-        query = """
-        CREATE TABLE IF NOT EXISTS rss_feeds (
-            id SERIAL PRIMARY KEY,
-            url TEXT UNIQUE NOT NULL,
-            category VARCHAR(50),
-            added_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-        );
-        CREATE TABLE IF NOT EXISTS rss_logs (
-            id SERIAL PRIMARY KEY,
-            feed_id INTEGER REFERENCES rss_feeds(id),
-            article_url TEXT UNIQUE NOT NULL,
-            title TEXT,
-            summary TEXT,
-            published_at TIMESTAMP WITH TIME ZONE
-        );
-        CREATE INDEX IF NOT EXISTS idx_rss_logs_feed ON rss_logs(feed_id);
-        """
+    # --- Settings (cached) ---
+    async def load_settings(self):
+        """(Re)load every setting into the in-process cache with a single query"""
+        if not self.pg_pool:
+            self._settings = {}
+            return self._settings
+        query = "SELECT key, value FROM settings"
         try:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute(query)
-                print("✅ RSS Tables Initialized")
+            rows = await self.fetch(query, name="load settings")
+            self._settings = {row['key']: row['value'] for row in rows}
         except Exception as e:
-            print(f"❌ Database RSS Init Error: {e}")
+            print(f"❌ Get All Settings Error: {e}")
+            # Cache lama tetap dipakai jika ada; None agar dicoba lagi di pemanggilan berikutnya
+        return self._settings or {}
 
-    async def initialize_settings_table(self):
-        if not self.pg_pool: return
-        query = """
-        CREATE TABLE IF NOT EXISTS settings (
-            key TEXT PRIMARY KEY,
-            value TEXT,
-            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-        );
-        """
-        try:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute(query)
-                print("✅ Settings Table Initialized")
-        except Exception as e:
-            print(f"❌ Database Settings Init Error: {e}")
+    def on_settings_change(self, callback):
+        """Register `async callback(keys)`, called after settings change here or in another process"""
+        self._settings_listeners.append(callback)
 
-    async def initialize_finance_tables(self):
-        if not self.pg_pool: return
-        query = """
-        CREATE TABLE IF NOT EXISTS accounts (
-            id SERIAL PRIMARY KEY,
-            name TEXT NOT NULL,
-            type TEXT NOT NULL,
-            currency TEXT DEFAULT 'IDR',
-            balance NUMERIC(20,8) DEFAULT 0,
-            is_active BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-        );
-        CREATE TABLE IF NOT EXISTS transactions (
-            id SERIAL PRIMARY KEY,
-            account_id INTEGER REFERENCES accounts(id),
-            type TEXT NOT NULL,
-            amount NUMERIC(20,2) NOT NULL,
-            category TEXT,
-            note TEXT,
-            tx_date DATE DEFAULT CURRENT_DATE,
-            contact_id TEXT,
-            contact_name TEXT,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-        );
-        CREATE INDEX IF NOT EXISTS idx_transactions_account ON transactions(account_id);
-        CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(tx_date);
-        """
-        try:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute(query)
-                print("✅ Finance Tables Initialized")
-        except Exception as e:
-            print(f"❌ Database Finance Init Error: {e}")
+    async def _notify_settings(self, keys):
+        for callback in self._settings_listeners:
+            try:
+                await callback(keys)
+            except Exception as e:
+                print(f"⚠️ Settings Listener Error: {e}")
 
-    async def set_setting(self, key, value):
+    async def _listen_settings(self):
+        """Apply invalidations published by other bot processes"""
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.dragonfly.pubsub()
+                await pubsub.subscribe(SETTINGS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = json.loads(message["data"])
+                    if data.get("origin") == self.instance_id:
+                        continue
+                    await self.load_settings()
+                    await self._notify_settings(data.get("keys", []))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Settings Subscription Error: {e}")
+                await asyncio.sleep(5)
+            finally:
+                if pubsub:
+                    try:
+                        await pubsub.reset()
+                    except Exception:
+                        pass
+
+    async def set_settings(self, values):
+        """Write several settings in one transaction, update the cache and notify listeners once"""
         if not self.pg_pool: return False
         query = """
             INSERT INTO settings (key, value, updated_at)
             VALUES ($1, $2, NOW())
             ON CONFLICT (key) DO UPDATE SET value = $2, updated_at = NOW()
         """
+        values = {key: str(value) for key, value in values.items()}
         try:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute(query, key, str(value))
-            return True
+            async with self.acquire() as conn:
+                started = time.perf_counter()
+                async with conn.transaction():
+                    await conn.executemany(query, list(values.items()))
+                self.metrics.observe("set settings", (time.perf_counter() - started) * 1000)
         except Exception as e:
             print(f"❌ Set Setting Error: {e}")
             return False
 
+        if self._settings is None:
+            await self.load_settings()
+        else:
+            self._settings.update(values)
+
+        if self.dragonfly:
+            try:
+                await self.dragonfly.publish(SETTINGS_CHANNEL, json.dumps({"origin": self.instance_id, "keys": list(values)}))
+            except Exception as e:
+                print(f"⚠️ Settings Publish Error: {e}")
+        await self._notify_settings(list(values))
+        return True
+
+    async def set_setting(self, key, value):
+        return await self.set_settings({key: value})
+
     async def get_setting(self, key):
-        if not self.pg_pool: return None
-        query = "SELECT value FROM settings WHERE key = $1"
-        try:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow(query, key)
-                return row['value'] if row else None
-        except Exception as e:
-            print(f"❌ Get Setting Error: {e}")
-            return None
+        if self._settings is None:
+            await self.load_settings()
+        return (self._settings or {}).get(key)
 
     async def get_all_settings(self):
-        if not self.pg_pool: return {}
-        query = "SELECT key, value FROM settings"
-        try:
-            async with self.pg_pool.acquire() as conn:
-                rows = await conn.fetch(query)
-                return {row['key']: row['value'] for row in rows}
-        except Exception as e:
-            print(f"❌ Get All Settings Error: {e}")
-            return {}
+        if self._settings is None:
+            await self.load_settings()
+        return dict(self._settings or {})
 
     async def add_rss_feed(self, url, category="general"):
         if not self.pg_pool: return False
         query = "INSERT INTO rss_feeds (url, category) VALUES ($1, $2) ON CONFLICT (url) DO NOTHING RETURNING id"
         try:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow(query, url, category)
-                return row['id'] if row else None
+            row = await self.fetchrow(query, url, category, name="add rss feed")
+            return row['id'] if row else None
         except Exception as e:
             print(f"❌ Add RSS Feed Error: {e}")
             return None
 
     async def get_rss_feeds(self):
         if not self.pg_pool: return []
-        query = "SELECT id, url, category FROM rss_feeds"
+        query = "SELECT id, url, category, etag, last_modified, content_hash, checked_at FROM rss_feeds"
         try:
-            async with self.pg_pool.acquire() as conn:
-                rows = await conn.fetch(query)
-                return [dict(row) for row in rows]
+            rows = await self.fetch(query, name="get rss feeds")
+            return [dict(row) for row in rows]
         except Exception as e:
             print(f"❌ Get RSS Feeds Error: {e}")
             return []
 
-    async def is_article_processed(self, article_url):
+    async def update_rss_feed_cache(self, feed_id, etag, last_modified, content_hash):
+        """Store the validators of the last fully processed fetch (for conditional GET)"""
         if not self.pg_pool: return False
-        query = "SELECT 1 FROM rss_logs WHERE article_url = $1 LIMIT 1"
+        query = """
+            UPDATE rss_feeds SET etag = $2, last_modified = $3, content_hash = $4, checked_at = CURRENT_TIMESTAMP
+            WHERE id = $1
+        """
         try:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow(query, article_url)
-                return row is not None
+            await self.execute(query, feed_id, etag, last_modified, content_hash, name="update rss feed cache")
+            return True
         except Exception as e:
+            print(f"❌ Update RSS Feed Cache Error: {e}")
             return False
 
-    async def log_rss_article(self, feed_id, article_url, title, summary, published_at=None):
-        if not self.pg_pool: return False
+    @staticmethod
+    def _seen_bucket():
+        return int(time.time() // RSS_SEEN_TTL)
+
+    def _seen_key(self, feed_id, bucket):
+        return f"rss:seen:{feed_id}:{bucket}"
+
+    async def filter_new_articles(self, feed_id, article_urls):
+        """Links not yet in rss_logs (order kept); Dragonfly seen-set first, then one = ANY($1) query.
+
+        Returns None if the lookup failed, so the caller can retry next cycle.
+        """
+        urls = list(dict.fromkeys(u for u in article_urls if u))
+        if not urls or not self.pg_pool:
+            return urls
+
+        candidates = urls
+        if self.dragonfly:
+            try:
+                bucket = self._seen_bucket()
+                pipe = self.dragonfly.pipeline(transaction=False)
+                pipe.smismember(self._seen_key(feed_id, bucket), urls)
+                pipe.smismember(self._seen_key(feed_id, bucket - 1), urls)
+                current, previous = await pipe.execute()
+                candidates = [u for u, a, b in zip(urls, current, previous) if not (a or b)]
+            except Exception as e:
+                print(f"⚠️ RSS Seen-set Error: {e}")
+        if not candidates:
+            return []
+
+        query = "SELECT article_url FROM rss_logs WHERE article_url = ANY($1::text[])"
+        try:
+            rows = await self.fetch(query, candidates, name="filter new articles")
+        except Exception as e:
+            print(f"❌ Filter RSS Articles Error: {e}")
+            return None
+
+        known = {row['article_url'] for row in rows}
+        # Link yang sudah ada di Postgres dimasukkan ke seen-set agar siklus berikutnya tanpa query
+        await self._mark_seen(feed_id, known)
+        return [u for u in candidates if u not in known]
+
+    async def _mark_seen(self, feed_id, article_urls):
+        if not self.dragonfly or not article_urls:
+            return
+        try:
+            bucket = self._seen_bucket()
+            key = self._seen_key(feed_id, bucket)
+            pipe = self.dragonfly.pipeline(transaction=False)
+            pipe.sadd(key, *article_urls)
+            # Expire absolut (akhir bucket berikutnya): tidak ikut diperpanjang oleh sadd berikutnya
+            pipe.expireat(key, (bucket + 2) * RSS_SEEN_TTL)
+            await pipe.execute()
+        except Exception as e:
+            print(f"⚠️ RSS Seen-set Error: {e}")
+
+    async def add_pending_articles(self, feed_id, articles, source=None, status="pending"):
+        """Record newly found articles in one round trip; returns the links inserted (None on error).
+
+        status="done" records a baseline: the articles count as seen but are never published.
+        """
+        links = [a['link'] for a in articles]
+        if not self.pg_pool: return links
         query = """
-            INSERT INTO rss_logs (feed_id, article_url, title, summary, published_at)
-            VALUES ($1, $2, $3, $4, $5)
+            INSERT INTO rss_logs (feed_id, article_url, title, summary, source, status)
+            SELECT $1, url, title, summary, $5, $6
+            FROM unnest($2::text[], $3::text[], $4::text[]) AS a(url, title, summary)
             ON CONFLICT (article_url) DO NOTHING
+            RETURNING article_url
         """
         try:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute(query, feed_id, article_url, title, summary, published_at)
+            rows = await self.fetch(
+                query, feed_id, links, [a['title'] for a in articles], [a['summary'] for a in articles], source, status,
+                name="add pending articles"
+            )
+            inserted = [row['article_url'] for row in rows]
+            await self._mark_seen(feed_id, inserted)
+            return inserted
+        except Exception as e:
+            print(f"❌ Add Pending RSS Articles Error: {e}")
+            return None
+
+    async def set_article_status(self, article_url, status, summary=None):
+        """Advance an article: pending -> summarized -> published -> done"""
+        if not self.pg_pool: return False
+        query = """
+            UPDATE rss_logs SET status = $2, summary = COALESCE($3, summary), updated_at = CURRENT_TIMESTAMP
+            WHERE article_url = $1
+        """
+        try:
+            await self.execute(query, article_url, status, summary, name="set article status")
             return True
         except Exception as e:
-            print(f"❌ Log RSS Article Error: {e}")
+            print(f"❌ Set RSS Article Status Error: {e}")
             return False
 
+    async def get_unfinished_articles(self, max_age_hours=24):
+        """Articles a previous run left mid-pipeline (oldest first), with their feed category"""
+        if not self.pg_pool: return []
+        query = """
+            SELECT l.feed_id, l.article_url, l.title, l.summary, l.source, l.status, f.category
+            FROM rss_logs l LEFT JOIN rss_feeds f ON f.id = l.feed_id
+            WHERE l.status <> 'done' AND l.created_at > CURRENT_TIMESTAMP - make_interval(hours => $1)
+            ORDER BY l.created_at
+        """
+        try:
+            rows = await self.fetch(query, max_age_hours, name="get unfinished articles")
+            return [dict(row) for row in rows]
+        except Exception as e:
+            print(f"❌ Get Unfinished RSS Articles Error: {e}")
+            return []
+
     async def log_health_data(self, user_id, metric_type, data):
         if not self.pg_pool: return False
         query = "INSERT INTO health_logs (user_id, metric_type, data) VALUES ($1, $2, $3)"
         try:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute(query, user_id, metric_type, json.dumps(data))
+            # JSONB codec (lihat _init_connection) meng-encode dict langsung
+            await self.execute(query, user_id, metric_type, data, name="log health data")
             return True
         except Exception as e:
             print(f"❌ Log Health Error: {e}")
@@ -246,16 +407,9 @@ class DatabaseManager:
             ORDER BY created_at DESC LIMIT $3
         """
         try:
-            async with self.pg_pool.acquire() as conn:
-                rows = await conn.fetch(query, user_id, metric_type, limit)
-                # Convert Record to dict, parse JSONB string back to dict
-                result = []
-                for row in rows:
-                    entry = dict(row)
-                    if isinstance(entry['data'], str):
-                        entry['data'] = json.loads(entry['data'])
-                    result.append(entry)
-                return result
+            rows = await self.fetch(query, user_id, metric_type, limit, name="recent health logs")
+            # JSONB sudah di-decode oleh codec koneksi
+            return [dict(row) for row in rows]
         except Exception as e:
             print(f"❌ Get Health Logs Error: {e}")
             return []
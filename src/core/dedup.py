@@ -0,0 +1,32 @@
+import datetime
+import uuid
+
+# Namespace tetap: ID yang sama untuk konten yang sama di semua proses/instance
+MEMORY_NAMESPACE = uuid.UUID("6f1c2b1e-3a57-5d8e-9c4b-2f7d0e8a91c3")
+
+
+def normalize_content(text):
+    return " ".join((text or "").split()).casefold()
+
+
+def identity_text(payload):
+    """Text that identifies a memory: its URL when it has one, else title/content/summary"""
+    if payload.get("url"):
+        return str(payload["url"]).strip()
+    return " ".join(str(payload[k]) for k in ["title", "content", "summary"] if payload.get(k))
+
+
+def content_id(content, user_id=None, source=None):
+    """Deterministic point ID (uuid5) so re-ingesting the same content is an idempotent upsert"""
+    raw = "\x00".join([normalize_content(content), str(user_id or ""), str(source or "")])
+    return str(uuid.uuid5(MEMORY_NAMESPACE, raw))
+
+
+def merge_payloads(existing, new):
+    """Merge a near-duplicate into an existing payload, keeping when it was first seen"""
+    existing = existing or {}
+    merged = {**existing, **new}
+    merged["first_seen"] = existing.get("first_seen") or existing.get("timestamp") or new.get("timestamp")
+    merged["seen_count"] = int(existing.get("seen_count", 1)) + 1
+    merged["last_seen"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    return merged
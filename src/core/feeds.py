@@ -0,0 +1,67 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+import feedparser
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Batas unduhan (di-stream oleh http_client, berhenti begitu lewat batas)
+FEED_MAX_BYTES = int(os.getenv("RSS_FEED_MAX_BYTES", 2 * 1024 * 1024))
+ARTICLE_MAX_BYTES = int(os.getenv("RSS_ARTICLE_MAX_BYTES", 1024 * 1024))
+ARTICLE_MAX_CHARS = 4000  # Limit context for AI
+
+
+def parse_feed(body):
+    """Parse feed bytes into plain data: {"title", "bozo", "entries": [{link, title, summary}]}"""
+    d = feedparser.parse(body)
+    return {
+        "title": d.feed.get('title'),
+        "bozo": bool(d.bozo),
+        "entries": [
+            {"link": e.get('link'), "title": e.get('title', 'No Title'), "summary": e.get('summary', '')}
+            for e in d.entries
+        ],
+    }
+
+
+def extract_article(html, max_chars=ARTICLE_MAX_CHARS):
+    """Paragraph text of an article page, cut at `max_chars`"""
+    # Hanya <p> yang dibangun jadi tree (SoupStrainer): script/style/nav tidak pernah di-parse
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('p'))
+    parts = []
+    size = 0
+    for p in soup.find_all('p'):
+        text = p.get_text(" ", strip=True)
+        if not text:
+            continue
+        parts.append(text)
+        size += len(text) + 1
+        if size >= max_chars:
+            break
+    return " ".join(parts)[:max_chars]
+
+
+class FeedParser:
+    """Runs feedparser/BeautifulSoup in a small dedicated thread pool, off the event loop"""
+
+    def __init__(self, workers=None):
+        self.workers = workers or int(os.getenv("RSS_PARSE_WORKERS", 2))
+        self.executor = None
+
+    async def _run(self, func, *args):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="feed-parse")
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def parse_feed(self, body):
+        return await self._run(parse_feed, body)
+
+    async def extract_article(self, html, max_chars=ARTICLE_MAX_CHARS):
+        return await self._run(extract_article, html, max_chars)
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+feed_parser = FeedParser()
@@ -0,0 +1,89 @@
+import aiohttp
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024  # 5MB
+USER_AGENT = "DiscordOS/1.0 (+https://github.com/dwirijal/DiscordOS)"
+
+
+class ResponseTooLarge(Exception):
+    pass
+
+
+class HttpResponse:
+    def __init__(self, status, headers, body, charset=None, url=None):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.charset = charset
+        self.url = url
+
+    def text(self):
+        return self.body.decode(self.charset or "utf-8", errors="replace")
+
+
+class HttpClient:
+    """Bot-wide pooled HTTP client (shared aiohttp session)"""
+
+    def __init__(self):
+        self.session = None
+
+    async def start(self):
+        if self.session and not self.session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=int(os.getenv("HTTP_POOL_SIZE", 100)),
+            limit_per_host=int(os.getenv("HTTP_POOL_PER_HOST", 8)),
+            ttl_dns_cache=int(os.getenv("HTTP_DNS_TTL", 300)),
+            keepalive_timeout=30,
+            enable_cleanup_closed=True
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=float(os.getenv("HTTP_TIMEOUT", 15)), connect=5),
+            headers={"User-Agent": USER_AGENT}
+        )
+        print("✅ HTTP Client Ready (Pooled)")
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+            print("🔒 HTTP Client Closed")
+        self.session = None
+
+    async def fetch(self, url, headers=None, timeout=None, max_bytes=DEFAULT_MAX_BYTES):
+        """GET `url` and read at most `max_bytes` of body (raises ResponseTooLarge beyond that)"""
+        await self.start()
+
+        kwargs = {}
+        if headers:
+            kwargs["headers"] = headers
+        if timeout:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+
+        async with self.session.get(url, **kwargs) as resp:
+            if resp.content_length and resp.content_length > max_bytes:
+                raise ResponseTooLarge(f"{url} is {resp.content_length} bytes (max {max_bytes})")
+
+            chunks = []
+            size = 0
+            async for chunk in resp.content.iter_chunked(64 * 1024):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ResponseTooLarge(f"{url} exceeded {max_bytes} bytes")
+                chunks.append(chunk)
+
+            return HttpResponse(resp.status, resp.headers, b"".join(chunks), resp.charset, str(resp.url))
+
+    async def fetch_text(self, url, **kwargs):
+        """Convenience wrapper: body text for 200 responses, None otherwise"""
+        resp = await self.fetch(url, **kwargs)
+        if resp.status != 200:
+            return None
+        return resp.text()
+
+
+http_client = HttpClient()
@@ -0,0 +1,78 @@
+import re
+import zlib
+from collections import Counter
+
+SPARSE_VECTOR_NAME = "bm25"
+
+# Token: kata, angka, ticker (BTC-USD), identifier (get_user_id), versi (1.2.3)
+TOKEN_PATTERN = re.compile(r"[0-9a-z_]+(?:[.\-/:][0-9a-z_]+)*")
+
+
+def tokenize(text):
+    tokens = TOKEN_PATTERN.findall((text or "").lower())
+    expanded = []
+    for token in tokens:
+        expanded.append(token)
+        # Token gabungan juga diindeks per bagian ("btc-usd" -> "btc", "usd")
+        parts = re.split(r"[.\-/:]", token)
+        if len(parts) > 1:
+            expanded.extend(p for p in parts if p)
+    return expanded
+
+
+def term_index(term):
+    """Stable 32-bit term id (same across processes, unlike hash())"""
+    return zlib.crc32(term.encode("utf-8"))
+
+
+class BM25Encoder:
+    """Local BM25 document/query encoder for Qdrant sparse vectors.
+
+    Documents get BM25 term-frequency saturation weights; IDF is applied server-side
+    by Qdrant (sparse vector modifier=IDF), so no corpus statistics are kept here.
+    """
+
+    def __init__(self, k1=1.2, b=0.75, avg_doc_len=256):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_len = avg_doc_len
+
+    def _to_sparse(self, weights):
+        merged = {}
+        for term, weight in weights.items():
+            idx = term_index(term)
+            merged[idx] = merged.get(idx, 0.0) + weight
+        indices = sorted(merged)
+        return indices, [merged[i] for i in indices]
+
+    def encode_document(self, text):
+        tokens = tokenize(text)
+        if not tokens:
+            return [], []
+        counts = Counter(tokens)
+        norm = self.k1 * (1 - self.b + self.b * len(tokens) / self.avg_doc_len)
+        return self._to_sparse({term: tf * (self.k1 + 1) / (tf + norm) for term, tf in counts.items()})
+
+    def encode_query(self, text):
+        return self._to_sparse({term: 1.0 for term in set(tokenize(text))})
+
+
+def reciprocal_rank_fusion(result_lists, limit, k=60):
+    """Fuse ranked result lists (objects with .id) by RRF; keeps the first object seen per id"""
+    scores = {}
+    items = {}
+    for results in result_lists:
+        for rank, item in enumerate(results):
+            scores[item.id] = scores.get(item.id, 0.0) + 1.0 / (k + rank + 1)
+            items.setdefault(item.id, item)
+
+    ranked = sorted(scores, key=lambda i: scores[i], reverse=True)[:limit]
+    fused = []
+    for point_id in ranked:
+        item = items[point_id]
+        try:
+            item.score = scores[point_id]
+        except AttributeError:
+            pass
+        fused.append(item)
+    return fused
@@ -0,0 +1,289 @@
+import datetime
+import json
+import os
+import threading
+import numpy as np
+
+
+def _as_datetime(value):
+    if value is None or isinstance(value, datetime.datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    if dt is not None and dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt
+
+
+def matches(payload, user_id=None, memory_type=None, source=None, since=None, until=None, include_unowned=False):
+    """Local equivalent of MemoryCore.build_filter"""
+    for key, expected in [("user_id", user_id), ("type", memory_type), ("source", source)]:
+        if expected is None:
+            continue
+        if key == "user_id" and include_unowned and payload.get("user_id") in (None, ""):
+            continue
+        allowed = {str(v) for v in expected} if isinstance(expected, (list, tuple, set)) else {str(expected)}
+        if str(payload.get(key)) not in allowed:
+            return False
+
+    if since or until:
+        ts = _as_datetime(payload.get("timestamp"))
+        if ts is None:
+            return False
+        if since and ts < _as_datetime(since):
+            return False
+        if until and ts > _as_datetime(until):
+            return False
+    return True
+
+
+class LocalHit:
+    """Mimics qdrant ScoredPoint (id, score, payload)"""
+
+    def __init__(self, id, score, payload):
+        self.id = id
+        self.score = score
+        self.payload = payload
+
+
+class LocalVectorIndex:
+    """In-process vector store: normalized float32 vectors in a memory-mapped file + JSONL payloads.
+
+    Search is brute force (one matrix-vector product) and switches to a simple IVF
+    (k-means coarse quantizer, `nprobe` lists) once the index is large. Points written
+    while Qdrant is unreachable are tracked as pending so they can be replayed later.
+    Public methods are called from worker threads (asyncio.to_thread) and share one lock.
+    """
+
+    def __init__(self, path, ivf_min_points=50000, nprobe=8):
+        self.path = path
+        self.ivf_min_points = ivf_min_points
+        self.nprobe = nprobe
+
+        self.dim = None
+        self.count = 0
+        self.capacity = 0
+        self.vectors = None
+        self.ids = []          # row -> point id
+        self.rows = {}         # point id -> row
+        self.payloads = []     # row -> payload
+        self.pending = set()   # point id yang belum masuk Qdrant
+
+        self._payload_lines = 0
+        self._centroids = None
+        self._assignments = None
+        self._ivf_built_at = 0
+        # RLock: search -> _build_ivf mengambil lock yang sama
+        self._lock = threading.RLock()
+
+    # --- Files ---
+    @property
+    def _meta_file(self):
+        return os.path.join(self.path, "index.json")
+
+    @property
+    def _vectors_file(self):
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _payloads_file(self):
+        return os.path.join(self.path, "payloads.jsonl")
+
+    @property
+    def _pending_file(self):
+        return os.path.join(self.path, "pending.json")
+
+    def load(self):
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(self._meta_file):
+            with open(self._meta_file) as f:
+                meta = json.load(f)
+            self.dim, self.capacity = meta["dim"], meta["capacity"]
+            if self.dim and self.capacity:
+                self.vectors = np.memmap(self._vectors_file, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+
+        if os.path.exists(self._payloads_file):
+            with open(self._payloads_file) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    self._payload_lines += 1
+                    record = json.loads(line)
+                    self._set_row(record["row"], record["id"], record["payload"])
+        self.count = len(self.ids)
+
+        if os.path.exists(self._pending_file):
+            with open(self._pending_file) as f:
+                self.pending = set(json.load(f))
+
+        # Compaction: tulis ulang JSONL jika banyak baris lama yang sudah ditimpa
+        if self._payload_lines > 2 * max(self.count, 1000):
+            self._compact_payloads()
+        return self
+
+    def _set_row(self, row, point_id, payload):
+        while len(self.ids) <= row:
+            self.ids.append(None)
+            self.payloads.append(None)
+        self.ids[row] = point_id
+        self.payloads[row] = payload
+        self.rows[point_id] = row
+
+    def _save_meta(self):
+        with open(self._meta_file, "w") as f:
+            json.dump({"dim": self.dim, "capacity": self.capacity}, f)
+
+    def _save_pending(self):
+        tmp = self._pending_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(sorted(self.pending), f)
+        os.replace(tmp, self._pending_file)
+
+    def _compact_payloads(self):
+        tmp = self._payloads_file + ".tmp"
+        with open(tmp, "w") as f:
+            for row, (point_id, payload) in enumerate(zip(self.ids, self.payloads)):
+                f.write(json.dumps({"id": point_id, "row": row, "payload": payload}, ensure_ascii=False) + "\n")
+        os.replace(tmp, self._payloads_file)
+        self._payload_lines = self.count
+
+    def _grow(self, needed):
+        capacity = max(1024, self.capacity)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        if self.vectors is not None:
+            self.vectors.flush()
+            del self.vectors
+        # Perbesar file lalu map ulang (isi lama tetap di tempat)
+        with open(self._vectors_file, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self.capacity = capacity
+        self.vectors = np.memmap(self._vectors_file, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._save_meta()
+
+    # --- Writes ---
+    def upsert(self, points, pending=False):
+        """points: iterable of {"id", "vector", "payload"}"""
+        points = [p for p in points if p.get("vector")]
+        if not points:
+            return
+        with self._lock:
+            self._upsert(points, pending)
+
+    def _upsert(self, points, pending):
+        if self.dim is None:
+            self.dim = len(points[0]["vector"])
+        self._grow(self.count + len(points))
+
+        with open(self._payloads_file, "a") as f:
+            for point in points:
+                vector = np.asarray(point["vector"], dtype=np.float32)
+                if vector.shape[0] != self.dim:
+                    print(f"⚠️ Local Index: skipping {point['id']} (dim {vector.shape[0]} != {self.dim})")
+                    continue
+                norm = np.linalg.norm(vector)
+                point_id = str(point["id"])
+                row = self.rows.get(point_id)
+                if row is None:
+                    row = self.count
+                    self.count += 1
+                self.vectors[row] = vector / norm if norm else vector
+                self._set_row(row, point_id, point["payload"])
+                f.write(json.dumps({"id": point_id, "row": row, "payload": point["payload"]}, ensure_ascii=False) + "\n")
+                self._payload_lines += 1
+                if pending:
+                    self.pending.add(point_id)
+        self.vectors.flush()
+        if pending:
+            self._save_pending()
+
+    def mark_pending(self, point_ids):
+        with self._lock:
+            self.pending.update(str(i) for i in point_ids)
+            self._save_pending()
+
+    def pending_points(self, limit=256):
+        batch = []
+        with self._lock:
+            for point_id in list(self.pending)[:limit]:
+                row = self.rows.get(point_id)
+                if row is None:
+                    self.pending.discard(point_id)
+                    continue
+                batch.append({"id": point_id, "vector": self.vectors[row].tolist(), "payload": self.payloads[row]})
+        return batch
+
+    def mark_synced(self, point_ids):
+        with self._lock:
+            self.pending.difference_update(str(i) for i in point_ids)
+            self._save_pending()
+
+    # --- Search ---
+    def _build_ivf(self):
+        with self._lock:
+            self._train_ivf()
+
+    def _train_ivf(self):
+        n = self.count
+        nlist = int(np.sqrt(n))
+        rng = np.random.default_rng(0)
+        data = self.vectors[:n]
+        sample = data[rng.choice(n, size=min(n, nlist * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        for _ in range(8):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    mean = members.mean(axis=0)
+                    centroids[c] = mean / (np.linalg.norm(mean) or 1)
+
+        # Assign semua vektor per blok agar memori tetap kecil
+        assignments = np.empty(n, dtype=np.int32)
+        for start in range(0, n, 65536):
+            assignments[start:start + 65536] = np.argmax(data[start:start + 65536] @ centroids.T, axis=1)
+        self._centroids = centroids
+        self._assignments = assignments
+        self._ivf_built_at = n
+
+    def _candidate_rows(self, query):
+        if self.count < self.ivf_min_points:
+            return None
+        # Bangun ulang IVF setiap kali jumlah data naik 2x
+        if self._centroids is None or self.count >= 2 * self._ivf_built_at:
+            self._build_ivf()
+        probes = np.argsort(self._centroids @ query)[-self.nprobe:]
+        rows = np.nonzero(np.isin(self._assignments, probes))[0]
+        # Data yang masuk setelah IVF dibangun selalu di-scan
+        tail = np.arange(self._ivf_built_at, self.count)
+        return np.concatenate([rows, tail])
+
+    def search(self, query_vector, limit=3, **filters):
+        with self._lock:
+            return self._search(query_vector, limit, **filters)
+
+    def _search(self, query_vector, limit=3, **filters):
+        if not self.count or query_vector is None or len(query_vector) != self.dim:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1
+
+        rows = self._candidate_rows(query)
+        if rows is None:
+            rows = np.arange(self.count)
+
+        if any(v is not None for k, v in filters.items() if k != "include_unowned"):
+            rows = np.array([r for r in rows if self.payloads[r] is not None and matches(self.payloads[r], **filters)], dtype=np.int64)
+        if not len(rows):
+            return []
+
+        scores = self.vectors[rows] @ query
+        top = np.argsort(-scores)[:limit] if len(scores) <= limit else np.argpartition(-scores, limit)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [LocalHit(self.ids[rows[i]], float(scores[i]), self.payloads[rows[i]]) for i in top]
@@ -1,8 +1,17 @@
 from qdrant_client import AsyncQdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct
+from qdrant_client.models import (
+    PointStruct, PayloadSchemaType,
+    Filter, FieldCondition, MatchValue, MatchAny, DatetimeRange, IsEmptyCondition, PayloadField,
+    SparseVectorParams, SparseVector, Modifier
+)
+import asyncio
 import os
 import uuid
+import datetime
 from dotenv import load_dotenv
+from src.core.storage_profile import StorageProfile
+from src.core.hybrid import BM25Encoder, SPARSE_VECTOR_NAME, reciprocal_rank_fusion
+from src.core.dedup import content_id, identity_text, merge_payloads
 
 load_dotenv()
 
@@ -10,63 +19,408 @@ class MemoryCore:
     def __init__(self):
         self.client = AsyncQdrantClient(url=os.getenv("QDRANT_URL"))
         self.collection_name = "second_brain"
+        self.vector_size = 768  # Size 768 cocok untuk model embedding standard (misal Gemini Embedding)
+        self.profile = StorageProfile.from_env()
+        self.sparse_encoder = BM25Encoder()
+        self.hybrid = False  # True jika koleksi punya sparse vector (BM25)
+
+        # Backend: "qdrant", "qdrant+local" (write-through + fallback) atau "local" (tanpa Qdrant).
+        # Local index menyimpan semua payload di heap bot, jadi mirror lokal harus dipilih eksplisit.
+        self.backend = os.getenv("MEMORY_BACKEND", "qdrant").lower()
+        self.local = None
+        self.qdrant_online = self.backend != "local"
+        self._collection_ready = False  # Koleksi, payload index & mode hybrid sudah disiapkan
+        self._replay_task = None
+
+        # Near-duplicate merge saat remember (mis. 0.97); kosong = hanya dedup exact lewat ID deterministik
+        threshold = os.getenv("MEMORY_DEDUP_THRESHOLD", "")
+        self.dedup_threshold = float(threshold) if threshold else None
+
+        # Write-behind: remember() mengantre point, writer meng-upsert per batch (ukuran atau waktu)
+        self.write_batch_size = int(os.getenv("MEMORY_WRITE_BATCH", "256"))
+        self.write_interval = float(os.getenv("MEMORY_WRITE_INTERVAL", "1.0"))
+        self.write_queue_size = int(os.getenv("MEMORY_WRITE_QUEUE", "4096"))
+        self._write_queue = None
+        self._writer_task = None
+        self.write_stats = {"queued": 0, "written": 0, "failed": 0, "batches": 0}
 
     async def initialize(self):
+        self.start_writer()
+        if self.backend in ["local", "qdrant+local"]:
+            await self.initialize_local_index()
+        if self.backend == "local":
+            return
+
+        try:
+            await self._setup_collection()
+            self.qdrant_online = True
+            if self.local and self.local.pending:
+                self._start_replay()
+        except Exception as e:
+            print(f"❌ Qdrant Connection Error: {e}")
+            self._mark_qdrant_down()
+            # Setup koleksi diulang oleh replay loop saat Qdrant bisa dihubungi
+            self._start_replay()
+
+    async def _setup_collection(self):
+        """Create the collection if missing, detect hybrid mode and ensure payload indexes"""
+        # Cek apakah koleksi memori sudah ada, jika belum, buat baru
+        collections = await self.client.get_collections()
+        exists = any(c.name == self.collection_name for c in collections.collections)
+
+        if not exists:
+            await self.client.create_collection(
+                collection_name=self.collection_name,
+                # Dense vector tetap unnamed (kompatibel), BM25 sebagai named sparse vector
+                sparse_vectors_config={SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)},
+                **self.profile.collection_kwargs(self.vector_size)
+            )
+            self.hybrid = True
+            print(f"✅ Qdrant Collection Created ({self.profile.describe()}, hybrid)")
+        else:
+            print("✅ Qdrant Connected (Long-term Memory)")
+            if os.getenv("QDRANT_APPLY_PROFILE", "").lower() in ["1", "true", "on", "yes"]:
+                await self.apply_profile()
+
+            info = await self.client.get_collection(self.collection_name)
+            sparse = info.config.params.sparse_vectors or {}
+            self.hybrid = SPARSE_VECTOR_NAME in sparse
+            if not self.hybrid:
+                print("⚠️ Collection has no BM25 sparse vectors; recall is dense-only (recreate collection to enable hybrid)")
+
+        await self.initialize_payload_indexes()
+        self._collection_ready = True
+
+    async def initialize_local_index(self):
+        # Import di sini: numpy hanya dibutuhkan jika local index dipakai
+        from src.core.local_index import LocalVectorIndex
+
+        path = os.getenv("LOCAL_INDEX_PATH", os.path.join("data", "local_index"))
         try:
-            # Cek apakah koleksi memori sudah ada, jika belum, buat baru
-            collections = await self.client.get_collections()
-            exists = any(c.name == self.collection_name for c in collections.collections)
-            
-            if not exists:
-                await self.client.create_collection(
+            self.local = await asyncio.to_thread(LocalVectorIndex(path).load)
+            print(f"✅ Local Vector Index Ready ({self.local.count} points, {len(self.local.pending)} pending)")
+        except Exception as e:
+            print(f"❌ Local Vector Index Error: {e}")
+            self.local = None
+
+    def _mark_qdrant_down(self):
+        if self.backend == "local" or not self.local:
+            return
+        if self.qdrant_online:
+            print("⚠️ Qdrant unreachable, using local vector index until it comes back")
+        self.qdrant_online = False
+        self._start_replay()
+
+    def _start_replay(self):
+        if self._replay_task is None or self._replay_task.done():
+            self._replay_task = asyncio.create_task(self._replay_loop())
+
+    async def _replay_loop(self, interval=30, batch_size=256):
+        """Wait for Qdrant to come back, redo the collection setup, then replay points written while it was down"""
+        while not self._collection_ready or (self.local and (self.local.pending or not self.qdrant_online)):
+            try:
+                if not self._collection_ready or not self.qdrant_online:
+                    # Qdrant mungkin mati saat initialize (koleksi/index belum dibuat) atau di-reset saat down
+                    await self._setup_collection()
+                    if not self.qdrant_online:
+                        print("✅ Qdrant back online, replaying local writes")
+                    self.qdrant_online = True
+
+                batch = await asyncio.to_thread(self.local.pending_points, batch_size) if self.local else []
+                if not batch:
+                    break
+                await self.client.upsert(
                     collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=768, distance=Distance.COSINE) 
-                    # Size 768 cocok untuk model embedding standard (misal Gemini Embedding)
+                    points=[self._to_point_struct(p) for p in batch]
                 )
-                print("✅ Qdrant Collection Created")
-            else:
-                print("✅ Qdrant Connected (Long-term Memory)")
+                await asyncio.to_thread(self.local.mark_synced, [p["id"] for p in batch])
+                continue
+            except Exception as e:
+                if self.local:
+                    self.qdrant_online = False
+                print(f"⚠️ Qdrant Replay Waiting: {e}")
+            await asyncio.sleep(interval)
+
+    async def apply_profile(self):
+        # Terapkan profil ke koleksi yang sudah ada (Qdrant akan re-index di background)
+        kwargs = self.profile.update_kwargs()
+        if not kwargs:
+            return
+        try:
+            await self.client.update_collection(collection_name=self.collection_name, **kwargs)
+            print(f"✅ Qdrant Storage Profile Applied ({self.profile.describe()})")
         except Exception as e:
-            print(f"❌ Qdrant Connection Error: {e}")
+            print(f"⚠️ Storage Profile Update Error: {e}")
+
+    async def initialize_payload_indexes(self):
+        # Index payload agar filtered HNSW search tetap cepat saat koleksi membesar
+        indexes = {
+            "user_id": PayloadSchemaType.KEYWORD,
+            "type": PayloadSchemaType.KEYWORD,
+            "source": PayloadSchemaType.KEYWORD,
+            "timestamp": PayloadSchemaType.DATETIME,
+        }
+        for field_name, schema in indexes.items():
+            try:
+                await self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=schema
+                )
+            except Exception as e:
+                print(f"⚠️ Payload Index Error ({field_name}): {e}")
+
+    @staticmethod
+    def build_filter(user_id=None, memory_type=None, source=None, since=None, until=None, include_unowned=False):
+        """Qdrant filter from structured recall options (str or list for keyword fields).
+
+        include_unowned also matches points without user_id (os.memorize notes stored
+        before payloads carried one; `scripts.dedup_memory --backfill-owner` assigns them).
+        """
+        conditions = []
+        for key, value in [("user_id", user_id), ("type", memory_type), ("source", source)]:
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                condition = FieldCondition(key=key, match=MatchAny(any=[str(v) for v in value]))
+            else:
+                condition = FieldCondition(key=key, match=MatchValue(value=str(value)))
+            if key == "user_id" and include_unowned:
+                condition = Filter(should=[condition, IsEmptyCondition(is_empty=PayloadField(key="user_id"))])
+            conditions.append(condition)
 
-    async def recall(self, query_vector, limit=3):
+        if since or until:
+            conditions.append(FieldCondition(key="timestamp", range=DatetimeRange(gte=since, lte=until)))
+
+        return Filter(must=conditions) if conditions else None
+
+    def point_vector(self, vector, text=None):
+        """Vector field for a PointStruct: dense only, or dense + BM25 sparse when hybrid"""
+        if not self.hybrid or not text:
+            return vector
+        indices, values = self.sparse_encoder.encode_document(text)
+        if not indices:
+            return vector
+        return {"": vector, SPARSE_VECTOR_NAME: SparseVector(indices=indices, values=values)}
+
+    async def recall(self, query_vector, limit=3, user_id=None, memory_type=None, source=None, since=None, until=None, query_text=None,
+                     include_unowned=False):
         # Cari data yang relevan
         if not query_vector:
             return []
 
+        filters = {"user_id": user_id, "memory_type": memory_type, "source": source, "since": since, "until": until,
+                   "include_unowned": include_unowned}
+        if not self.qdrant_online:
+            return await self._local_recall(query_vector, limit, filters)
+
         try:
-            return await self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_vector,
-                limit=limit
+            search_kwargs = {}
+            query_filter = self.build_filter(user_id, memory_type, source, since, until, include_unowned)
+            if query_filter:
+                search_kwargs["query_filter"] = query_filter
+            search_params = self.profile.search_params()
+            if search_params:
+                search_kwargs["search_params"] = search_params
+
+            indices, values = self.sparse_encoder.encode_query(query_text) if (self.hybrid and query_text) else ([], [])
+            if not indices:
+                response = await self.client.query_points(
+                    collection_name=self.collection_name,
+                    query=query_vector,
+                    limit=limit,
+                    **search_kwargs
+                )
+                return response.points
+
+            # Hybrid: dense + BM25 paralel, lalu gabung dengan reciprocal rank fusion
+            candidates = max(limit * 4, 20)
+            dense, sparse = await asyncio.gather(
+                self.client.query_points(
+                    collection_name=self.collection_name,
+                    query=query_vector,
+                    limit=candidates,
+                    **search_kwargs
+                ),
+                self.client.query_points(
+                    collection_name=self.collection_name,
+                    query=SparseVector(indices=indices, values=values),
+                    using=SPARSE_VECTOR_NAME,
+                    limit=candidates,
+                    query_filter=search_kwargs.get("query_filter")
+                )
             )
+            return reciprocal_rank_fusion([dense.points, sparse.points], limit=limit)
         except Exception as e:
             print(f"⚠️ Memory Recall Error: {e}")
+            self._mark_qdrant_down()
+            return await self._local_recall(query_vector, limit, filters)
+
+    async def _local_recall(self, query_vector, limit, filters):
+        if not self.local:
+            return []
+        try:
+            return await asyncio.to_thread(self.local.search, query_vector, limit, **filters)
+        except Exception as e:
+            print(f"⚠️ Local Recall Error: {e}")
             return []
 
-    async def remember(self, user_id, vector, payload):
-        # Simpan data ke memori jangka panjang
-        if not vector:
+    @staticmethod
+    def payload_text(payload):
+        """Text used for BM25 terms of a stored memory"""
+        return " ".join(str(payload[k]) for k in ["title", "content", "summary"] if payload.get(k))
+
+    def _to_point_struct(self, point):
+        return PointStruct(
+            id=point["id"],
+            vector=self.point_vector(point["vector"], self.payload_text(point["payload"])),
+            payload=point["payload"]
+        )
+
+    async def store(self, points):
+        """Upsert points ({"id", "vector", "payload"}) to Qdrant, writing through the local index"""
+        points = [p for p in points if p.get("vector")]
+        if not points:
             return False
 
+        if self.local:
+            try:
+                await asyncio.to_thread(self.local.upsert, points)
+            except Exception as e:
+                print(f"⚠️ Local Index Store Error: {e}")
+
+        if self.backend == "local":
+            return self.local is not None
+
+        if self.qdrant_online:
+            try:
+                await self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=[self._to_point_struct(p) for p in points]
+                )
+                return True
+            except Exception as e:
+                print(f"⚠️ Memory Store Error: {e}")
+                self._mark_qdrant_down()
+
+        # Qdrant down: simpan sebagai pending, di-replay saat Qdrant kembali
+        if self.local:
+            try:
+                await asyncio.to_thread(self.local.mark_pending, [p["id"] for p in points])
+                return True
+            except Exception as e:
+                print(f"⚠️ Local Index Store Error: {e}")
+        return False
+
+    # --- Write-behind queue ---
+    def start_writer(self):
+        if self._writer_task is None or self._writer_task.done():
+            if self._write_queue is None:
+                self._write_queue = asyncio.Queue(maxsize=self.write_queue_size)
+            self._writer_task = asyncio.create_task(self._writer_loop())
+
+    async def enqueue(self, points):
+        """Queue points for a batched upsert; waits when the queue is full (backpressure)"""
+        if self._writer_task is None or self._writer_task.done():
+            return await self.store(points)
+        for point in points:
+            await self._write_queue.put(point)
+            self.write_stats["queued"] += 1
+        return True
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._write_queue.get()]
+            # Kumpulkan sampai batch penuh atau interval habis, lalu satu upsert
+            deadline = loop.time() + self.write_interval
+            while len(batch) < self.write_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._write_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._write_batch(batch)
+
+    async def _write_batch(self, batch):
+        # ID sama dalam satu batch (mis. remember ulang): yang terakhir menang
+        points = list({str(p["id"]): p for p in batch}.values())
         try:
-            point_id = str(uuid.uuid4())
-            # Pastikan payload menyertakan user_id agar bisa difilter nanti jika perlu
-            payload['user_id'] = str(user_id)
+            ok = await self.store(points)
+        except Exception as e:
+            print(f"⚠️ Memory Writer Error: {e}")
+            ok = False
+        self.write_stats["batches"] += 1
+        self.write_stats["written" if ok else "failed"] += len(points)
+        if not ok:
+            print(f"⚠️ Memory Writer: dropped {len(points)} point(s)")
+        for _ in batch:
+            self._write_queue.task_done()
 
-            await self.client.upsert(
-                collection_name=self.collection_name,
-                points=[
-                    PointStruct(
-                        id=point_id,
-                        vector=vector,
-                        payload=payload
-                    )
-                ]
-            )
-            return True
+    async def flush(self, timeout=30):
+        """Wait until every queued point has been written"""
+        if self._write_queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._write_queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Memory Flush Timeout: {self._write_queue.qsize()} point(s) not written")
+
+    async def close(self):
+        await self.flush()
+        for task in [self._writer_task, self._replay_task]:
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    def writer_summary(self):
+        s = self.write_stats
+        queued = self._write_queue.qsize() if self._write_queue else 0
+        return f"Queue {queued}/{self.write_queue_size} | Written {s['written']} in {s['batches']} batch(es) | Failed {s['failed']}"
+
+    async def find_duplicate(self, vector, user_id, threshold):
+        """Closest existing memory of the same user with similarity >= threshold, or None"""
+        try:
+            if self.qdrant_online and self.backend != "local":
+                response = await self.client.query_points(
+                    collection_name=self.collection_name,
+                    query=vector,
+                    query_filter=self.build_filter(user_id=str(user_id)),
+                    score_threshold=threshold,
+                    limit=1
+                )
+                return response.points[0] if response.points else None
+            if self.local:
+                hits = await asyncio.to_thread(self.local.search, vector, 1, user_id=str(user_id))
+                return hits[0] if hits and hits[0].score >= threshold else None
         except Exception as e:
-            print(f"⚠️ Memory Store Error: {e}")
+            print(f"⚠️ Memory Dedup Lookup Error: {e}")
+        return None
+
+    async def remember(self, user_id, vector, payload):
+        # Simpan data ke memori jangka panjang
+        if not vector:
             return False
 
+        # Pastikan payload menyertakan user_id agar bisa difilter nanti jika perlu
+        payload['user_id'] = str(user_id)
+        payload.setdefault('timestamp', datetime.datetime.now(datetime.timezone.utc).isoformat())
+
+        # ID dari konten: menyimpan hal yang sama dua kali menimpa point lama, bukan menambah
+        identity = identity_text(payload)
+        point_id = content_id(identity, user_id, payload.get('source')) if identity else str(uuid.uuid4())
+
+        if self.dedup_threshold:
+            duplicate = await self.find_duplicate(vector, user_id, self.dedup_threshold)
+            if duplicate:
+                point_id = str(duplicate.id)
+                payload = merge_payloads(duplicate.payload, payload)
+
+        return await self.enqueue([{"id": point_id, "vector": vector, "payload": payload}])
+
 memory = MemoryCore()
@@ -0,0 +1,68 @@
+import bisect
+
+# Batas bucket histogram dalam milidetik (bucket terakhir = tak terhingga)
+DEFAULT_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (ms) with count, sum and max"""
+
+    def __init__(self, buckets=None):
+        self.buckets = list(buckets or DEFAULT_BUCKETS_MS)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def observe(self, ms, error=False):
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class QueryMetrics:
+    """Named latency histograms (per query, plus pool wait)"""
+
+    def __init__(self):
+        self.histograms = {}
+
+    def observe(self, name, ms, error=False):
+        if name not in self.histograms:
+            self.histograms[name] = LatencyHistogram()
+        self.histograms[name].observe(ms, error)
+
+    def reset(self):
+        self.histograms.clear()
+
+    def summary(self, top=10):
+        """Text table of the slowest entries by total time"""
+        if not self.histograms:
+            return "No queries recorded"
+        rows = sorted(self.histograms.items(), key=lambda item: item[1].total, reverse=True)[:top]
+        lines = [f"{'query':<40} {'n':>6} {'avg':>7} {'p50':>6} {'p95':>6} {'max':>7} {'err':>4}"]
+        for name, h in rows:
+            lines.append(
+                f"{name[:40]:<40} {h.count:>6} {h.mean:>7.1f} {h.percentile(0.5):>6.0f} "
+                f"{h.percentile(0.95):>6.0f} {h.max:>7.1f} {h.errors:>4}"
+            )
+        return "\n".join(lines)
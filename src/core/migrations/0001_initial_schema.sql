@@ -0,0 +1,57 @@
+-- Skema awal (sebelumnya dibuat oleh initialize_*_tables di setiap boot).
+-- IF NOT EXISTS agar aman dijalankan di database yang sudah punya tabel-tabel ini.
+
+CREATE TABLE IF NOT EXISTS health_logs (
+    id SERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    metric_type VARCHAR(50) NOT NULL,
+    data JSONB,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_health_logs_user_type ON health_logs(user_id, metric_type);
+
+CREATE TABLE IF NOT EXISTS rss_feeds (
+    id SERIAL PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL,
+    category VARCHAR(50),
+    added_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS rss_logs (
+    id SERIAL PRIMARY KEY,
+    feed_id INTEGER REFERENCES rss_feeds(id),
+    article_url TEXT UNIQUE NOT NULL,
+    title TEXT,
+    summary TEXT,
+    published_at TIMESTAMP WITH TIME ZONE
+);
+CREATE INDEX IF NOT EXISTS idx_rss_logs_feed ON rss_logs(feed_id);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS accounts (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    currency TEXT DEFAULT 'IDR',
+    balance NUMERIC(20,8) DEFAULT 0,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id SERIAL PRIMARY KEY,
+    account_id INTEGER REFERENCES accounts(id),
+    type TEXT NOT NULL,
+    amount NUMERIC(20,2) NOT NULL,
+    category TEXT,
+    note TEXT,
+    tx_date DATE DEFAULT CURRENT_DATE,
+    contact_id TEXT,
+    contact_name TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_account ON transactions(account_id);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(tx_date);
@@ -0,0 +1,7 @@
+-- migrate: no-transaction
+-- get_recent_health_logs: WHERE user_id, metric_type ORDER BY created_at DESC LIMIT n.
+-- CONCURRENTLY agar tabel tetap bisa ditulis selama index dibangun.
+-- Jika build gagal, index INVALID harus di-DROP manual sebelum migrasi ini dijalankan ulang.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_health_logs_user_type_created
+    ON health_logs(user_id, metric_type, created_at DESC);
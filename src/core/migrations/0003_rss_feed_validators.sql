@@ -0,0 +1,7 @@
+-- Conditional GET: validator HTTP terakhir + hash body per feed.
+-- Feed yang tidak berubah (304 / hash sama) dilewati tanpa parsing.
+
+ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS etag TEXT;
+ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS last_modified TEXT;
+ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS checked_at TIMESTAMP WITH TIME ZONE;
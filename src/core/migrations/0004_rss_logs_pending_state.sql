@@ -0,0 +1,10 @@
+-- Pipeline RSS: artikel dicatat sebagai 'pending' begitu ditemukan, lalu maju
+-- pending -> summarized -> published -> done. Setelah restart, baris yang belum 'done'
+-- dilanjutkan dari stage-nya (ringkasan yang sudah ada tidak dibuat ulang).
+-- Baris lama sudah selesai diproses, jadi default-nya 'done'.
+
+ALTER TABLE rss_logs ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'done';
+ALTER TABLE rss_logs ADD COLUMN IF NOT EXISTS source TEXT;
+ALTER TABLE rss_logs ADD COLUMN IF NOT EXISTS created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE rss_logs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+CREATE INDEX IF NOT EXISTS idx_rss_logs_unfinished ON rss_logs(created_at) WHERE status <> 'done';
@@ -0,0 +1,102 @@
+import asyncio
+import asyncpg
+import os
+import re
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+FILENAME_PATTERN = re.compile(r"^(\d+)_([\w\-]+)\.sql$")
+# Kunci advisory lock tetap ("migr"), agar replika yang boot bersamaan tidak balapan
+ADVISORY_LOCK_KEY = 0x6D696772
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+LOCK_POLL_INTERVAL = 0.5
+
+
+class Migration:
+    def __init__(self, version, name, sql):
+        self.version = version
+        self.name = name
+        self.sql = sql
+        # CREATE INDEX CONCURRENTLY tidak boleh di dalam transaksi
+        self.transactional = NO_TRANSACTION_MARKER not in sql
+
+    def statements(self):
+        """Statements one by one (a multi-statement string runs as one implicit transaction)"""
+        body = "\n".join(line for line in self.sql.splitlines() if not line.strip().startswith("--"))
+        return [stmt.strip() for stmt in re.split(r";\s*(?:\n|$)", body) if stmt.strip()]
+
+
+def load_migrations(path=MIGRATIONS_DIR):
+    migrations = []
+    for filename in os.listdir(path):
+        match = FILENAME_PATTERN.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(path, filename), encoding="utf-8") as f:
+            migrations.append(Migration(int(match.group(1)), match.group(2), f.read()))
+    migrations.sort(key=lambda m: m.version)
+
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration version in {path}")
+    return migrations
+
+
+async def current_version(conn):
+    try:
+        return await conn.fetchval("SELECT max(version) FROM schema_migrations") or 0
+    except asyncpg.UndefinedTableError:
+        return 0
+
+
+async def _apply(conn, migration):
+    record = "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)"
+    if migration.transactional:
+        async with conn.transaction():
+            await conn.execute(migration.sql)
+            await conn.execute(record, migration.version, migration.name)
+    else:
+        for statement in migration.statements():
+            await conn.execute(statement)
+        await conn.execute(record, migration.version, migration.name)
+
+
+async def _acquire_lock(conn, interval=LOCK_POLL_INTERVAL):
+    # Polling pg_try_advisory_lock, bukan pg_advisory_lock yang memblokir: replika yang menunggu
+    # tidak memegang snapshot, sehingga CREATE INDEX CONCURRENTLY milik pemegang lock tidak
+    # menunggu mereka (dan tidak berakhir deadlock)
+    while not await conn.fetchval("SELECT pg_try_advisory_lock($1)", ADVISORY_LOCK_KEY):
+        await asyncio.sleep(interval)
+
+
+async def migrate(pool, migrations=None):
+    """Apply pending migrations; returns the versions applied (one cheap query when up to date)"""
+    migrations = load_migrations() if migrations is None else migrations
+    if not migrations:
+        return []
+    latest = migrations[-1].version
+
+    async with pool.acquire() as conn:
+        if await current_version(conn) >= latest:
+            return []
+
+        await _acquire_lock(conn)
+        try:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # Baca ulang setelah dapat lock: replika lain mungkin sudah menjalankannya
+            applied = {row["version"] for row in await conn.fetch("SELECT version FROM schema_migrations")}
+            done = []
+            for migration in migrations:
+                if migration.version in applied:
+                    continue
+                await _apply(conn, migration)
+                print(f"✅ Migration {migration.version:04d}_{migration.name} applied")
+                done.append(migration.version)
+            return done
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", ADVISORY_LOCK_KEY)
@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+
+class Stage:
+    def __init__(self, name, handler, workers=1, queue_size=32, fan_out=False):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.fan_out = fan_out  # handler mengembalikan list item untuk stage berikutnya
+
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0.0       # total detik di dalam handler
+        self.max_depth = 0
+
+
+class Pipeline:
+    """Stages connected by bounded asyncio.Queues, each with its own worker count.
+
+    A handler returns the item for the next stage (a list when `fan_out`), or None to
+    drop it. Putting into a full queue blocks the upstream worker, so backpressure
+    runs back through the chain to whoever feeds the first stage.
+    """
+
+    def __init__(self, name="pipeline"):
+        self.name = name
+        self.stages = []
+        self.tasks = []
+
+    def add_stage(self, name, handler, workers=1, queue_size=32, fan_out=False):
+        self.stages.append(Stage(name, handler, workers, queue_size, fan_out))
+        return self
+
+    def start(self):
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                self.tasks.append(asyncio.create_task(self._worker(index)))
+
+    def _stage(self, name):
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    async def put(self, name, item):
+        stage = self._stage(name)
+        await stage.queue.put(item)
+        stage.max_depth = max(stage.max_depth, stage.queue.qsize())
+
+    async def _worker(self, index):
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = await stage.queue.get()
+            started = time.monotonic()
+            try:
+                try:
+                    result = await stage.handler(item)
+                finally:
+                    stage.busy += time.monotonic() - started
+                if result is not None and downstream:
+                    for out in (result if stage.fan_out else [result]):
+                        await self.put(downstream.name, out)
+            except Exception as e:
+                stage.errors += 1
+                print(f"❌ {self.name} {stage.name} Error: {e}")
+            finally:
+                stage.processed += 1
+                stage.queue.task_done()
+
+    async def join(self):
+        """Wait until every stage is drained (items only flow forward, so in order is enough)"""
+        for stage in self.stages:
+            await stage.queue.join()
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def summary(self):
+        return [
+            {"stage": s.name, "workers": s.workers, "processed": s.processed, "errors": s.errors,
+             "busy": s.busy, "max_depth": s.max_depth}
+            for s in self.stages
+        ]
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from collections import deque
+
+
+class ProviderHealth:
+    """Rolling latency / error EWMA for one provider"""
+
+    def __init__(self, alpha=0.2, window=100):
+        self.alpha = alpha
+        self.latency = None
+        self.error_rate = 0.0
+        self.samples = deque(maxlen=window)
+        self.cooldown_until = 0.0
+
+    def record(self, latency=None, error=False):
+        if error:
+            self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+            return
+        self.error_rate = (1 - self.alpha) * self.error_rate
+        self.samples.append(latency)
+        self.latency = latency if self.latency is None else self.alpha * latency + (1 - self.alpha) * self.latency
+
+    def percentile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class ProviderRouter:
+    """Pick the fastest healthy provider and optionally hedge slow requests"""
+
+    def __init__(self, error_threshold=0.5, cooldown=30.0, default_hedge_delay=3.0, min_hedge_delay=0.5):
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.health = {}
+        self.stats = {"hedged": 0, "hedge_wins": 0}
+
+    def _health(self, name):
+        if name not in self.health:
+            self.health[name] = ProviderHealth()
+        return self.health[name]
+
+    def record(self, name, latency=None, error=False):
+        health = self._health(name)
+        health.record(latency, error)
+        if error and health.error_rate >= self.error_threshold:
+            # Provider sering gagal: istirahatkan sebentar
+            health.cooldown_until = time.monotonic() + self.cooldown
+
+    def is_healthy(self, name):
+        return time.monotonic() >= self._health(name).cooldown_until
+
+    def rank(self, candidates, metric=""):
+        """Candidates ordered best-first: healthy before unhealthy, then by latency EWMA"""
+        def key(name):
+            health = self._health(f"{name}{metric}")
+            # Provider tanpa data dicoba dulu agar EWMA-nya terisi
+            latency = health.latency if health.latency is not None else 0.0
+            return (not self.is_healthy(f"{name}{metric}"), health.error_rate >= self.error_threshold, latency)
+        return sorted(candidates, key=key)
+
+    def hedge_delay(self, name):
+        p90 = self._health(name).percentile(0.9)
+        if p90 is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, p90)
+
+    async def timed(self, name, call):
+        """Run call(), feeding its latency / failure into the provider's EWMA"""
+        started = time.monotonic()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.record(name, error=True)
+            raise
+        self.record(name, latency=time.monotonic() - started)
+        return result
+
+    async def hedge(self, primary, secondary, delay, discard=None):
+        """Start primary(); if it hasn't answered after `delay`, also start secondary().
+
+        Returns the first successful result and cancels the loser. `discard(result)` is
+        called for a loser that already produced a result (e.g. to close a stream).
+        """
+        first = asyncio.ensure_future(primary())
+        tasks = [first]
+        winner = None
+
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done and not first.exception():
+                winner = first
+                return first.result()
+
+            self.stats["hedged"] += 1
+            second = asyncio.ensure_future(secondary())
+            tasks.append(second)
+            pending = {second} if done else {first, second}
+            errors = [first.exception()] if done else []
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception():
+                        errors.append(task.exception())
+                        continue
+                    if task is second:
+                        self.stats["hedge_wins"] += 1
+                    winner = task
+                    return task.result()
+            raise errors[-1]
+        finally:
+            # Exit apa pun (menang, gagal, caller dibatalkan): tidak ada task yang ditinggal jalan
+            for task in tasks:
+                if task is winner:
+                    continue
+                task.cancel()
+                task.add_done_callback(
+                    lambda t: None if t.cancelled() or t.exception() or not discard else discard(t.result())
+                )
+
+    def summary(self):
+        if not self.health:
+            return "no data"
+        parts = []
+        for name, h in sorted(self.health.items()):
+            latency = f"{h.latency:.2f}s" if h.latency is not None else "-"
+            state = "" if self.is_healthy(name) else " (cooldown)"
+            parts.append(f"{name}: {latency} err={h.error_rate:.0%}{state}")
+        return " | ".join(parts) + f" | hedged={self.stats['hedged']} won={self.stats['hedge_wins']}"
@@ -0,0 +1,243 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+# Kelas prioritas: angka kecil dilayani duluan
+PRIORITIES = {"interactive": 0, "command": 1, "background": 2}
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `capacity` burst (rate <= 0: unlimited)"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self):
+        if self.rate <= 0:
+            return True
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self):
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ProviderLane:
+    """Per-provider queue: rate budget + concurrency cap + priority ordering"""
+
+    def __init__(self, name, rpm=60, max_concurrency=4):
+        self.name = name
+        # rpm <= 0 berarti tanpa batas rate (hanya batas concurrency)
+        self.bucket = TokenBucket(rpm / 60.0, max(1, rpm / 60.0 * 5))
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._wakeup = None
+
+        self.waits = {p: deque(maxlen=200) for p in PRIORITIES}
+        self.completed = {p: 0 for p in PRIORITIES}
+        self.retries = 0
+        self.failures = 0
+
+    def configure(self, rpm=None, max_concurrency=None):
+        if rpm is not None:
+            self.bucket.rate = rpm / 60.0
+            self.bucket.capacity = max(1, rpm / 60.0 * 5)
+        if max_concurrency is not None:
+            self.max_concurrency = max_concurrency
+        self._dispatch()
+
+    @property
+    def depth(self):
+        return sum(1 for _, _, f in self._heap if not f.done())
+
+    def _dispatch(self):
+        while self._heap and self.active < self.max_concurrency:
+            _, _, waiter = self._heap[0]
+            if waiter.done():
+                heapq.heappop(self._heap)  # Waiter dibatalkan
+                continue
+            if not self.bucket.try_take():
+                # Budget habis: bangunkan dispatcher saat token berikutnya tersedia
+                if self._wakeup is None:
+                    loop = asyncio.get_running_loop()
+                    self._wakeup = loop.call_later(self.bucket.wait_time(), self._wake)
+                return
+            heapq.heappop(self._heap)
+            self.active += 1
+            waiter.set_result(None)
+
+    def _wake(self):
+        self._wakeup = None
+        self._dispatch()
+
+    async def acquire(self, priority):
+        level = PRIORITIES.get(priority, PRIORITIES["command"])
+        started = time.monotonic()
+        if not self._heap and self.active < self.max_concurrency and self.bucket.try_take():
+            self.active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._heap, (level, next(self._seq), waiter))
+            self._dispatch()
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Slot sudah diberikan tepat saat dibatalkan: kembalikan
+                if waiter.done() and not waiter.cancelled():
+                    self.release()
+                raise
+        self.waits[priority if priority in PRIORITIES else "command"].append(time.monotonic() - started)
+
+    def release(self):
+        self.active -= 1
+        self._dispatch()
+
+    def wait_stats(self, priority):
+        samples = sorted(self.waits[priority])
+        if not samples:
+            return {"count": 0, "avg": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "count": len(samples),
+            "avg": sum(samples) / len(samples),
+            "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            "max": samples[-1],
+        }
+
+
+def error_status(error):
+    """Best-effort HTTP status from OpenAI / Google API exceptions"""
+    for attr in ("status_code", "code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    text = str(error)
+    for status in RETRYABLE_STATUS:
+        if str(status) in text:
+            return status
+    return None
+
+
+class LLMScheduler:
+    """Routes provider calls through per-provider lanes with retry + jittered backoff"""
+
+    def __init__(self, max_retries=3, base_delay=1.0, max_delay=20.0):
+        self.lanes = {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def lane(self, provider):
+        if provider not in self.lanes:
+            self.lanes[provider] = ProviderLane(provider)
+        return self.lanes[provider]
+
+    def configure(self, provider, rpm=None, max_concurrency=None):
+        self.lane(provider).configure(rpm=rpm, max_concurrency=max_concurrency)
+
+    @asynccontextmanager
+    async def slot(self, provider, priority="command"):
+        lane = self.lane(provider)
+        await lane.acquire(priority)
+        try:
+            yield
+        finally:
+            lane.release()
+
+    @asynccontextmanager
+    async def stream(self, provider, open_stream, priority="interactive"):
+        """Open a streaming call with run()'s retries; the slot is held until the block exits"""
+        lane = self.lane(provider)
+        attempt = 0
+        while True:
+            try:
+                await lane.acquire(priority)
+                try:
+                    stream = await open_stream()
+                except BaseException:
+                    lane.release()
+                    raise
+                break
+            except Exception as e:
+                if error_status(e) not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    lane.failures += 1
+                    raise
+                lane.retries += 1
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+
+        try:
+            yield stream
+            lane.completed[priority if priority in PRIORITIES else "command"] += 1
+        finally:
+            # Slot baru dilepas setelah stream habis/ditutup: max_concurrency membatasi streaming juga
+            lane.release()
+
+    def _backoff(self, attempt):
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.5)
+
+    async def run(self, provider, call, priority="command"):
+        """Run `call()` under the provider's budget; retries 429/5xx without holding a slot"""
+        lane = self.lane(provider)
+        attempt = 0
+        while True:
+            try:
+                async with self.slot(provider, priority):
+                    result = await call()
+                lane.completed[priority if priority in PRIORITIES else "command"] += 1
+                return result
+            except Exception as e:
+                if error_status(e) not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    lane.failures += 1
+                    raise
+                lane.retries += 1
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+
+    def stats(self):
+        return {
+            name: {
+                "depth": lane.depth,
+                "active": lane.active,
+                "retries": lane.retries,
+                "failures": lane.failures,
+                "waits": {p: lane.wait_stats(p) for p in PRIORITIES},
+            }
+            for name, lane in self.lanes.items()
+        }
+
+    def summary(self):
+        if not self.lanes:
+            return "idle"
+        lines = []
+        for name, lane in self.lanes.items():
+            inter = lane.wait_stats("interactive")
+            bg = lane.wait_stats("background")
+            lines.append(
+                f"{name}: q={lane.depth} active={lane.active}/{lane.max_concurrency} "
+                f"p95 wait i={inter['p95']:.2f}s bg={bg['p95']:.2f}s retry={lane.retries}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,102 @@
+from redis.exceptions import WatchError
+
+
+class ShortTermMemory:
+    """Per-user chat turns in Dragonfly: a capped list plus the rolling summary.
+
+    Each step of a turn is a single MULTI/EXEC pipeline, and LTRIM keeps every list at
+    `max_turns`, so round trips and memory per message stay constant.
+    """
+
+    def __init__(self, ttl=600, max_turns=20, namespace="chat", summary_namespace="chat_summary"):
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.namespace = namespace
+        self.summary_namespace = summary_namespace
+        self.redis = None  # db.dragonfly
+
+    def configure(self, ttl=None, max_turns=None):
+        if ttl is not None:
+            self.ttl = ttl
+        if max_turns is not None:
+            self.max_turns = max_turns
+
+    def _key(self, user_id):
+        return f"{self.namespace}:{user_id}"
+
+    def _summary_key(self, user_id):
+        return f"{self.summary_namespace}:{user_id}"
+
+    @staticmethod
+    def _decode(value):
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def _append(self, pipe, user_id, entry):
+        key = self._key(user_id)
+        pipe.rpush(key, entry)
+        pipe.ltrim(key, -self.max_turns, -1)
+        pipe.expire(key, self.ttl)
+        # Summary ikut diperpanjang agar kedaluwarsa bersama history-nya
+        pipe.expire(self._summary_key(user_id), self.ttl)
+
+    async def add_and_load(self, user_id, entry):
+        """Append a turn and return (turns, summary) in one round trip"""
+        if not self.redis:
+            return [entry], ""
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            self._append(pipe, user_id, entry)
+            pipe.lrange(self._key(user_id), 0, -1)
+            pipe.get(self._summary_key(user_id))
+            results = await pipe.execute()
+            turns, summary = results[-2], results[-1]
+            return [self._decode(t) for t in turns], self._decode(summary) or ""
+        except Exception as e:
+            print(f"⚠️ Short-term Memory Error: {e}")
+            return [entry], ""
+
+    async def add(self, user_id, entry):
+        if not self.redis:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            self._append(pipe, user_id, entry)
+            await pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Short-term Memory Error: {e}")
+
+    @staticmethod
+    def _folded_prefix(head, turns):
+        """How many of `turns` (a snapshot's oldest turns) are still at the head of the list"""
+        for k in range(min(len(head), len(turns)), 0, -1):
+            if head[:k] == turns[-k:]:
+                return k
+        return 0
+
+    async def drop_folded(self, user_id, turns):
+        """Remove turns that were folded into the summary, matched against the list's current head.
+
+        The list may have moved since the snapshot (new turns pushed, LTRIM cap dropping the
+        oldest), so trimming by count could delete a turn that was never folded.
+        """
+        if not self.redis or not turns:
+            return 0
+        key = self._key(user_id)
+        try:
+            for _ in range(3):
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    try:
+                        await pipe.watch(key)
+                        head = [self._decode(t) for t in await pipe.lrange(key, 0, len(turns) - 1)]
+                        count = self._folded_prefix(head, list(turns))
+                        if not count:
+                            return 0
+                        pipe.multi()
+                        pipe.ltrim(key, count, -1)
+                        await pipe.execute()
+                        return count
+                    except WatchError:
+                        continue  # list berubah di antara baca & trim: ulangi
+        except Exception as e:
+            print(f"⚠️ Short-term Memory Error: {e}")
+        return 0
@@ -0,0 +1,141 @@
+from qdrant_client.models import (
+    VectorParams, VectorParamsDiff, Distance, HnswConfigDiff, SearchParams,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    BinaryQuantization, BinaryQuantizationConfig, QuantizationSearchParams
+)
+import os
+
+# Preset profil penyimpanan vektor. Pilih lewat QDRANT_PROFILE, override per-field lewat env.
+# Jalankan benchmarks/qdrant_profiles.py untuk membandingkan recall vs latency di mesin sendiri.
+PROFILES = {
+    # Default Qdrant: float32 di RAM
+    "default": {},
+    # int8 di RAM + rescoring dari vektor asli: ~4x lebih hemat RAM
+    "balanced": {
+        "quantization": "scalar", "m": 16, "ef_construct": 100,
+        "search_ef": 64, "rescore": True, "oversampling": 2.0,
+    },
+    # Vektor asli & payload di disk, hanya int8 di RAM
+    "low_ram": {
+        "quantization": "scalar", "on_disk": True, "on_disk_payload": True,
+        "m": 16, "ef_construct": 100, "search_ef": 96, "rescore": True, "oversampling": 2.0,
+    },
+    # 1-bit per dimensi: paling hemat, butuh oversampling lebih besar
+    "binary": {
+        "quantization": "binary", "on_disk": True, "on_disk_payload": True,
+        "search_ef": 128, "rescore": True, "oversampling": 3.0,
+    },
+}
+
+ENV_OVERRIDES = {
+    "quantization": ("QDRANT_QUANTIZATION", str),
+    "m": ("QDRANT_HNSW_M", int),
+    "ef_construct": ("QDRANT_HNSW_EF_CONSTRUCT", int),
+    "search_ef": ("QDRANT_SEARCH_EF", int),
+    "on_disk": ("QDRANT_ON_DISK", "bool"),
+    "on_disk_payload": ("QDRANT_ON_DISK_PAYLOAD", "bool"),
+    "rescore": ("QDRANT_RESCORE", "bool"),
+    "oversampling": ("QDRANT_OVERSAMPLING", float),
+}
+
+
+class StorageProfile:
+    """Vector storage settings for a Qdrant collection (quantization, HNSW, on-disk)"""
+
+    def __init__(self, name="default", quantization=None, m=None, ef_construct=None, search_ef=None,
+                 on_disk=None, on_disk_payload=None, rescore=None, oversampling=None):
+        self.name = name
+        self.quantization = quantization if quantization not in ("", "none") else None
+        self.m = m
+        self.ef_construct = ef_construct
+        self.search_ef = search_ef
+        self.on_disk = on_disk
+        self.on_disk_payload = on_disk_payload
+        self.rescore = rescore
+        self.oversampling = oversampling
+
+    @classmethod
+    def from_name(cls, name):
+        if name not in PROFILES:
+            raise ValueError(f"Unknown storage profile '{name}' (choose from {', '.join(PROFILES)})")
+        return cls(name=name, **PROFILES[name])
+
+    @classmethod
+    def from_env(cls):
+        name = os.getenv("QDRANT_PROFILE", "default")
+        options = dict(PROFILES.get(name, {}))
+        if name not in PROFILES:
+            print(f"⚠️ Unknown QDRANT_PROFILE '{name}', using default")
+            name = "default"
+
+        for field, (env, kind) in ENV_OVERRIDES.items():
+            raw = os.getenv(env)
+            if raw is None or raw == "":
+                continue
+            if kind == "bool":
+                options[field] = raw.lower() in ["1", "true", "on", "yes"]
+            else:
+                options[field] = kind(raw)
+        return cls(name=name, **options)
+
+    def vectors_config(self, size):
+        return VectorParams(size=size, distance=Distance.COSINE, on_disk=self.on_disk)
+
+    def hnsw_config(self):
+        if self.m is None and self.ef_construct is None and self.on_disk is None:
+            return None
+        return HnswConfigDiff(m=self.m, ef_construct=self.ef_construct, on_disk=self.on_disk)
+
+    def quantization_config(self):
+        if self.quantization == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        if self.quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    def collection_kwargs(self, size):
+        """Arguments for client.create_collection"""
+        kwargs = {"vectors_config": self.vectors_config(size)}
+        if self.hnsw_config():
+            kwargs["hnsw_config"] = self.hnsw_config()
+        if self.quantization_config():
+            kwargs["quantization_config"] = self.quantization_config()
+        if self.on_disk_payload is not None:
+            kwargs["on_disk_payload"] = self.on_disk_payload
+        return kwargs
+
+    def update_kwargs(self):
+        """Arguments for client.update_collection (apply profile to an existing collection)"""
+        kwargs = {}
+        if self.on_disk is not None:
+            kwargs["vectors_config"] = {"": VectorParamsDiff(on_disk=self.on_disk)}
+        if self.hnsw_config():
+            kwargs["hnsw_config"] = self.hnsw_config()
+        if self.quantization_config():
+            kwargs["quantization_config"] = self.quantization_config()
+        return kwargs
+
+    def search_params(self):
+        """SearchParams for queries, or None to keep Qdrant defaults"""
+        quantization = None
+        if self.quantization and (self.rescore is not None or self.oversampling is not None):
+            quantization = QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+        if self.search_ef is None and quantization is None:
+            return None
+        return SearchParams(hnsw_ef=self.search_ef, quantization=quantization)
+
+    def describe(self):
+        parts = [self.name]
+        if self.quantization:
+            parts.append(f"{self.quantization} quantization")
+        if self.m or self.ef_construct:
+            parts.append(f"m={self.m} ef_construct={self.ef_construct}")
+        if self.search_ef:
+            parts.append(f"ef={self.search_ef}")
+        if self.on_disk:
+            parts.append("vectors on disk")
+        if self.on_disk_payload:
+            parts.append("payload on disk")
+        return ", ".join(parts)
@@ -0,0 +1,82 @@
+import time
+
+DISCORD_MESSAGE_LIMIT = 2000
+
+
+class DiscordStreamSink:
+    """Render a token stream into Discord by progressively editing the reply.
+
+    Edits are throttled (Discord allows ~5 edits / 5s per channel) and the interval
+    backs off when an edit is slow, which is how discord.py surfaces a 429 wait.
+    When the text passes the 2000-char limit the current message is finalized and
+    a new one is started.
+    """
+
+    def __init__(self, channel, min_interval=1.0, max_interval=5.0, limit=DISCORD_MESSAGE_LIMIT):
+        self.channel = channel
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.limit = limit
+
+        self.message = None      # Pesan Discord yang sedang di-edit
+        self.buffer = ""         # Isi pesan yang sedang aktif
+        self.rendered = ""       # Isi terakhir yang sudah tampil di Discord
+        self.parts = []          # Pesan yang sudah final (untuk teks lengkap)
+        self.last_flush = 0.0
+
+    @property
+    def text(self):
+        return "".join(self.parts) + self.buffer
+
+    def _split_point(self):
+        # Potong di baris/spasi terakhir agar kata tidak terbelah
+        window = self.buffer[:self.limit]
+        for sep in ("\n", " "):
+            idx = window.rfind(sep)
+            if idx >= self.limit // 2:
+                return idx + 1
+        return self.limit
+
+    async def _render(self, content):
+        started = time.monotonic()
+        if self.message is None:
+            self.message = await self.channel.send(content)
+        elif content != self.rendered:
+            await self.message.edit(content=content)
+        self.rendered = content
+
+        # Adaptive cadence: edit yang lambat berarti kita sedang di-rate-limit
+        elapsed = time.monotonic() - started
+        if elapsed > self.interval:
+            self.interval = min(self.max_interval, elapsed * 2)
+        else:
+            self.interval = max(self.min_interval, self.interval * 0.9)
+        self.last_flush = time.monotonic()
+
+    async def write(self, chunk):
+        if not chunk:
+            return
+        self.buffer += chunk
+
+        # Rollover ke pesan baru di batas 2000 karakter
+        while len(self.buffer) > self.limit:
+            cut = self._split_point()
+            head, self.buffer = self.buffer[:cut], self.buffer[cut:]
+            await self._render(head)
+            self.parts.append(head)
+            self.message = None
+            self.rendered = ""
+
+        # Pesan pertama dikirim segera (time-to-first-token), sisanya di-throttle
+        if self.buffer.strip() and (self.message is None or time.monotonic() - self.last_flush >= self.interval):
+            await self._render(self.buffer)
+
+    async def close(self, fallback="..."):
+        """Flush remaining text and return the full streamed response"""
+        if self.buffer.strip():
+            await self._render(self.buffer)
+        elif not self.parts and self.message is None:
+            await self._render(fallback)
+            self.buffer = fallback
+        return self.text
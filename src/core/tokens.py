@@ -0,0 +1,51 @@
+import math
+
+# Perkiraan kasar: ~4 karakter per token untuk teks Latin (cukup untuk budgeting, bukan billing)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Cheap token estimate without a tokenizer dependency"""
+    if not text:
+        return 0
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def trim_to_tokens(text, max_tokens):
+    """Cut text to roughly `max_tokens`, at a word boundary when one is close"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max(0, max_tokens * CHARS_PER_TOKEN - 1)
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    if space > limit * 0.8:
+        cut = cut[:space]
+    return cut.rstrip() + "…"
+
+
+def pack_batches(texts, max_items, max_tokens, max_item_tokens=None):
+    """Group texts into batches of indices bounded by item count and total tokens.
+
+    Items larger than `max_item_tokens` only count up to that cap toward the batch
+    budget; providers reject oversized inputs, so callers must trim_to_tokens() them first.
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if max_item_tokens:
+            tokens = min(tokens, max_item_tokens)
+
+        if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+
+        current.append(index)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
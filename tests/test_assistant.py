@@ -0,0 +1,159 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import sys
+
+class MockCog:
+    @staticmethod
+    def listener(*args, **kwargs):
+        return lambda f: f
+
+mock_commands = MagicMock()
+mock_commands.Cog = MockCog
+mock_ext = MagicMock()
+mock_ext.commands = mock_commands
+
+mock_discord = MagicMock()
+mock_discord.DMChannel = type("DMChannel", (), {})
+# patch.dict: mock hanya berlaku saat import, agar test file lain tetap memakai modul asli
+with patch.dict(sys.modules, {
+    'discord': mock_discord,
+    'discord.ext': mock_ext,
+    'discord.ext.commands': mock_commands,
+    'src.core.memory': MagicMock(),
+    'src.core.brain': MagicMock(),
+}):
+    from src.cogs import assistant as assistant_module
+    from src.cogs.assistant import Assistant
+
+from src.core.context import ContextBuilder
+
+class TestAssistantPipeline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.bot = MagicMock()
+        self.cog = Assistant(self.bot)
+
+        self.message = MagicMock()
+        self.message.content = "what did I note about BTC?"
+        self.message.author.id = 42
+        self.message.mentions = [self.bot.user]
+        self.message.channel.typing.return_value.__aenter__ = AsyncMock()
+        self.message.channel.typing.return_value.__aexit__ = AsyncMock(return_value=False)
+
+        self.brain = assistant_module.brain
+        self.brain.short_term.add_and_load = AsyncMock(return_value=(["User: hi"], ""))
+        self.brain.short_term.add = AsyncMock()
+        self.brain.context.build = MagicMock(return_value=MagicMock(text="ctx", overflow=[], fold_due=False))
+
+        async def stream(**kwargs):
+            yield "answer"
+        self.brain.think_stream = stream
+
+        sink_patcher = patch.object(assistant_module, "DiscordStreamSink")
+        sink = sink_patcher.start().return_value
+        self.addCleanup(sink_patcher.stop)
+        sink.write = AsyncMock()
+        sink.close = AsyncMock(return_value="answer")
+
+    async def test_slow_recall_does_not_block_reply(self):
+        async def slow_embed(text):
+            await asyncio.sleep(5)
+            return [0.1]
+        self.brain.embed_content = slow_embed
+
+        with patch.object(assistant_module, "RECALL_TIMEOUT", 0.05):
+            await asyncio.wait_for(self.cog.on_message(self.message), 1)
+
+        history, hits, summary = self.brain.context.build.call_args.args
+        self.assertEqual(history, ["User: hi"])
+        self.assertEqual(hits, [])
+
+    async def test_history_and_recall_run_concurrently(self):
+        started = []
+
+        async def load(user_id, entry):
+            started.append("history")
+            await asyncio.sleep(0.05)
+            return ["User: hi"], ""
+
+        async def embed(text):
+            started.append("recall")
+            await asyncio.sleep(0.05)
+            return [0.1]
+
+        self.brain.short_term.add_and_load = load
+        self.brain.embed_content = embed
+        assistant_module.memory.recall = AsyncMock(return_value=["hit"])
+
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        await self.cog.on_message(self.message)
+
+        self.assertLess(loop.time() - t0, 0.09)
+        self.assertEqual(sorted(started), ["history", "recall"])
+        self.assertEqual(self.brain.context.build.call_args.args[1], ["hit"])
+        kwargs = assistant_module.memory.recall.call_args.kwargs
+        self.assertEqual(kwargs["user_id"], ["42", "system_rss"])
+        self.assertNotIn("include_unowned", kwargs)
+
+    async def test_bot_turn_saved_off_the_reply_path(self):
+        self.brain.embed_content = AsyncMock(return_value=None)
+        await self.cog.on_message(self.message)
+
+        await self.cog.cog_unload()
+        self.brain.short_term.add.assert_awaited_once_with("42", "Assistant: answer")
+
+    async def test_overlapping_folds_for_same_user_run_once(self):
+        gate = asyncio.Event()
+
+        async def fold(user_id, summary, turns):
+            await gate.wait()
+            return "new summary"
+
+        self.brain.short_term.add = AsyncMock()
+        self.brain.short_term.drop_folded = AsyncMock(return_value=2)
+        self.brain.context.fold = AsyncMock(side_effect=fold)
+        overflow = ["User: a", "Assistant: b"]
+
+        first = asyncio.create_task(self.cog._after_reply("42", "x", "", overflow))
+        await asyncio.sleep(0)
+        await self.cog._after_reply("42", "y", "", overflow)
+        gate.set()
+        await first
+
+        self.brain.context.fold.assert_awaited_once()
+        self.brain.short_term.drop_folded.assert_awaited_once_with("42", overflow)
+
+    async def test_folds_are_batched_across_messages(self):
+        builder = ContextBuilder(keep_turns=6)
+        builder.think = AsyncMock(return_value="summary")
+        turns = []
+
+        async def add_and_load(user_id, entry):
+            turns.append(entry)
+            return list(turns), ""
+
+        async def add(user_id, entry):
+            turns.append(entry)
+
+        async def drop_folded(user_id, folded):
+            del turns[:len(folded)]
+            return len(folded)
+
+        self.brain.short_term.add_and_load = add_and_load
+        self.brain.short_term.add = add
+        self.brain.short_term.drop_folded = drop_folded
+        self.brain.context_budget = MagicMock(return_value=4000)
+        self.brain.embed_content = AsyncMock(return_value=None)
+
+        with patch.object(self.brain, "context", builder):
+            for _ in range(10):
+                await self.cog.on_message(self.message)
+                await self.cog.cog_unload()
+
+        # Lipat di pesan ke-7 (7 turn) dan ke-10 (6 turn), bukan hampir tiap pesan
+        self.assertEqual(builder.think.await_count, 2)
+        self.assertLessEqual(len(turns), 2 * builder.keep_turns)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+import unittest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from types import SimpleNamespace
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+mock_google = MagicMock()
+mock_redis_exceptions = MagicMock()
+mock_redis_exceptions.WatchError = type("WatchError", (Exception,), {})
+
+# patch.dict: mock hanya berlaku saat import, agar test file lain tetap memakai modul asli
+with patch.dict(sys.modules, {
+    'google': mock_google,
+    'google.generativeai': mock_google.generativeai,
+    'openai': MagicMock(),
+    'dotenv': MagicMock(),
+    'redis': MagicMock(),
+    'redis.exceptions': mock_redis_exceptions,
+    'src.core.database': MagicMock(),
+    'src.core.memory': MagicMock(),
+}):
+    from src.core.brain import BrainManager, EMBED_BATCH_LIMITS, EMBED_TRIM_MARGIN
+
+from src.core.tokens import estimate_tokens
+
+class FakeEmbeddings:
+    """OpenAI-style embeddings.create: one vector per input, 400 for inputs containing BAD"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, input, model):
+        self.calls.append(list(input))
+        if any("BAD" in text for text in input):
+            raise ValueError("400 invalid input")
+        # Urutan data sengaja dibalik: brain harus mengurutkan lewat index
+        data = [SimpleNamespace(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+class TestEmbedMany(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.brain = BrainManager()
+        self.brain.config = {"embed_provider": "openai"}
+        self.embeddings = FakeEmbeddings()
+        self.brain.qwen = MagicMock()
+        self.brain.qwen.embeddings.create = self.embeddings.create
+
+    def sent(self):
+        return [text for call in self.embeddings.calls for text in call]
+
+    async def test_order_is_kept_across_cache_hits_and_misses(self):
+        provider, model = self.brain._embed_target()
+        key = self.brain.embed_cache.make_key(provider, model, "retrieval_document", "bb")
+        await self.brain.embed_cache.set(key, [99.0])
+
+        vectors, errors = await self.brain.embed_many(["a", "bb", "ccc"])
+
+        self.assertEqual(vectors, [[1.0], [99.0], [3.0]])
+        self.assertEqual(errors, {})
+        self.assertEqual(self.sent(), ["a", "ccc"])
+
+    async def test_bad_input_is_isolated(self):
+        vectors, errors = await self.brain.embed_many(["a", "BAD", "ccc", "dddd"])
+
+        self.assertEqual(vectors, [[1.0], None, [3.0], [4.0]])
+        self.assertEqual(list(errors), [1])
+        self.assertIn("400", errors[1])
+
+    async def test_duplicates_are_embedded_once(self):
+        vectors, errors = await self.brain.embed_many(["same", "other", "same"])
+
+        self.assertEqual(vectors, [[4.0], [5.0], [4.0]])
+        self.assertEqual(self.sent(), ["same", "other"])
+
+    async def test_oversized_input_is_truncated(self):
+        vectors, errors = await self.brain.embed_many(["word " * 20000])
+
+        self.assertEqual(errors, {})
+        cap = EMBED_BATCH_LIMITS["openai"]["max_item_tokens"]
+        self.assertLessEqual(estimate_tokens(self.sent()[0]), int(cap * EMBED_TRIM_MARGIN))
+
+    async def test_no_provider(self):
+        self.brain.qwen = None
+        self.brain.gemini = None
+        vectors, errors = await self.brain.embed_many(["a"])
+
+        self.assertEqual(vectors, [None])
+        self.assertIn("No embedding provider", errors[0])
+
+class TestThinkCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.brain = BrainManager()
+        self.brain.config = {"ai_provider": "gemini"}
+        self.brain._think = AsyncMock(return_value="answer")
+
+    async def test_exact_hit_skips_provider(self):
+        first = await self.brain.think(prompt="Hello  there", cache=True)
+        second = await self.brain.think(prompt="hello there", cache=True)
+
+        self.assertEqual((first, second), ("answer", "answer"))
+        self.brain._think.assert_awaited_once()
+        self.assertEqual(self.brain.response_cache.stats["exact_hits"], 1)
+
+    async def test_error_responses_are_not_cached(self):
+        self.brain._think.return_value = "❌ Brain Error: 503"
+
+        await self.brain.think(prompt="hi", cache=True)
+        await self.brain.think(prompt="hi", cache=True)
+
+        self.assertEqual(self.brain._think.await_count, 2)
+
+    async def test_cache_false_bypasses_cache(self):
+        await self.brain.think(prompt="hi", cache=True)
+        await self.brain.think(prompt="hi", cache=False)
+
+        self.assertEqual(self.brain._think.await_count, 2)
+        self.assertEqual(self.brain.response_cache.stats["bypass"], 1)
+
+    async def test_cache_follows_setting_by_default(self):
+        await self.brain.think(prompt="hi")
+        await self.brain.think(prompt="hi")
+        self.assertEqual(self.brain._think.await_count, 2)
+
+        self.brain.config["response_cache"] = "on"
+        await self.brain.think(prompt="hi")
+        await self.brain.think(prompt="hi")
+        self.assertEqual(self.brain._think.await_count, 3)
+
+    async def test_semantic_hit_is_promoted_to_exact(self):
+        self.brain.embed_content = AsyncMock(return_value=[0.1, 0.2])
+        self.brain.response_cache.get_similar = AsyncMock(return_value="similar answer")
+
+        first = await self.brain.think(prompt="hi", cache=True, semantic=True)
+        second = await self.brain.think(prompt="hi", cache=True, semantic=True)
+
+        self.assertEqual((first, second), ("similar answer", "similar answer"))
+        self.brain._think.assert_not_awaited()
+        self.brain.embed_content.assert_awaited_once()
+
+    async def test_images_are_never_cached(self):
+        await self.brain.think(prompt="hi", images=["img"], cache=True)
+        await self.brain.think(prompt="hi", images=["img"], cache=True)
+        self.assertEqual(self.brain._think.await_count, 2)
+
+class TestAutoRouting(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.brain = BrainManager()
+        self.brain.config = {"ai_provider": "auto"}
+        self.brain.gemini = MagicMock()
+        self.brain.qwen = MagicMock()
+        self.calls = []
+        self.behaviour = {}
+
+        async def complete(provider, text_prompt, images=None, priority="command"):
+            self.calls.append(provider)
+            return await self.behaviour[provider]()
+        self.brain._complete = complete
+
+    async def test_failover_to_next_provider(self):
+        async def down():
+            raise RuntimeError("503 unavailable")
+
+        async def ok():
+            return "from openai"
+
+        self.behaviour = {"gemini": down, "openai": ok}
+        result = await self.brain.think(prompt="hi", model="auto")
+
+        self.assertEqual(result, "from openai")
+        self.assertEqual(self.calls, ["gemini", "openai"])
+        self.assertGreater(self.brain.router.health["gemini"].error_rate, 0)
+
+    async def test_all_providers_failing_returns_error_text(self):
+        async def down():
+            raise RuntimeError("503 unavailable")
+
+        self.behaviour = {"gemini": down, "openai": down}
+        result = await self.brain.think(prompt="hi", model="auto")
+
+        self.assertTrue(result.startswith("❌ Brain Error"))
+
+    async def test_no_provider_configured(self):
+        self.brain.gemini = None
+        self.brain.qwen = None
+        self.assertEqual(await self.brain.think(prompt="hi", model="auto"), "❌ No AI Brain configured.")
+
+    async def test_slow_primary_is_hedged_for_interactive(self):
+        async def slow():
+            await asyncio.sleep(10)
+            return "from gemini"
+
+        async def fast():
+            return "from openai"
+
+        self.behaviour = {"gemini": slow, "openai": fast}
+        self.brain.config["ai_hedge"] = "on"
+        self.brain.router.default_hedge_delay = 0.01
+
+        result = await asyncio.wait_for(self.brain.think(prompt="hi", model="auto", priority="interactive"), 1)
+
+        self.assertEqual(result, "from openai")
+        self.assertEqual(self.brain.router.stats["hedged"], 1)
+        self.assertEqual(self.brain.router.stats["hedge_wins"], 1)
+
+    async def test_no_hedge_outside_interactive(self):
+        async def slowish():
+            await asyncio.sleep(0.05)
+            return "from gemini"
+
+        self.behaviour = {"gemini": slowish, "openai": slowish}
+        self.brain.config["ai_hedge"] = "on"
+        self.brain.router.default_hedge_delay = 0.01
+
+        result = await self.brain.think(prompt="hi", model="auto", priority="command")
+
+        self.assertEqual(result, "from gemini")
+        self.assertEqual(self.calls, ["gemini"])
+        self.assertEqual(self.brain.router.stats["hedged"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.cache import EmbeddingCache, ResponseCache
+
+class TestEmbeddingCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache = EmbeddingCache(max_items=2)
+
+    def test_key_depends_on_all_parts(self):
+        base = EmbeddingCache.make_key("gemini", "m", "retrieval_query", "hello")
+        self.assertEqual(base, EmbeddingCache.make_key("gemini", "m", "retrieval_query", "hello"))
+        self.assertNotEqual(base, EmbeddingCache.make_key("openai", "m", "retrieval_query", "hello"))
+        self.assertNotEqual(base, EmbeddingCache.make_key("gemini", "m2", "retrieval_query", "hello"))
+        self.assertNotEqual(base, EmbeddingCache.make_key("gemini", "m", "retrieval_document", "hello"))
+        self.assertNotEqual(base, EmbeddingCache.make_key("gemini", "m", "retrieval_query", "hello!"))
+
+    async def test_hit_after_miss(self):
+        compute = AsyncMock(return_value=[0.5, 0.25])
+
+        first = await self.cache.get_or_compute("k", compute)
+        second = await self.cache.get_or_compute("k", compute)
+
+        self.assertEqual(first, [0.5, 0.25])
+        self.assertEqual(second, [0.5, 0.25])
+        compute.assert_called_once()
+        self.assertEqual(self.cache.stats["misses"], 1)
+        self.assertEqual(self.cache.stats["memory_hits"], 1)
+
+    async def test_lru_eviction(self):
+        for key in ["a", "b", "c"]:
+            await self.cache.set(key, [1.0])
+
+        self.assertIsNone(await self.cache.get("a"))
+        self.assertEqual(await self.cache.get("c"), [1.0])
+
+    async def test_none_is_not_cached(self):
+        compute = AsyncMock(return_value=None)
+
+        await self.cache.get_or_compute("k", compute)
+        await self.cache.get_or_compute("k", compute)
+
+        self.assertEqual(compute.call_count, 2)
+
+    async def test_concurrent_requests_share_inflight_call(self):
+        gate = asyncio.Event()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await gate.wait()
+            return [1.0, 2.0]
+
+        tasks = [asyncio.create_task(self.cache.get_or_compute("k", compute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*tasks)
+
+        self.assertEqual(calls, 1)
+        self.assertTrue(all(r == [1.0, 2.0] for r in results))
+        self.assertEqual(self.cache.stats["shared"], 4)
+
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        gate = asyncio.Event()
+
+        async def compute():
+            await gate.wait()
+            return [3.0]
+
+        leader = asyncio.create_task(asyncio.wait_for(self.cache.get_or_compute("k", compute), 0.01))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(self.cache.get_or_compute("k", compute))
+        with self.assertRaises(asyncio.TimeoutError):
+            await leader
+
+        gate.set()
+        self.assertEqual(await follower, [3.0])
+        self.assertEqual(await self.cache.get("k"), [3.0])
+        self.assertEqual(self.cache._inflight, {})
+
+    async def test_compute_error_reaches_every_caller(self):
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("quota")
+
+        results = await asyncio.gather(
+            *[self.cache.get_or_compute("k", compute) for _ in range(3)], return_exceptions=True
+        )
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertEqual(self.cache._inflight, {})
+
+    async def test_remote_hit_promotes_to_lru(self):
+        self.cache.redis = MagicMock()
+        self.cache.redis.get = AsyncMock(return_value=EmbeddingCache._pack([0.5, 1.5]))
+
+        vector = await self.cache.get("k")
+
+        self.assertEqual(vector, [0.5, 1.5])
+        self.assertEqual(self.cache.stats["remote_hits"], 1)
+        self.cache.redis.get.assert_called_once_with("emb:k")
+
+        # Second lookup must be served from LRU
+        await self.cache.get("k")
+        self.assertEqual(self.cache.stats["memory_hits"], 1)
+
+    async def test_remote_eviction_when_over_capacity(self):
+        self.cache.remote_max = 10
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=[True, 1, 12])
+        self.cache.redis = MagicMock()
+        self.cache.redis.pipeline.return_value = pipe
+        self.cache.redis.zpopmin = AsyncMock(return_value=[(b"emb:old1", 1.0), (b"emb:old2", 2.0)])
+        self.cache.redis.delete = AsyncMock()
+
+        await self.cache.set("k", [1.0])
+
+        pipe.set.assert_called_once()
+        self.cache.redis.zpopmin.assert_called_once_with("emb:index", 2)
+        self.cache.redis.delete.assert_called_once_with(b"emb:old1", b"emb:old2")
+        self.assertEqual(self.cache.stats["evictions"], 2)
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache = ResponseCache(ttl=60)
+
+    def test_key_is_normalized(self):
+        a = ResponseCache.make_key("gemini", "  Hello   World ", "ctx")
+        b = ResponseCache.make_key("gemini", "hello world", "ctx")
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, ResponseCache.make_key("gemini", "hello world", "other ctx"))
+        self.assertNotEqual(a, ResponseCache.make_key("openai:qwen", "hello world", "ctx"))
+
+    async def test_local_exact_hit(self):
+        await self.cache.set("k", "answer")
+
+        self.assertEqual(await self.cache.get("k"), "answer")
+        self.assertEqual(self.cache.stats["exact_hits"], 1)
+
+    async def test_local_entry_expires(self):
+        self.cache.ttl = -1
+        await self.cache.set("k", "answer")
+
+        self.assertIsNone(await self.cache.get("k"))
+
+    async def test_redis_tier(self):
+        self.cache.redis = MagicMock()
+        self.cache.redis.get = AsyncMock(return_value=b"cached")
+        self.cache.redis.set = AsyncMock()
+
+        await self.cache.set("k", "cached")
+        self.cache.redis.set.assert_called_once_with("resp:k", "cached", ex=60)
+        self.assertEqual(await self.cache.get("k"), "cached")
+
+    async def test_semantic_lookup_without_qdrant(self):
+        self.assertIsNone(await self.cache.get_similar([0.1, 0.2], "scope"))
+
+    async def test_expired_semantic_entries_are_pruned_periodically(self):
+        self.cache.qdrant = MagicMock()
+        self.cache.qdrant.upsert = AsyncMock()
+        self.cache.qdrant.delete = AsyncMock()
+        self.cache._collection_ready = True
+        key = ResponseCache.make_key("gemini", "hi")
+
+        await self.cache.set_similar([0.1, 0.2], "scope", key, "answer")
+        await self.cache.set_similar([0.1, 0.2], "scope", key, "answer")
+
+        self.cache.qdrant.delete.assert_awaited_once()
+        self.assertEqual(self.cache.qdrant.delete.call_args.kwargs["collection_name"], "response_cache")
+        self.assertEqual(self.cache.stats["prunes"], 1)
+
+        self.cache._last_prune -= self.cache.prune_interval
+        await self.cache.set_similar([0.1, 0.2], "scope", key, "answer")
+        self.assertEqual(self.cache.qdrant.delete.await_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
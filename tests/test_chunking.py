@@ -0,0 +1,57 @@
+import unittest
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.chunking import chunk_text, split_sections
+from src.core.tokens import estimate_tokens
+
+class TestChunking(unittest.TestCase):
+    def test_empty_text(self):
+        self.assertEqual(chunk_text(""), [])
+        self.assertEqual(chunk_text("   \n "), [])
+
+    def test_small_text_is_single_chunk(self):
+        chunks = chunk_text("hello world")
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0]["text"], "hello world")
+
+    def test_markdown_heading_path(self):
+        text = "# Setup\nintro\n## Docker\nrun it\n# Usage\nuse it"
+        sections = split_sections(text, "README.md")
+        self.assertEqual([s for s, _ in sections], ["Setup", "Setup > Docker", "Usage"])
+
+    def test_python_defs_keep_decorators(self):
+        text = "import os\n\n@cache\ndef a():\n    return 1\n\nclass B:\n    def c(self):\n        pass\n"
+        sections = split_sections(text, "mod.py")
+        self.assertEqual([s for s, _ in sections], ["module", "a", "B"])
+        self.assertTrue(sections[1][1].startswith("@cache"))
+
+    def test_json_top_level_keys(self):
+        text = json.dumps({"a": 1, "b": [1, 2]})
+        sections = split_sections(text, "data.json")
+        self.assertEqual([s for s, _ in sections], ["a", "b"])
+
+    def test_invalid_json_falls_back_to_plain(self):
+        sections = split_sections("not json\n\nsecond", "data.json")
+        self.assertEqual(len(sections), 2)
+
+    def test_large_text_respects_budget_with_overlap(self):
+        text = "\n".join(f"line number {i} with some words in it" for i in range(500))
+        chunks = chunk_text(text, max_tokens=100, overlap_tokens=10)
+
+        self.assertGreater(len(chunks), 10)
+        for chunk in chunks:
+            self.assertLessEqual(estimate_tokens(chunk["text"]), 100 + 10)
+        # Overlap: awal chunk berikutnya mengulang ekor chunk sebelumnya
+        self.assertIn(chunks[1]["text"][:20], chunks[0]["text"])
+
+    def test_small_sections_are_packed(self):
+        text = "\n\n".join(f"paragraph {i}" for i in range(20))
+        chunks = chunk_text(text, max_tokens=512)
+        self.assertEqual(len(chunks), 1)
+
+if __name__ == '__main__':
+    unittest.main()
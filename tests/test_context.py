@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import AsyncMock
+from types import SimpleNamespace
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.context import ContextBuilder
+from src.core.tokens import estimate_tokens
+
+def hit(score, **payload):
+    return SimpleNamespace(score=score, payload=payload)
+
+class TestContextBuilder(unittest.TestCase):
+    def test_fits_budget_with_huge_memory(self):
+        builder = ContextBuilder()
+        hits = [hit(0.9, content="x " * 2_500_000), hit(0.8, title="BTC", summary="up 5%")]
+        built = builder.build(["User: hi", "Assistant: hello", "User: what's new?"], hits, budget=1000)
+
+        self.assertLessEqual(built.usage["total"], 1000)
+        self.assertIn("User: what's new?", built.text)
+        self.assertIn("BTC - up 5%", built.text)
+        self.assertLessEqual(estimate_tokens(built.text), 1100)
+
+    def test_old_turns_overflow_in_order(self):
+        builder = ContextBuilder(keep_turns=2)
+        turns = ["User: 1", "Assistant: 2", "User: 3", "Assistant: 4", "User: 5"]
+        built = builder.build(turns)
+
+        self.assertEqual(built.overflow, ["User: 1", "Assistant: 2", "User: 3"])
+        self.assertIn("Assistant: 4\nUser: 5", built.text)
+
+    def test_fold_is_due_once_overflow_fills_a_batch(self):
+        builder = ContextBuilder(keep_turns=2, fold_batch=3)
+        turns = ["User: 1", "Assistant: 2", "User: 3", "Assistant: 4", "User: 5"]
+
+        self.assertTrue(builder.build(turns).fold_due)
+        self.assertFalse(builder.build(turns[1:]).fold_due)
+        self.assertFalse(builder.build(turns[3:]).fold_due)
+
+    def test_fold_is_due_when_overflow_outgrows_history_budget(self):
+        builder = ContextBuilder(keep_turns=6)
+        built = builder.build(["User: " + "word " * 400, "Assistant: ok"], budget=200)
+
+        self.assertEqual(len(built.overflow), 1)
+        self.assertTrue(built.fold_due)
+
+    def test_newest_turn_is_trimmed_not_dropped(self):
+        builder = ContextBuilder()
+        built = builder.build(["Assistant: old", "User: " + "word " * 5000], budget=200)
+        self.assertEqual(built.overflow, ["Assistant: old"])
+        self.assertLessEqual(built.usage["history"], 200)
+
+    def test_duplicate_hits_are_dropped(self):
+        builder = ContextBuilder()
+        built = builder.build(["User: hi"], [hit(0.9, content="Same  note"), hit(0.8, content="same note")])
+        self.assertEqual(built.text.count("- "), 1)
+
+class TestRollingSummary(unittest.IsolatedAsyncioTestCase):
+    async def test_fold_stores_summary(self):
+        builder = ContextBuilder()
+        builder.redis = AsyncMock()
+        builder.think = AsyncMock(return_value="User likes BTC.")
+
+        result = await builder.fold("42", "", ["User: I like BTC"])
+
+        self.assertEqual(result, "User likes BTC.")
+        builder.redis.set.assert_awaited_once_with("chat_summary:42", "User likes BTC.", ex=600)
+
+    async def test_failed_fold_returns_none(self):
+        builder = ContextBuilder()
+        builder.redis = AsyncMock()
+        builder.think = AsyncMock(return_value="❌ Brain Error: timeout")
+
+        self.assertIsNone(await builder.fold("42", "old", ["User: hi"]))
+        builder.redis.set.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
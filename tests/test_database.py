@@ -0,0 +1,200 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import json
+import os
+import sys
+
+sys.modules['asyncpg'] = MagicMock()
+sys.modules['redis'] = MagicMock()
+sys.modules['redis.asyncio'] = MagicMock()
+sys.modules['dotenv'] = MagicMock()
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import database as database_module
+from src.core.database import DatabaseManager, SETTINGS_CHANNEL
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.fetch = AsyncMock(side_effect=lambda query: [dict(r) for r in self.rows])
+        self.executemany = AsyncMock()
+
+    def transaction(self):
+        tx = MagicMock()
+        tx.__aenter__ = AsyncMock()
+        tx.__aexit__ = AsyncMock(return_value=False)
+        return tx
+
+def fake_pool(conn):
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+    return pool
+
+class TestSettingsCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.conn = FakeConnection([{"key": "ai_provider", "value": "gemini"}])
+        self.db = DatabaseManager()
+        self.db.pg_pool = fake_pool(self.conn)
+
+    async def test_reads_hit_postgres_once(self):
+        self.assertEqual(await self.db.get_setting("ai_provider"), "gemini")
+        self.assertIsNone(await self.db.get_setting("missing"))
+        self.assertEqual(await self.db.get_all_settings(), {"ai_provider": "gemini"})
+        self.assertEqual(self.conn.fetch.await_count, 1)
+
+    async def test_set_writes_through_and_notifies(self):
+        await self.db.load_settings()
+        self.db.dragonfly = AsyncMock()
+        listener = AsyncMock()
+        self.db.on_settings_change(listener)
+
+        ok = await self.db.set_settings({"ai_provider": "openai", "openai_model": "qwen2.5:7b"})
+
+        self.assertTrue(ok)
+        self.assertEqual(await self.db.get_setting("ai_provider"), "openai")
+        self.assertEqual(self.conn.fetch.await_count, 1)
+        self.conn.executemany.assert_awaited_once()
+        channel, payload = self.db.dragonfly.publish.await_args.args
+        self.assertEqual(channel, SETTINGS_CHANNEL)
+        self.assertEqual(json.loads(payload)["keys"], ["ai_provider", "openai_model"])
+        listener.assert_awaited_once_with(["ai_provider", "openai_model"])
+
+    async def test_remote_invalidation_reloads(self):
+        await self.db.load_settings()
+        listener = AsyncMock()
+        self.db.on_settings_change(listener)
+
+        messages = [
+            {"type": "subscribe", "data": 1},
+            {"type": "message", "data": json.dumps({"origin": self.db.instance_id, "keys": ["ai_provider"]})},
+            {"type": "message", "data": json.dumps({"origin": "other", "keys": ["ai_provider"]})},
+        ]
+
+        async def listen():
+            for message in messages:
+                yield message
+            await asyncio.Event().wait()
+
+        pubsub = MagicMock()
+        pubsub.subscribe = AsyncMock()
+        pubsub.reset = AsyncMock()
+        pubsub.listen = listen
+        self.db.dragonfly = MagicMock()
+        self.db.dragonfly.pubsub.return_value = pubsub
+        self.conn.rows = [{"key": "ai_provider", "value": "auto"}]
+
+        task = asyncio.create_task(self.db._listen_settings())
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+        self.assertEqual(await self.db.get_setting("ai_provider"), "auto")
+        listener.assert_awaited_once_with(["ai_provider"])
+
+class TestInstrumentedQueries(unittest.IsolatedAsyncioTestCase):
+    async def test_queries_record_latency_and_pool_wait(self):
+        conn = MagicMock()
+        conn.fetch = AsyncMock(return_value=[{"data": {"weight": 70.5}, "created_at": None}])
+        conn.execute = AsyncMock()
+        db = DatabaseManager()
+        db.pg_pool = fake_pool(conn)
+
+        await db.log_health_data(1, "weight", {"weight": 70.5})
+        rows = await db.get_recent_health_logs(1, "weight")
+
+        # Codec JSONB: dict dikirim & diterima apa adanya
+        self.assertEqual(conn.execute.await_args.args[3], {"weight": 70.5})
+        self.assertEqual(rows[0]["data"], {"weight": 70.5})
+        self.assertEqual(db.metrics.histograms["(pool wait)"].count, 2)
+        self.assertEqual(db.metrics.histograms["log health data"].count, 1)
+        self.assertIn("recent health logs", db.stats_summary())
+
+    async def test_failed_query_counted_as_error(self):
+        conn = MagicMock()
+        conn.fetchrow = AsyncMock(side_effect=RuntimeError("boom"))
+        db = DatabaseManager()
+        db.pg_pool = fake_pool(conn)
+
+        self.assertIsNone(await db.add_rss_feed("https://x.test/rss"))
+        self.assertEqual(db.metrics.histograms["add rss feed"].errors, 1)
+
+    async def test_init_registers_json_codecs(self):
+        conn = MagicMock()
+        conn.set_type_codec = AsyncMock()
+        await DatabaseManager._init_connection(conn)
+        types = [c.args[0] for c in conn.set_type_codec.await_args_list]
+        self.assertEqual(types, ["json", "jsonb"])
+
+class TestArticleDedup(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.conn = MagicMock()
+        self.conn.fetch = AsyncMock(return_value=[{"article_url": "https://x.test/2"}])
+        self.db = DatabaseManager()
+        self.db.pg_pool = fake_pool(self.conn)
+        self.pipe = MagicMock()
+        self.pipe.execute = AsyncMock()
+        self.db.dragonfly = MagicMock()
+        self.db.dragonfly.pipeline.return_value = self.pipe
+        patcher = patch.object(database_module, "RSS_SEEN_TTL", 100)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        clock = patch.object(database_module.time, "time", return_value=1050)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    async def test_seen_set_then_single_any_query(self):
+        urls = ["https://x.test/1", "https://x.test/2", "https://x.test/3", "https://x.test/1", None]
+        # /1 ada di bucket saat ini, /2 hanya di bucket sebelumnya
+        self.pipe.execute = AsyncMock(return_value=[[1, 0, 0], [0, 1, 0]])
+
+        new = await self.db.filter_new_articles(5, urls)
+
+        self.assertEqual(new, ["https://x.test/3"])
+        unique = ["https://x.test/1", "https://x.test/2", "https://x.test/3"]
+        self.assertEqual(
+            [c.args for c in self.pipe.smismember.call_args_list],
+            [("rss:seen:5:10", unique), ("rss:seen:5:9", unique)]
+        )
+        self.conn.fetch.assert_awaited_once()
+        self.assertIn("ANY($1", self.conn.fetch.await_args.args[0])
+        self.assertEqual(self.conn.fetch.await_args.args[1], ["https://x.test/3"])
+
+    async def test_all_seen_skips_postgres(self):
+        self.pipe.execute = AsyncMock(return_value=[[1, 0], [0, 1]])
+        self.assertEqual(await self.db.filter_new_articles(5, ["https://x.test/1", "https://x.test/2"]), [])
+        self.conn.fetch.assert_not_awaited()
+
+    async def test_links_found_in_postgres_join_current_bucket(self):
+        self.pipe.execute = AsyncMock(return_value=[[0, 0], [0, 0]])
+
+        new = await self.db.filter_new_articles(5, ["https://x.test/1", "https://x.test/2"])
+
+        self.assertEqual(new, ["https://x.test/1"])
+        self.pipe.sadd.assert_called_once_with("rss:seen:5:10", "https://x.test/2")
+        # Expire tetap di akhir bucket berikutnya, tidak bergeser setiap kali ditambah
+        self.pipe.expireat.assert_called_once_with("rss:seen:5:10", 1200)
+        self.pipe.expire.assert_not_called()
+
+    async def test_pending_articles_inserted_in_one_query(self):
+        articles = [
+            {"link": "https://x.test/1", "title": "a", "summary": "s1"},
+            {"link": "https://x.test/2", "title": "b", "summary": "s2"},
+        ]
+        inserted = await self.db.add_pending_articles(5, articles, source="X")
+
+        self.assertEqual(inserted, ["https://x.test/2"])  # /1 sudah diklaim replika lain
+        self.conn.fetch.assert_awaited_once()
+        args = self.conn.fetch.await_args.args
+        self.assertIn("INSERT INTO rss_logs", args[0])
+        self.assertEqual(args[1:], (5, ["https://x.test/1", "https://x.test/2"], ["a", "b"], ["s1", "s2"], "X", "pending"))
+        self.pipe.sadd.assert_called_once_with("rss:seen:5:10", "https://x.test/2")
+
+    async def test_query_failure_returns_none(self):
+        self.db.dragonfly = None
+        self.conn.fetch = AsyncMock(side_effect=RuntimeError("boom"))
+        self.assertIsNone(await self.db.filter_new_articles(5, ["https://x.test/1"]))
+
+if __name__ == '__main__':
+    unittest.main()
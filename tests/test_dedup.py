@@ -0,0 +1,37 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.dedup import content_id, identity_text, merge_payloads
+
+class TestDedup(unittest.TestCase):
+    def test_content_id_is_deterministic_and_normalized(self):
+        a = content_id("Buy  milk\ntomorrow", 42, "discord_command")
+        b = content_id("buy milk tomorrow ", "42", "discord_command")
+        self.assertEqual(a, b)
+
+    def test_content_id_scoped_by_user_and_source(self):
+        base = content_id("same note", 1, "discord_command")
+        self.assertNotEqual(base, content_id("same note", 2, "discord_command"))
+        self.assertNotEqual(base, content_id("same note", 1, "rss"))
+
+    def test_identity_prefers_url(self):
+        payload = {"type": "news", "title": "A", "summary": "changes every run", "url": "https://x.test/a"}
+        self.assertEqual(identity_text(payload), "https://x.test/a")
+        self.assertEqual(identity_text({"content": "hello"}), "hello")
+
+    def test_merge_keeps_first_seen_and_counts(self):
+        existing = {"content": "old", "timestamp": "2024-01-01T00:00:00+00:00"}
+        merged = merge_payloads(existing, {"content": "new", "timestamp": "2024-02-01T00:00:00+00:00"})
+        self.assertEqual(merged["content"], "new")
+        self.assertEqual(merged["first_seen"], "2024-01-01T00:00:00+00:00")
+        self.assertEqual(merged["seen_count"], 2)
+
+        again = merge_payloads(merged, {"content": "newer"})
+        self.assertEqual(again["first_seen"], "2024-01-01T00:00:00+00:00")
+        self.assertEqual(again["seen_count"], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from types import SimpleNamespace
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.hybrid import BM25Encoder, tokenize, term_index, reciprocal_rank_fusion
+
+class TestHybrid(unittest.TestCase):
+    def test_tokenize_keeps_compound_terms(self):
+        tokens = tokenize("Price of BTC-USD hit KeyError: get_user_id")
+        self.assertIn("btc-usd", tokens)
+        self.assertIn("btc", tokens)
+        self.assertIn("usd", tokens)
+        self.assertIn("keyerror", tokens)
+        self.assertIn("get_user_id", tokens)
+
+    def test_term_index_is_stable(self):
+        self.assertEqual(term_index("btc"), term_index("btc"))
+        self.assertNotEqual(term_index("btc"), term_index("eth"))
+
+    def test_document_weights_saturate(self):
+        encoder = BM25Encoder()
+        indices, values = encoder.encode_document("btc btc btc btc eth")
+        weights = dict(zip(indices, values))
+
+        self.assertEqual(indices, sorted(indices))
+        self.assertGreater(weights[term_index("btc")], weights[term_index("eth")])
+        self.assertLess(weights[term_index("btc")], 4 * weights[term_index("eth")])
+
+    def test_query_weights_are_binary(self):
+        indices, values = BM25Encoder().encode_query("btc btc eth")
+        self.assertEqual(len(indices), 2)
+        self.assertEqual(values, [1.0, 1.0])
+
+    def test_empty_text(self):
+        self.assertEqual(BM25Encoder().encode_document(""), ([], []))
+
+    def test_rrf_rewards_agreement(self):
+        a, b, c = (SimpleNamespace(id=i, score=0.0) for i in "abc")
+        dense = [a, b, c]
+        sparse = [b, c]
+
+        fused = reciprocal_rank_fusion([dense, sparse], limit=2)
+
+        self.assertEqual([p.id for p in fused], ["b", "c"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -56,7 +56,8 @@ class TestIngestionSecurity(unittest.IsolatedAsyncioTestCase):
         ctx.send = AsyncMock()
         ctx.typing.return_value.__aenter__ = AsyncMock()
         ctx.typing.return_value.__aexit__ = AsyncMock()
-        ctx.author = "testuser"
+        ctx.author = MagicMock()
+        ctx.author.id = 1234
 
         small_attachment = MagicMock()
         small_attachment.filename = "small.txt"
@@ -69,15 +70,14 @@ class TestIngestionSecurity(unittest.IsolatedAsyncioTestCase):
         with patch('src.cogs.ingestion.brain') as mock_brain, \
              patch('src.cogs.ingestion.memory') as mock_memory:
 
-            mock_brain.embed_content = AsyncMock(return_value=[0.1, 0.2])
-            mock_memory.client.upsert = AsyncMock()
-            mock_memory.collection_name = "test_collection"
+            mock_brain.embed_many = AsyncMock(return_value=([[0.1, 0.2]], {}))
+            mock_memory.store = AsyncMock(return_value=True)
 
             await self.cog.memorize(ctx, content=None)
 
             # Verify small file was read and processed
             small_attachment.read.assert_called_once()
-            mock_memory.client.upsert.assert_called_once()
+            mock_memory.store.assert_called_once()
 
 if __name__ == '__main__':
     unittest.main()
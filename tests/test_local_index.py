@@ -0,0 +1,117 @@
+import unittest
+import datetime
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from src.core.local_index import LocalVectorIndex, matches
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+@unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+class TestPayloadMatching(unittest.TestCase):
+    def test_keyword_filters(self):
+        payload = {"user_id": "42", "type": "note", "source": "discord_command"}
+        self.assertTrue(matches(payload, user_id="42"))
+        self.assertTrue(matches(payload, user_id=["1", "42"]))
+        self.assertFalse(matches(payload, user_id="7"))
+        self.assertFalse(matches(payload, memory_type="news"))
+
+    def test_unowned_points_only_when_requested(self):
+        legacy = {"content": "old note", "author": "someone#1234"}
+        self.assertFalse(matches(legacy, user_id=["42", "system_rss"]))
+        self.assertTrue(matches(legacy, user_id=["42", "system_rss"], include_unowned=True))
+        self.assertFalse(matches({"user_id": "7"}, user_id="42", include_unowned=True))
+
+    def test_time_range(self):
+        payload = {"timestamp": "2024-05-01T10:00:00+00:00"}
+        self.assertTrue(matches(payload, since="2024-04-01T00:00:00+00:00"))
+        self.assertFalse(matches(payload, since=datetime.datetime(2024, 6, 1, tzinfo=datetime.timezone.utc)))
+        self.assertFalse(matches({}, since="2024-04-01T00:00:00"))
+
+@unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+class TestLocalVectorIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index_class = LocalVectorIndex
+        self.index = LocalVectorIndex(self.tmp.name).load()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_search_and_filter(self):
+        self.index.upsert([
+            {"id": "a", "vector": [1.0, 0.0], "payload": {"user_id": "1"}},
+            {"id": "b", "vector": [0.0, 1.0], "payload": {"user_id": "2"}},
+        ])
+
+        hits = self.index.search([0.9, 0.1], limit=1)
+        self.assertEqual(hits[0].id, "a")
+
+        hits = self.index.search([0.9, 0.1], limit=2, user_id="2")
+        self.assertEqual([h.id for h in hits], ["b"])
+
+    def test_persists_and_tracks_pending(self):
+        self.index.upsert([{"id": "a", "vector": [1.0, 0.0], "payload": {"n": 1}}], pending=True)
+        self.index.upsert([{"id": "a", "vector": [0.0, 1.0], "payload": {"n": 2}}])
+
+        reloaded = self.index_class(self.tmp.name).load()
+        self.assertEqual(reloaded.count, 1)
+        self.assertEqual(reloaded.payloads[0], {"n": 2})
+        self.assertEqual(reloaded.pending, {"a"})
+
+        batch = reloaded.pending_points()
+        self.assertEqual(batch[0]["id"], "a")
+        reloaded.mark_synced(["a"])
+        self.assertEqual(self.index_class(self.tmp.name).load().pending, set())
+
+    def test_ivf_search_finds_nearest(self):
+        import numpy as np
+        rng = np.random.default_rng(1)
+        index = self.index_class(self.tmp.name, ivf_min_points=500, nprobe=4).load()
+        vectors = rng.normal(size=(1000, 8))
+        index.upsert([{"id": str(i), "vector": v.tolist(), "payload": {}} for i, v in enumerate(vectors)])
+
+        hits = index.search(vectors[123].tolist(), limit=1)
+        self.assertEqual(hits[0].id, "123")
+
+    def test_concurrent_upserts_and_search(self):
+        import numpy as np
+        import threading
+        errors = []
+
+        def writer(offset):
+            rng = np.random.default_rng(offset)
+            try:
+                for batch in range(20):
+                    # Banyak batch kecil memaksa _grow (remap) saat thread lain aktif
+                    self.index.upsert([
+                        {"id": f"{offset}-{batch}-{i}", "vector": rng.normal(size=8).tolist(), "payload": {}}
+                        for i in range(60)
+                    ])
+            except Exception as e:
+                errors.append(e)
+
+        def reader():
+            try:
+                for _ in range(200):
+                    self.index.search([1.0] * 8, limit=3)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(3)] + [threading.Thread(target=reader)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.index.count, 3 * 20 * 60)
+        self.assertEqual(len(set(self.index.ids)), self.index.count)
+
+if __name__ == '__main__':
+    unittest.main()
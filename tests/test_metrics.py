@@ -0,0 +1,36 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.metrics import LatencyHistogram, QueryMetrics
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_buckets_and_percentiles(self):
+        h = LatencyHistogram(buckets=[1, 10, 100])
+        for ms in [0.5, 5, 5, 5, 50, 500]:
+            h.observe(ms)
+
+        self.assertEqual(h.counts, [1, 3, 1, 1])
+        self.assertEqual(h.percentile(0.5), 10)
+        self.assertEqual(h.percentile(1.0), 500)
+        self.assertEqual(h.max, 500)
+        self.assertAlmostEqual(h.mean, 565.5 / 6)
+
+    def test_empty_histogram(self):
+        self.assertIsNone(LatencyHistogram().percentile(0.5))
+
+    def test_summary_sorted_by_total_time(self):
+        m = QueryMetrics()
+        m.observe("fast", 1)
+        m.observe("slow", 200, error=True)
+        lines = m.summary().splitlines()
+
+        self.assertTrue(lines[1].startswith("slow"))
+        self.assertTrue(lines[1].rstrip().endswith("1"))
+        m.reset()
+        self.assertEqual(m.summary(), "No queries recorded")
+
+if __name__ == '__main__':
+    unittest.main()
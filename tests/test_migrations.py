@@ -0,0 +1,119 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import os
+import sys
+import tempfile
+
+class UndefinedTableError(Exception):
+    pass
+
+mock_asyncpg = MagicMock(UndefinedTableError=UndefinedTableError)
+sys.modules['asyncpg'] = mock_asyncpg
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import migrations as migrations_module
+from src.core.migrations import migrate, load_migrations, Migration, ADVISORY_LOCK_KEY
+
+class FakeConnection:
+    def __init__(self, version=None, applied=(), lock_busy=0):
+        self.version = version
+        self.applied = list(applied)
+        self.lock_busy = lock_busy  # jumlah percobaan lock yang gagal (replika lain memegangnya)
+        self.lock_attempts = 0
+        self.executed = []
+        self.in_transaction = False
+        self.fetchval = AsyncMock(side_effect=self._fetchval)
+        self.fetch = AsyncMock(side_effect=lambda q: [{"version": v} for v in self.applied])
+
+    async def _fetchval(self, query, *args):
+        if "pg_try_advisory_lock" in query:
+            self.lock_attempts += 1
+            self.executed.append((query.strip(), args, self.in_transaction))
+            return self.lock_attempts > self.lock_busy
+        if self.version is None:
+            raise UndefinedTableError("relation \"schema_migrations\" does not exist")
+        return self.version
+
+    async def execute(self, query, *args):
+        self.executed.append((query.strip(), args, self.in_transaction))
+
+    def transaction(self):
+        conn = self
+        class Tx:
+            async def __aenter__(self):
+                conn.in_transaction = True
+            async def __aexit__(self, *exc):
+                conn.in_transaction = False
+                return False
+        return Tx()
+
+def pool_for(conn):
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+    return pool
+
+MIGRATIONS = [
+    Migration(1, "initial", "CREATE TABLE a (id INT);\nCREATE TABLE b (id INT);"),
+    Migration(2, "index", "-- migrate: no-transaction\nCREATE INDEX CONCURRENTLY i1 ON a(id);\nCREATE INDEX CONCURRENTLY i2 ON b(id);"),
+]
+
+class TestMigrations(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # asyncpg mungkin sudah di-stub oleh test lain (tanpa kelas exception) sebelum modul ini diimport
+        patcher = patch.object(migrations_module, "asyncpg", mock_asyncpg)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bundled_migrations_load_in_order(self):
+        migrations = load_migrations()
+        self.assertEqual([m.version for m in migrations][:2], [1, 2])
+        self.assertTrue(migrations[0].transactional)
+        self.assertFalse(migrations[1].transactional)
+        self.assertEqual(len(migrations[1].statements()), 1)
+
+    def test_duplicate_versions_rejected(self):
+        with tempfile.TemporaryDirectory() as path:
+            for name in ["0001_a.sql", "001_b.sql"]:
+                with open(os.path.join(path, name), "w") as f:
+                    f.write("SELECT 1;")
+            with self.assertRaises(ValueError):
+                load_migrations(path)
+
+    async def test_up_to_date_is_a_single_query(self):
+        conn = FakeConnection(version=2)
+        self.assertEqual(await migrate(pool_for(conn), MIGRATIONS), [])
+        self.assertEqual(conn.fetchval.await_count, 1)
+        self.assertEqual(conn.executed, [])
+
+    async def test_fresh_database_applies_all_under_lock(self):
+        conn = FakeConnection(version=None)
+        applied = await migrate(pool_for(conn), MIGRATIONS)
+
+        self.assertEqual(applied, [1, 2])
+        self.assertEqual(conn.executed[0], ("SELECT pg_try_advisory_lock($1)", (ADVISORY_LOCK_KEY,), False))
+        self.assertEqual(conn.executed[-1], ("SELECT pg_advisory_unlock($1)", (ADVISORY_LOCK_KEY,), False))
+
+        initial = [e for e in conn.executed if "CREATE TABLE a" in e[0]]
+        self.assertTrue(initial[0][2])  # dalam transaksi
+        concurrent = [e for e in conn.executed if "CONCURRENTLY" in e[0]]
+        self.assertEqual(len(concurrent), 2)
+        self.assertTrue(all(not in_tx for _, _, in_tx in concurrent))
+
+    async def test_skips_versions_applied_by_another_replica(self):
+        conn = FakeConnection(version=0, applied=[1])
+        self.assertEqual(await migrate(pool_for(conn), MIGRATIONS), [2])
+        self.assertFalse(any("CREATE TABLE a" in e[0] for e in conn.executed))
+
+    async def test_waits_for_lock_by_polling(self):
+        conn = FakeConnection(version=0, applied=[1, 2], lock_busy=2)
+        with patch.object(migrations_module.asyncio, "sleep", AsyncMock()) as sleep:
+            self.assertEqual(await migrate(pool_for(conn), MIGRATIONS), [])
+
+        self.assertEqual(conn.lock_attempts, 3)
+        self.assertEqual(sleep.await_count, 2)
+        self.assertFalse(any("pg_advisory_lock(" in e[0] for e in conn.executed))
+
+if __name__ == '__main__':
+    unittest.main()
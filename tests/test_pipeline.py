@@ -0,0 +1,80 @@
+import unittest
+import asyncio
+
+from src.core.pipeline import Pipeline
+
+class TestPipeline(unittest.IsolatedAsyncioTestCase):
+    async def test_fan_out_and_drop(self):
+        results = []
+
+        async def split(n):
+            return list(range(n))
+
+        async def keep_even(x):
+            return x if x % 2 == 0 else None
+
+        async def collect(x):
+            results.append(x)
+
+        pipeline = Pipeline("test")
+        pipeline.add_stage("split", split, fan_out=True)
+        pipeline.add_stage("filter", keep_even, workers=2)
+        pipeline.add_stage("collect", collect)
+        pipeline.start()
+        await pipeline.put("split", 6)
+        await pipeline.join()
+        await pipeline.close()
+
+        self.assertEqual(sorted(results), [0, 2, 4])
+        self.assertEqual([s["processed"] for s in pipeline.summary()], [1, 6, 3])
+
+    async def test_backpressure_bounds_queues(self):
+        release = asyncio.Event()
+
+        async def passthrough(x):
+            return x
+
+        async def slow(x):
+            await release.wait()
+
+        pipeline = Pipeline("test")
+        pipeline.add_stage("first", passthrough, queue_size=2)
+        pipeline.add_stage("slow", slow, queue_size=2)
+        pipeline.start()
+
+        async def produce():
+            for i in range(10):
+                await pipeline.put("first", i)
+
+        producer = asyncio.create_task(produce())
+        await asyncio.sleep(0.05)
+        # Stage lambat penuh -> worker "first" tertahan -> producer ikut tertahan
+        self.assertFalse(producer.done())
+        self.assertLessEqual(pipeline.stages[1].queue.qsize(), 2)
+        self.assertLessEqual(pipeline.stages[0].queue.qsize(), 2)
+
+        release.set()
+        await producer
+        await pipeline.join()
+        await pipeline.close()
+        self.assertEqual(pipeline.summary()[1]["processed"], 10)
+
+    async def test_handler_error_counted_and_pipeline_continues(self):
+        async def flaky(x):
+            if x == 1:
+                raise ValueError("boom")
+            return x
+
+        pipeline = Pipeline("test")
+        pipeline.add_stage("flaky", flaky)
+        pipeline.start()
+        for i in range(3):
+            await pipeline.put("flaky", i)
+        await pipeline.join()
+        await pipeline.close()
+
+        self.assertEqual(pipeline.summary()[0]["errors"], 1)
+        self.assertEqual(pipeline.summary()[0]["processed"], 3)
+
+if __name__ == '__main__':
+    unittest.main()
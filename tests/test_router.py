@@ -0,0 +1,135 @@
+import unittest
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.router import ProviderRouter
+
+class TestProviderRouter(unittest.IsolatedAsyncioTestCase):
+    def test_rank_prefers_faster_provider(self):
+        router = ProviderRouter()
+        router.record("gemini", latency=2.0)
+        router.record("openai", latency=0.5)
+
+        self.assertEqual(router.rank(["gemini", "openai"]), ["openai", "gemini"])
+
+    def test_failing_provider_goes_last(self):
+        router = ProviderRouter(error_threshold=0.3)
+        router.record("gemini", latency=0.1)
+        router.record("openai", latency=1.0)
+        for _ in range(3):
+            router.record("gemini", error=True)
+
+        self.assertFalse(router.is_healthy("gemini"))
+        self.assertEqual(router.rank(["gemini", "openai"]), ["openai", "gemini"])
+
+    def test_hedge_delay_uses_p90(self):
+        router = ProviderRouter(min_hedge_delay=0.0)
+        self.assertEqual(router.hedge_delay("gemini"), router.default_hedge_delay)
+        for latency in [0.1] * 9 + [1.0]:
+            router.record("gemini", latency=latency)
+        self.assertEqual(router.hedge_delay("gemini"), 1.0)
+
+    async def test_hedge_fast_primary_skips_secondary(self):
+        router = ProviderRouter()
+        started = []
+
+        async def primary():
+            return "primary"
+
+        async def secondary():
+            started.append("secondary")
+            return "secondary"
+
+        self.assertEqual(await router.hedge(primary, secondary, delay=1.0), "primary")
+        self.assertEqual(started, [])
+
+    async def test_hedge_slow_primary_is_cancelled(self):
+        router = ProviderRouter()
+        cancelled = asyncio.Event()
+
+        async def primary():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def secondary():
+            return "secondary"
+
+        result = await router.hedge(primary, secondary, delay=0.01)
+        await asyncio.sleep(0)
+
+        self.assertEqual(result, "secondary")
+        self.assertTrue(cancelled.is_set())
+        self.assertEqual(router.stats["hedge_wins"], 1)
+
+    async def test_hedge_fails_over_on_error(self):
+        router = ProviderRouter()
+
+        async def primary():
+            raise RuntimeError("down")
+
+        async def secondary():
+            return "secondary"
+
+        self.assertEqual(await router.hedge(primary, secondary, delay=1.0), "secondary")
+
+    async def test_cancelled_caller_cancels_primary_during_delay(self):
+        router = ProviderRouter()
+        cancelled = asyncio.Event()
+
+        async def primary():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def secondary():
+            return "secondary"
+
+        caller = asyncio.create_task(router.hedge(primary, secondary, delay=5.0))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+
+        self.assertTrue(cancelled.is_set())
+        self.assertEqual(router.stats["hedged"], 0)
+
+    async def test_simultaneous_loser_result_is_discarded(self):
+        router = ProviderRouter()
+        discarded = []
+        release = asyncio.Event()
+
+        async def primary():
+            await release.wait()
+            return "late"
+
+        async def secondary():
+            release.set()
+            return "fast"
+
+        result = await router.hedge(primary, secondary, delay=0.01, discard=discarded.append)
+        await asyncio.sleep(0.01)
+
+        # Keduanya selesai di iterasi yang sama: satu menang, yang lain di-discard (mis. stream ditutup)
+        self.assertEqual(sorted([result] + discarded), ["fast", "late"])
+
+    async def test_timed_records_errors(self):
+        router = ProviderRouter()
+
+        async def boom():
+            raise RuntimeError("down")
+
+        with self.assertRaises(RuntimeError):
+            await router.timed("openai", boom)
+        self.assertGreater(router.health["openai"].error_rate, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,282 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import hashlib
+import sys
+
+class MockCog:
+    @staticmethod
+    def listener(*args, **kwargs):
+        return lambda f: f
+
+class MockLoop:
+    """Stand-in for tasks.loop: keeps the coroutine callable and start() a no-op"""
+    def __init__(self, func):
+        self.func = func
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        bound = lambda *args, **kwargs: self.func(obj, *args, **kwargs)
+        bound.start = lambda: None
+        bound.cancel = lambda: None
+        return bound
+
+    def before_loop(self, func):
+        return func
+
+mock_commands = MagicMock()
+mock_commands.Cog = MockCog
+mock_tasks = MagicMock()
+mock_tasks.loop = lambda **kwargs: MockLoop
+mock_ext = MagicMock()
+mock_ext.commands = mock_commands
+mock_ext.tasks = mock_tasks
+
+mock_app_commands = MagicMock()
+mock_app_commands.Group.return_value.command = lambda **kwargs: (lambda f: f)
+
+mock_discord = MagicMock()
+mock_discord.app_commands = mock_app_commands
+# patch.dict: mock hanya berlaku saat import, agar test file lain tetap memakai modul asli
+with patch.dict(sys.modules, {
+    'discord': mock_discord,
+    'discord.ext': mock_ext,
+    'discord.ext.commands': mock_commands,
+    'discord.ext.tasks': mock_tasks,
+    'discord.app_commands': mock_app_commands,
+    'feedparser': MagicMock(),
+    'bs4': MagicMock(),
+    'src.core.database': MagicMock(),
+    'src.core.brain': MagicMock(),
+    'src.core.memory': MagicMock(),
+    'src.core.http': MagicMock(),
+}):
+    from src.core import feeds as feeds_module
+    from src.cogs import rss as rss_module
+    from src.cogs.rss import RSS
+
+class TestRSSPolling(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cog = RSS(MagicMock())
+        self.cog.feed_channel_id = 1
+        self.db = rss_module.db
+        self.db.get_unfinished_articles = AsyncMock(return_value=[])
+
+    async def test_feeds_polled_concurrently_with_per_host_limit(self):
+        feeds = [
+            {"id": 1, "url": "https://a.example/rss", "category": "x"},
+            {"id": 2, "url": "https://a.example/atom", "category": "x"},
+            {"id": 3, "url": "https://a.example/news", "category": "x"},
+            {"id": 4, "url": "https://b.example/rss", "category": "x"},
+        ]
+        self.db.get_rss_feeds = AsyncMock(return_value=feeds)
+
+        active = {"a.example": 0, "b.example": 0}
+        peak = {"a.example": 0, "b.example": 0, "total": 0}
+        running = []
+
+        async def fetch(feed):
+            host = feed["url"].split("/")[2]
+            active[host] += 1
+            running.append(feed["id"])
+            peak[host] = max(peak[host], active[host])
+            peak["total"] = max(peak["total"], len(running))
+            await asyncio.sleep(0.05)
+            running.remove(feed["id"])
+            active[host] -= 1
+            return "ok", []
+
+        self.cog._fetch_feed = fetch
+        await self.cog.rss_loop()
+
+        self.assertEqual(peak["a.example"], rss_module.RSS_PER_HOST)
+        self.assertEqual(peak["b.example"], 1)
+        self.assertGreater(peak["total"], 1)
+        self.assertEqual(len(self.cog.last_cycle["feeds"]), 4)
+        self.assertTrue(all(status == "ok" for _, _, status in self.cog.last_cycle["feeds"]))
+
+    async def test_slow_or_failing_feed_does_not_block_cycle(self):
+        feeds = [
+            {"id": 1, "url": "https://slow.example/rss", "category": "x"},
+            {"id": 2, "url": "https://broken.example/rss", "category": "x"},
+            {"id": 3, "url": "https://fine.example/rss", "category": "x"},
+        ]
+        self.db.get_rss_feeds = AsyncMock(return_value=feeds)
+
+        async def fetch(feed):
+            if "slow" in feed["url"]:
+                await asyncio.sleep(10)
+            if "broken" in feed["url"]:
+                raise ValueError("bad xml")
+            return "ok", []
+
+        self.cog._fetch_feed = fetch
+        original = rss_module.RSS_FEED_TIMEOUT
+        rss_module.RSS_FEED_TIMEOUT = 0.05
+        try:
+            await self.cog.rss_loop()
+        finally:
+            rss_module.RSS_FEED_TIMEOUT = original
+
+        statuses = {url: status for url, _, status in self.cog.last_cycle["feeds"]}
+        self.assertEqual(statuses["https://slow.example/rss"], "timeout")
+        self.assertEqual(statuses["https://broken.example/rss"], "error")
+        self.assertEqual(statuses["https://fine.example/rss"], "ok")
+        self.assertLess(self.cog.last_cycle["duration"], 1)
+
+class TestConditionalGet(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cog = RSS(MagicMock())
+        self.db = rss_module.db
+        self.db.update_rss_feed_cache = AsyncMock(return_value=True)
+        self.db.filter_new_articles = AsyncMock(return_value=[])
+        self.db.add_pending_articles = AsyncMock(side_effect=lambda feed_id, articles, source=None, status="pending": [a["link"] for a in articles])
+        self.http = rss_module.http_client
+        self.parse_feed = rss_module.feed_parser.parse_feed = AsyncMock(return_value={"title": "A", "bozo": False, "entries": []})
+        self.feed = {
+            "id": 7, "url": "https://a.example/rss", "category": "x",
+            "etag": '"v1"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+            "content_hash": hashlib.sha256(b"<rss/>").hexdigest(), "checked_at": "2024-01-01",
+        }
+
+    def response(self, status, body=b"", headers=None):
+        resp = MagicMock(status=status, body=body, headers=headers or {})
+        resp.text.return_value = body.decode()
+        return resp
+
+    async def test_not_modified_skips_parsing(self):
+        self.http.fetch = AsyncMock(return_value=self.response(304))
+
+        status, articles = await self.cog._fetch_feed(self.feed)
+
+        self.assertEqual((status, articles), ("not modified", []))
+        headers = self.http.fetch.call_args.kwargs["headers"]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(headers["If-Modified-Since"], "Mon, 01 Jan 2024 00:00:00 GMT")
+        self.parse_feed.assert_not_awaited()
+        self.db.update_rss_feed_cache.assert_not_called()
+
+    async def test_unchanged_body_hash_skips_parsing(self):
+        self.http.fetch = AsyncMock(return_value=self.response(200, b"<rss/>"))
+
+        self.assertEqual(await self.cog._fetch_feed(self.feed), ("unchanged", []))
+        self.parse_feed.assert_not_awaited()
+
+    async def test_changed_feed_stores_new_validators(self):
+        self.http.fetch = AsyncMock(return_value=self.response(200, b"<rss>new</rss>", {"ETag": '"v2"'}))
+
+        self.assertEqual(await self.cog._fetch_feed(self.feed), ("ok", []))
+        self.parse_feed.assert_awaited_once_with(b"<rss>new</rss>")
+        self.db.update_rss_feed_cache.assert_awaited_once_with(
+            7, '"v2"', None, hashlib.sha256(b"<rss>new</rss>").hexdigest()
+        )
+
+    async def test_new_entries_recorded_as_pending(self):
+        entries = [{"link": f"https://a.example/{i}", "title": f"t{i}", "summary": ""} for i in range(6)]
+        self.http.fetch = AsyncMock(return_value=self.response(200, b"<rss>six</rss>"))
+        self.parse_feed.return_value = {"title": "A", "bozo": False, "entries": entries + entries[:1]}
+        self.db.filter_new_articles = AsyncMock(return_value=[e["link"] for e in entries[1:]])
+
+        status, articles = await self.cog._fetch_feed(self.feed)
+
+        # Tanpa batas 3 entry; link ganda dalam feed hanya sekali
+        self.assertEqual(status, "ok")
+        self.assertEqual([a["link"] for a in articles], [e["link"] for e in entries[1:]])
+        self.db.add_pending_articles.assert_awaited_once()
+        self.db.update_rss_feed_cache.assert_awaited_once()
+
+    async def test_first_poll_records_baseline_without_publishing(self):
+        entries = [{"link": f"https://a.example/{i}", "title": f"t{i}", "summary": ""} for i in range(20)]
+        self.http.fetch = AsyncMock(return_value=self.response(200, b"<rss>backlog</rss>"))
+        self.parse_feed.return_value = {"title": "A", "bozo": False, "entries": entries}
+        self.db.filter_new_articles = AsyncMock(return_value=[e["link"] for e in entries])
+        feed = dict(self.feed, checked_at=None, etag=None, last_modified=None, content_hash=None)
+
+        self.assertEqual(await self.cog._fetch_feed(feed), ("baseline", []))
+        self.assertEqual(self.db.add_pending_articles.await_args.kwargs["status"], "done")
+        self.db.update_rss_feed_cache.assert_awaited_once()
+
+class TestRSSPipeline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cog = RSS(MagicMock())
+        self.cog.feed_channel_id = 1
+        self.channel = MagicMock()
+        self.channel.send = AsyncMock()
+        self.cog.bot.get_channel.return_value = self.channel
+        self.cog.fetch_full_content = AsyncMock(return_value="body")
+
+        self.db = rss_module.db
+        self.db.set_article_status = AsyncMock(return_value=True)
+        self.brain = rss_module.brain
+        self.brain.think = AsyncMock(return_value="summary")
+        self.brain.embed_content = AsyncMock(return_value=[0.1])
+        rss_module.memory.remember = AsyncMock()
+
+    def statuses(self, status):
+        return [c.args[0] for c in self.db.set_article_status.await_args_list if c.args[1] == status]
+
+    async def run_cycle(self):
+        with patch.object(rss_module.asyncio, "sleep", AsyncMock()):
+            await self.cog.rss_loop()
+
+    async def test_articles_flow_through_all_stages_and_resume(self):
+        feed = {"id": 1, "url": "https://a.example/rss", "category": "x"}
+        self.db.get_rss_feeds = AsyncMock(return_value=[feed])
+        articles = [
+            {"feed_id": 1, "category": "x", "source": "A", "link": f"https://a.example/{i}", "title": f"t{i}", "summary": ""}
+            for i in range(5)
+        ]
+        self.cog._fetch_feed = AsyncMock(return_value=("ok", articles))
+        # Sisa run sebelumnya: sudah diringkas tapi belum dipublikasikan
+        self.db.get_unfinished_articles = AsyncMock(return_value=[{
+            "feed_id": 1, "article_url": "https://a.example/old", "title": "old", "summary": "old summary",
+            "source": "A", "status": "summarized", "category": "x",
+        }])
+
+        await self.run_cycle()
+
+        self.assertEqual(self.brain.think.await_count, 5)  # artikel resume tidak diringkas ulang
+        self.assertEqual(self.channel.send.await_count, 6)
+        self.assertEqual(len(self.statuses("summarized")), 5)
+        self.assertEqual(sorted(self.statuses("done")), sorted([a["link"] for a in articles] + ["https://a.example/old"]))
+        self.assertEqual(rss_module.memory.remember.await_count, 6)
+        self.assertEqual(self.cog.last_cycle["resumed"], 1)
+        stages = {s["stage"]: s for s in self.cog.last_cycle["stages"]}
+        self.assertEqual(stages["persist"]["processed"], 6)
+
+    async def test_failed_summary_stays_pending(self):
+        feed = {"id": 1, "url": "https://a.example/rss", "category": "x"}
+        self.db.get_rss_feeds = AsyncMock(return_value=[feed])
+        self.db.get_unfinished_articles = AsyncMock(return_value=[])
+        article = {"feed_id": 1, "category": "x", "source": "A", "link": "https://a.example/1", "title": "t", "summary": ""}
+        self.cog._fetch_feed = AsyncMock(return_value=("ok", [article]))
+        self.brain.think = AsyncMock(return_value="❌ Brain Error: quota")
+
+        await self.run_cycle()
+
+        self.channel.send.assert_not_awaited()
+        self.db.set_article_status.assert_not_awaited()
+
+class TestFeedParser(unittest.IsolatedAsyncioTestCase):
+    async def test_parsing_runs_off_the_event_loop(self):
+        import threading
+
+        threads = []
+        def parse(body):
+            threads.append(threading.current_thread().name)
+            return MagicMock(bozo=0, feed={"title": "A"}, entries=[{"link": "https://a.example/1"}])
+        feeds_module.feedparser.parse = parse
+
+        parser = feeds_module.FeedParser(workers=1)
+        try:
+            result = await parser.parse_feed(b"<rss/>")
+        finally:
+            parser.close()
+
+        self.assertTrue(threads[0].startswith("feed-parse"))
+        self.assertEqual(result["title"], "A")
+        self.assertEqual(result["entries"], [{"link": "https://a.example/1", "title": "No Title", "summary": ""}])
+
+if __name__ == '__main__':
+    unittest.main()
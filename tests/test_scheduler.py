@@ -0,0 +1,181 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.scheduler import LLMScheduler, TokenBucket, error_status
+
+class RateLimited(Exception):
+    status_code = 429
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_empty(self):
+        bucket = TokenBucket(rate=1, capacity=2)
+        self.assertTrue(bucket.try_take())
+        self.assertTrue(bucket.try_take())
+        self.assertFalse(bucket.try_take())
+        self.assertGreater(bucket.wait_time(), 0)
+
+    def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0, capacity=1)
+        for _ in range(10):
+            self.assertTrue(bucket.try_take())
+        self.assertEqual(bucket.wait_time(), 0)
+
+class TestLLMScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrency_cap(self):
+        scheduler = LLMScheduler()
+        scheduler.configure("gemini", rpm=6000, max_concurrency=2)
+        running = 0
+        peak = 0
+
+        async def call():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return "ok"
+
+        results = await asyncio.gather(*[scheduler.run("gemini", call) for _ in range(6)])
+
+        self.assertEqual(results, ["ok"] * 6)
+        self.assertEqual(peak, 2)
+
+    async def test_interactive_jumps_queue(self):
+        scheduler = LLMScheduler()
+        scheduler.configure("gemini", rpm=6000, max_concurrency=1)
+        gate = asyncio.Event()
+        order = []
+
+        async def blocker():
+            await gate.wait()
+
+        def job(name):
+            async def call():
+                order.append(name)
+            return call
+
+        first = asyncio.create_task(scheduler.run("gemini", blocker, "background"))
+        await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(scheduler.run("gemini", job("bg1"), "background")),
+            asyncio.create_task(scheduler.run("gemini", job("bg2"), "background")),
+            asyncio.create_task(scheduler.run("gemini", job("chat"), "interactive")),
+        ]
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.lane("gemini").depth, 3)
+
+        gate.set()
+        await asyncio.gather(first, *queued)
+
+        self.assertEqual(order, ["chat", "bg1", "bg2"])
+
+    async def test_retries_rate_limit_errors(self):
+        scheduler = LLMScheduler(max_retries=3)
+        attempts = 0
+
+        async def call():
+            nonlocal attempts
+            attempts += 1
+            if attempts < 3:
+                raise RateLimited("429 Too Many Requests")
+            return "ok"
+
+        with patch.object(scheduler, '_backoff', return_value=0):
+            result = await scheduler.run("openai", call)
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(scheduler.lane("openai").retries, 2)
+
+    async def test_non_retryable_error_is_raised(self):
+        scheduler = LLMScheduler()
+
+        async def call():
+            raise ValueError("bad request")
+
+        with self.assertRaises(ValueError):
+            await scheduler.run("openai", call)
+        self.assertEqual(scheduler.lane("openai").failures, 1)
+        self.assertEqual(scheduler.lane("openai").active, 0)
+
+    async def test_zero_rpm_does_not_spin(self):
+        scheduler = LLMScheduler()
+        scheduler.configure("openai", rpm=0, max_concurrency=2)
+
+        async def call():
+            return "ok"
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*[scheduler.run("openai", call) for _ in range(10)]), timeout=1
+        )
+
+        self.assertEqual(results, ["ok"] * 10)
+        self.assertIsNone(scheduler.lane("openai")._wakeup)
+
+    async def test_stream_holds_slot_until_exhausted(self):
+        scheduler = LLMScheduler()
+        scheduler.configure("gemini", rpm=6000, max_concurrency=1)
+        lane = scheduler.lane("gemini")
+        gate = asyncio.Event()
+
+        async def chunks():
+            yield "a"
+            await gate.wait()
+            yield "b"
+
+        async def open_stream():
+            return chunks()
+
+        async def consume():
+            out = []
+            async with scheduler.stream("gemini", open_stream) as stream:
+                async for chunk in stream:
+                    out.append(chunk)
+            return out
+
+        reader = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        self.assertEqual(lane.active, 1)
+
+        async def call():
+            return "ok"
+
+        other = asyncio.create_task(scheduler.run("gemini", call))
+        await asyncio.sleep(0.01)
+        self.assertFalse(other.done())
+
+        gate.set()
+        self.assertEqual(await reader, ["a", "b"])
+        self.assertEqual(await other, "ok")
+        self.assertEqual(lane.active, 0)
+
+    async def test_stream_retries_open_without_leaking_slot(self):
+        scheduler = LLMScheduler(max_retries=3)
+        attempts = 0
+
+        async def open_stream():
+            nonlocal attempts
+            attempts += 1
+            if attempts < 2:
+                raise RateLimited("429")
+            return "stream"
+
+        with patch.object(scheduler, '_backoff', return_value=0):
+            async with scheduler.stream("openai", open_stream) as stream:
+                self.assertEqual(stream, "stream")
+                self.assertEqual(scheduler.lane("openai").active, 1)
+
+        self.assertEqual(scheduler.lane("openai").retries, 1)
+        self.assertEqual(scheduler.lane("openai").active, 0)
+
+    def test_error_status(self):
+        self.assertEqual(error_status(RateLimited()), 429)
+        self.assertEqual(error_status(Exception("503 Service Unavailable")), 503)
+        self.assertIsNone(error_status(Exception("boom")))
+
+if __name__ == '__main__':
+    unittest.main()
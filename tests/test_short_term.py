@@ -0,0 +1,171 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+
+class WatchError(Exception):
+    pass
+
+sys.modules.setdefault('redis', MagicMock())
+sys.modules.setdefault('redis.exceptions', MagicMock(WatchError=WatchError))
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import short_term as short_term_module
+from src.core.short_term import ShortTermMemory
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+        self.watching = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def watch(self, key):
+        self.watching = (key, list(self.redis.data.get(key, [])))
+
+    def multi(self):
+        pass
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self.watching is not None and not self.ops and name == "lrange":
+            # Setelah WATCH, perintah dijalankan langsung (immediate mode)
+            async def immediate(*args):
+                self.redis.round_trips += 1
+                result = getattr(self.redis, f"_{name}")(*args)
+                if self.redis.on_read:
+                    self.redis.on_read()
+                return result
+            return immediate
+
+        def queue(*args, **kwargs):
+            self.ops.append((name, args))
+            return self
+        return queue
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        if self.watching is not None:
+            key, snapshot = self.watching
+            if self.redis.data.get(key, []) != snapshot:
+                raise WatchError(key)
+        return [getattr(self.redis, f"_{name}")(*args) for name, args in self.ops]
+
+class FakeRedis:
+    """Minimal Dragonfly stand-in: lists, strings and pipelines"""
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.round_trips = 0
+        self.on_read = None  # hook: simulasi penulis lain di antara WATCH dan EXEC
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def _rpush(self, key, value):
+        self.data.setdefault(key, []).append(value.encode("utf-8"))
+        return len(self.data[key])
+
+    def _ltrim(self, key, start, end):
+        items = self.data.get(key, [])
+        end = len(items) if end == -1 else end + 1
+        self.data[key] = items[start:end] if start >= 0 else items[max(len(items) + start, 0):end]
+        return True
+
+    def _expire(self, key, ttl):
+        if key in self.data:
+            self.expires[key] = ttl
+        return key in self.data
+
+    def _lrange(self, key, start, end):
+        items = list(self.data.get(key, []))
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def _get(self, key):
+        return self.data.get(key)
+
+class TestShortTermMemory(unittest.IsolatedAsyncioTestCase):
+    async def test_add_and_load_is_one_round_trip(self):
+        stm = ShortTermMemory(ttl=300)
+        stm.redis = FakeRedis()
+        stm.redis.data["chat_summary:1"] = b"Likes BTC"
+
+        turns, summary = await stm.add_and_load("1", "User: hi")
+
+        self.assertEqual(turns, ["User: hi"])
+        self.assertEqual(summary, "Likes BTC")
+        self.assertEqual(stm.redis.round_trips, 1)
+        self.assertEqual(stm.redis.expires, {"chat:1": 300, "chat_summary:1": 300})
+
+    async def test_list_is_capped(self):
+        stm = ShortTermMemory(max_turns=4)
+        stm.redis = FakeRedis()
+        for i in range(10):
+            await stm.add("1", f"User: {i}")
+
+        turns, _ = await stm.add_and_load("1", "User: last")
+
+        self.assertEqual(turns, ["User: 7", "User: 8", "User: 9", "User: last"])
+
+    def setUp(self):
+        patcher = patch.object(short_term_module, "WatchError", WatchError)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_drop_folded_matches_current_head(self):
+        stm = ShortTermMemory(max_turns=4)
+        stm.redis = FakeRedis()
+        for i in range(4):
+            await stm.add("1", f"User: {i}")
+        snapshot_overflow = ["User: 0", "User: 1"]
+        # Setelah snapshot: turn baru masuk dan cap LTRIM membuang "User: 0"
+        await stm.add("1", "Assistant: 3")
+
+        dropped = await stm.drop_folded("1", snapshot_overflow)
+
+        self.assertEqual(dropped, 1)
+        self.assertEqual(stm.redis.data["chat:1"], [b"User: 2", b"User: 3", b"Assistant: 3"])
+
+    async def test_drop_folded_twice_is_a_no_op(self):
+        stm = ShortTermMemory()
+        stm.redis = FakeRedis()
+        for i in range(3):
+            await stm.add("1", f"User: {i}")
+
+        self.assertEqual(await stm.drop_folded("1", ["User: 0", "User: 1"]), 2)
+        self.assertEqual(await stm.drop_folded("1", ["User: 0", "User: 1"]), 0)
+        self.assertEqual(stm.redis.data["chat:1"], [b"User: 2"])
+
+    async def test_drop_folded_retries_when_list_changes(self):
+        stm = ShortTermMemory()
+        stm.redis = FakeRedis()
+        for i in range(3):
+            await stm.add("1", f"User: {i}")
+
+        def concurrent_push():
+            stm.redis.on_read = None
+            stm.redis._rpush("chat:1", "User: 3")
+        stm.redis.on_read = concurrent_push
+
+        self.assertEqual(await stm.drop_folded("1", ["User: 0"]), 1)
+        self.assertEqual(stm.redis.data["chat:1"], [b"User: 1", b"User: 2", b"User: 3"])
+
+    async def test_without_dragonfly_returns_current_turn(self):
+        stm = ShortTermMemory()
+        self.assertEqual(await stm.add_and_load("1", "User: hi"), (["User: hi"], ""))
+
+    async def test_errors_fall_back(self):
+        stm = ShortTermMemory()
+        stm.redis = MagicMock()
+        stm.redis.pipeline.side_effect = ConnectionError("down")
+        self.assertEqual(await stm.add_and_load("1", "User: hi"), (["User: hi"], ""))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+
+# Mock qdrant models before importing the profile module
+sys.modules['qdrant_client'] = MagicMock()
+sys.modules['qdrant_client.models'] = MagicMock()
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.storage_profile import StorageProfile
+
+class TestStorageProfile(unittest.TestCase):
+    def test_default_profile_keeps_qdrant_defaults(self):
+        with patch.dict(os.environ, {}, clear=True):
+            profile = StorageProfile.from_env()
+
+        self.assertEqual(profile.name, "default")
+        self.assertIsNone(profile.search_params())
+        self.assertIsNone(profile.quantization_config())
+        self.assertEqual(list(profile.collection_kwargs(768)), ["vectors_config"])
+        self.assertEqual(profile.update_kwargs(), {})
+
+    def test_named_profile_with_env_overrides(self):
+        env = {"QDRANT_PROFILE": "balanced", "QDRANT_SEARCH_EF": "200", "QDRANT_ON_DISK": "true"}
+        with patch.dict(os.environ, env, clear=True):
+            profile = StorageProfile.from_env()
+
+        self.assertEqual(profile.quantization, "scalar")
+        self.assertEqual(profile.search_ef, 200)
+        self.assertTrue(profile.on_disk)
+        self.assertIsNotNone(profile.search_params())
+        self.assertIn("quantization_config", profile.collection_kwargs(768))
+
+    def test_quantization_none_disables(self):
+        with patch.dict(os.environ, {"QDRANT_PROFILE": "balanced", "QDRANT_QUANTIZATION": "none"}, clear=True):
+            profile = StorageProfile.from_env()
+        self.assertIsNone(profile.quantization_config())
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            StorageProfile.from_name("nope")
+        with patch.dict(os.environ, {"QDRANT_PROFILE": "nope"}, clear=True):
+            self.assertEqual(StorageProfile.from_env().name, "default")
+
+if __name__ == '__main__':
+    unittest.main()
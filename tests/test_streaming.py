@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.streaming import DiscordStreamSink
+
+class FakeChannel:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, content):
+        message = MagicMock()
+        message.content = content
+
+        async def edit(content):
+            message.content = content
+
+        message.edit = AsyncMock(side_effect=edit)
+        self.messages.append(message)
+        return message
+
+class TestDiscordStreamSink(unittest.IsolatedAsyncioTestCase):
+    async def test_first_chunk_is_sent_immediately(self):
+        channel = FakeChannel()
+        sink = DiscordStreamSink(channel, min_interval=60)
+
+        await sink.write("Hello")
+
+        self.assertEqual(len(channel.messages), 1)
+        self.assertEqual(channel.messages[0].content, "Hello")
+
+    async def test_edits_are_throttled_and_flushed_on_close(self):
+        channel = FakeChannel()
+        sink = DiscordStreamSink(channel, min_interval=60)
+
+        for chunk in ["Hello", " wor", "ld"]:
+            await sink.write(chunk)
+
+        # Interval belum lewat: belum ada edit
+        channel.messages[0].edit.assert_not_called()
+
+        text = await sink.close()
+        self.assertEqual(text, "Hello world")
+        self.assertEqual(channel.messages[0].content, "Hello world")
+
+    async def test_rollover_at_limit(self):
+        channel = FakeChannel()
+        sink = DiscordStreamSink(channel, min_interval=0, limit=20)
+
+        words = ["word%02d " % i for i in range(10)]  # 70 chars
+        for w in words:
+            await sink.write(w)
+        text = await sink.close()
+
+        self.assertEqual(text, "".join(words))
+        self.assertGreater(len(channel.messages), 1)
+        self.assertTrue(all(len(m.content) <= 20 for m in channel.messages))
+        self.assertEqual("".join(m.content for m in channel.messages), text)
+
+    async def test_empty_stream_sends_fallback(self):
+        channel = FakeChannel()
+        sink = DiscordStreamSink(channel)
+
+        text = await sink.close(fallback="(no response)")
+
+        self.assertEqual(text, "(no response)")
+        self.assertEqual(channel.messages[0].content, "(no response)")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.tokens import estimate_tokens, pack_batches, trim_to_tokens
+
+class TestTokens(unittest.TestCase):
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens(None), 0)
+        self.assertEqual(estimate_tokens("abc"), 1)
+        self.assertEqual(estimate_tokens("a" * 400), 100)
+
+    def test_pack_batches_by_item_count(self):
+        batches = pack_batches(["x"] * 5, max_items=2, max_tokens=1000)
+        self.assertEqual(batches, [[0, 1], [2, 3], [4]])
+
+    def test_pack_batches_by_token_budget(self):
+        texts = ["a" * 40, "b" * 40, "c" * 40]  # 10 tokens each
+        batches = pack_batches(texts, max_items=100, max_tokens=25)
+        self.assertEqual(batches, [[0, 1], [2]])
+
+    def test_oversized_item_gets_its_own_batch(self):
+        texts = ["a" * 4, "b" * 4000, "c" * 4]
+        batches = pack_batches(texts, max_items=100, max_tokens=50)
+        self.assertEqual(batches, [[0], [1], [2]])
+
+    def test_item_token_cap(self):
+        texts = ["a" * 4000, "b" * 4000]  # 1000 tokens each, capped at 10
+        batches = pack_batches(texts, max_items=100, max_tokens=25, max_item_tokens=10)
+        self.assertEqual(batches, [[0, 1]])
+
+    def test_trim_to_tokens(self):
+        self.assertEqual(trim_to_tokens("short", 10), "short")
+        self.assertEqual(trim_to_tokens("", 10), "")
+        self.assertLessEqual(estimate_tokens(trim_to_tokens("word " * 100, 10)), 10)
+        self.assertTrue(trim_to_tokens("word " * 100, 10).endswith("word…"))
+        self.assertLessEqual(estimate_tokens(trim_to_tokens("b" * 40000, 8191)), 8191)
+
+    def test_preserves_order(self):
+        batches = pack_batches([str(i) for i in range(7)], max_items=3, max_tokens=1000)
+        self.assertEqual([i for b in batches for i in b], list(range(7)))
+
+if __name__ == '__main__':
+    unittest.main()